@@ -1,53 +1,150 @@
 """
 Festival Simulator - Main Flask Application
 """
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+import gzip
+import math
+import threading
+from functools import wraps
+from types import MappingProxyType
+from flask import Flask, render_template, request, jsonify, redirect, url_for, make_response
 from flask_sqlalchemy import SQLAlchemy
-from flask_socketio import SocketIO, emit
+from flask.json.provider import DefaultJSONProvider
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from models import db, Festival, Artist, Vendor
+from db_upgrade import upgrade_database
 from game_systems.game_coordinator import GameCoordinator
+from game_systems.state_sync import FestivalStateSync
+from game_systems.offer_cache import OfferCache
 import json
 import random
 import os
 
+# Optional payload encodings for /api/festival
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+class FestivalJSONProvider(DefaultJSONProvider):
+    """JSON provider that also serializes the game systems' frozen catalogs"""
+    
+    @staticmethod
+    def default(o):
+        if isinstance(o, MappingProxyType):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///festival_sim.db'
+app.json = FestivalJSONProvider(app)
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///festival_sim.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = 'your-secret-key-here'
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
 
 db.init_app(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+
+# async_mode is picked up from the installed server (eventlet, gevent or threading)
+# unless SOCKETIO_ASYNC_MODE is set; game state is per process, so run a single worker
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=os.environ.get('SOCKETIO_ASYNC_MODE') or None,
+    message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None,
+    json=app.json
+)
 
 # Initialize game coordinator
 game_coordinator = GameCoordinator()
 
-# Cache for available artists and vendors to ensure consistency
-available_artists_cache = {}
-available_vendors_cache = {}
-
-def get_cached_artists(count=5):
-    """Get cached available artists, generating new ones if cache is empty"""
-    # Use a single cache key for consistency across all requests
-    cache_key = "artists"
-    if cache_key not in available_artists_cache:
-        available_artists_cache[cache_key] = game_coordinator.get_available_artists(count)
-    return available_artists_cache[cache_key]
-
-def get_cached_vendors(count=5):
-    """Get cached available vendors, generating new ones if cache is empty"""
-    # Use a single cache key for consistency across all requests
-    cache_key = "vendors"
-    if cache_key not in available_vendors_cache:
-        available_vendors_cache[cache_key] = game_coordinator.get_available_vendors(count)
-    return available_vendors_cache[cache_key]
-
-def clear_artist_cache():
-    """Clear the artist cache to force regeneration"""
-    available_artists_cache.clear()
-
-def clear_vendor_cache():
-    """Clear the vendor cache to force regeneration"""
-    available_vendors_cache.clear()
+# Last festival payload sent to each Socket.IO festival room
+state_sync = FestivalStateSync()
+
+def festival_etag(view=None, variant=None, vary=(), validate=None):
+    """Tag a festival read endpoint with the festival's version and answer If-None-Match with 304.
+    
+    The version is checked with a single-column lookup before the view runs,
+    so an unchanged festival costs no game-system work. variant, if given,
+    returns a suffix naming the representation the request negotiated, so
+    each encoding of a version gets its own tag; vary names the headers it
+    reads and is sent on 304s as well. validate, if given, returns an error
+    response for a malformed request (or None) and runs first, so bad
+    arguments are never answered with 304.
+    """
+    if view is None:
+        return lambda view: festival_etag(view, variant, vary, validate)
+    
+    @wraps(view)
+    def wrapper(festival_id, *args, **kwargs):
+        if validate:
+            error = validate()
+            if error is not None:
+                return error
+        
+        version = db.session.query(Festival.version).filter(Festival.id == festival_id).scalar()
+        if version is None:
+            return view(festival_id, *args, **kwargs)
+        
+        etag = f'{festival_id}-{version}{variant() if variant else ""}'
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            response = make_response(view(festival_id, *args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        response.vary.update(vary)
+        return response
+    return wrapper
+
+# Each festival sees its own artist offers until it hires or they expire
+artist_offers = OfferCache(
+    ttl=int(os.environ.get('ARTIST_OFFER_TTL', 900)),
+    max_entries=int(os.environ.get('ARTIST_OFFER_FESTIVALS', 256))
+)
+
+# Most vendors one /api/vendors/market/generate request may add
+MARKET_GENERATE_LIMIT = int(os.environ.get('MARKET_GENERATE_LIMIT', 5000))
+
+def get_cached_artists(festival_id, count=5):
+    """Get a festival's cached artist offers, generating new ones if it has none.
+    
+    Festivals that do not exist get no offers, so stray ids never fill the cache.
+    """
+    if Festival.query.get(festival_id) is None:
+        return []
+    
+    with artist_offers.lock(festival_id):
+        artists = artist_offers.get(festival_id, lambda: game_coordinator.get_available_artists(count))
+        
+        # Grow the pool without replacing offers players have already seen
+        while len(artists) < count:
+            artists.append(game_coordinator.artist_system.generate_single_artist(len(artists) + 1))
+        return list(artists)
+
+def get_candidate_artists(festival_id, pool_size):
+    """Scoring pool of pool_size artists: the festival's offers, topped up with generated candidates.
+    
+    The extra candidates are not cached, so scoring a large pool never grows
+    the offers the player sees and hires from.
+    """
+    offers = get_cached_artists(festival_id)
+    extra = [
+        game_coordinator.artist_system.generate_single_artist(len(offers) + i + 1)
+        for i in range(pool_size - len(offers))
+    ]
+    return (offers + extra)[:pool_size]
+
+def clear_artist_cache(festival_id=None):
+    """Clear one festival's artist offers, or every festival's, to force regeneration"""
+    if festival_id is None:
+        artist_offers.clear()
+    else:
+        artist_offers.invalidate(festival_id)
 
 @app.route('/')
 def index():
@@ -75,7 +172,8 @@ def create_festival():
         budget=float(data.get('budget', 100000)),
         reputation=50,
         venue_capacity=20000,
-        marketing_budget=0
+        marketing_budget=0,
+        stages=game_coordinator.schedule_system.build_default_stages()
     )
     
     db.session.add(festival)
@@ -92,23 +190,113 @@ def dashboard(festival_id):
     # Use the refactored template for better modularity
     return render_template('dashboard_refactored.html', festival=festival, festivals=festivals)
 
+# Top-level sections of the festival payload, and the keys of its 'festival' section
+FESTIVAL_SECTIONS = ('festival', 'artists', 'vendors', 'tickets', 'marketing', 'events',
+                     'synergies', 'vendor_relationships', 'vendor_relationship_summary')
+FESTIVAL_KEYS = ('id', 'name', 'days_remaining', 'budget', 'current_budget', 'reputation',
+                 'venue_capacity', 'marketing_budget', 'version')
+
+# Sections diffed into live dashboard patches; events are rolled at random on
+# every build, so they travel whole beside the patch instead of inside it
+LIVE_FESTIVAL_FIELDS = {section: None for section in FESTIVAL_SECTIONS if section != 'events'}
+
+# Response formats /api/festival can negotiate from Accept, and the smallest body worth compressing
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+COMPRESS_MIN_BYTES = 512
+
+def parse_festival_fields(value):
+    """Parse a fields= selector such as 'festival.budget,festival.reputation,artists'.
+    
+    Returns a dict of section -> set of 'festival' keys (None for the whole
+    section), or None when no selector was given. Raises ValueError for
+    unknown fields.
+    """
+    if not value:
+        return None
+    
+    fields = {}
+    for field in filter(None, (part.strip() for part in value.split(','))):
+        section, _, key = field.partition('.')
+        if section not in FESTIVAL_SECTIONS or (key and (section != 'festival' or key not in FESTIVAL_KEYS)):
+            raise ValueError(f'Unknown field: {field}')
+        if not key:
+            fields[section] = None
+        elif fields.get(section, set()) is not None:
+            fields.setdefault(section, set()).add(key)
+    return fields
+
+def negotiate_festival_encoding():
+    """(format, content coding) to answer the current request with, from its Accept headers"""
+    payload_format = 'json'
+    if msgpack is not None:
+        best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+        if best in MSGPACK_MIMETYPES:
+            payload_format = 'msgpack'
+    
+    coding = None
+    encodings = request.accept_encodings
+    if brotli is not None and encodings['br']:
+        coding = 'br'
+    elif encodings['gzip']:
+        coding = 'gzip'
+    return payload_format, coding
+
+def festival_encoding_variant():
+    """ETag suffix for the representation negotiated by negotiate_festival_encoding"""
+    return ''.join(f'-{part}' for part in negotiate_festival_encoding() if part and part != 'json')
+
+def encode_festival_payload(payload):
+    """Serialize a payload as negotiated JSON or MessagePack, compressed if the client accepts it"""
+    payload_format, coding = negotiate_festival_encoding()
+    if payload_format == 'msgpack':
+        body = msgpack.packb(payload, default=app.json.default)
+        mimetype = MSGPACK_MIMETYPES[0]
+    else:
+        body = app.json.dumps(payload).encode()
+        mimetype = 'application/json'
+    
+    # Tiny bodies stay uncompressed; the ETag still names the coding so
+    # every representation of a version keeps a stable tag
+    if coding and len(body) >= COMPRESS_MIN_BYTES:
+        body = brotli.compress(body, quality=5) if coding == 'br' else gzip.compress(body, compresslevel=6)
+    else:
+        coding = None
+    
+    response = app.response_class(body, mimetype=mimetype)
+    if coding:
+        response.content_encoding = coding
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+def validate_festival_fields():
+    """400 response if the request's fields= selector is malformed, otherwise None"""
+    try:
+        parse_festival_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return None
+
 @app.route('/api/festival/<int:festival_id>')
+@festival_etag(variant=festival_encoding_variant, vary=('Accept', 'Accept-Encoding'), validate=validate_festival_fields)
 def get_festival_data(festival_id):
-    """Get comprehensive festival data"""
+    """Get festival data, limited to the sections named in fields= if given"""
     festival = Festival.query.get_or_404(festival_id)
-    artists = Artist.query.filter_by(festival_id=festival_id).all()
-    vendors = Vendor.query.filter_by(festival_id=festival_id).all()
+    return encode_festival_payload(build_festival_payload(festival, parse_festival_fields(request.args.get('fields'))))
+
+def build_festival_payload(festival, fields=None):
+    """Build the festival state in the structure expected by the frontend.
     
-    # Get synergies and relationships
-    synergies = game_coordinator.artist_system.calculate_genre_synergies(festival_id)
-    vendor_relationships = game_coordinator.vendor_system.calculate_vendor_relationships(festival_id)
+    fields, as returned by parse_festival_fields, limits the payload to the
+    sections asked for; sections left out are never computed.
+    """
+    def wanted(section):
+        return fields is None or section in fields
     
-    # Get dynamic events
-    dynamic_events = game_coordinator.event_system.check_for_dynamic_events(festival)
+    festival_id = festival.id
+    festival_data = {}
     
-    # Convert to the structure expected by frontend
-    festival_data = {
-        'festival': {
+    if wanted('festival'):
+        festival_data['festival'] = {
             'id': festival.id,
             'name': festival.name,
             'days_remaining': festival.days_remaining,
@@ -116,9 +304,14 @@ def get_festival_data(festival_id):
             'current_budget': festival.budget,  # Add this for frontend compatibility
             'reputation': festival.reputation,
             'venue_capacity': festival.venue_capacity,
-            'marketing_budget': festival.marketing_budget
-        },
-        'artists': [
+            'marketing_budget': festival.marketing_budget,
+            'version': festival.version
+        }
+        if fields and fields['festival'] is not None:
+            festival_data['festival'] = {key: value for key, value in festival_data['festival'].items() if key in fields['festival']}
+    
+    if wanted('artists'):
+        festival_data['artists'] = [
             {
                 'id': artist.id,
                 'name': artist.name,
@@ -128,9 +321,11 @@ def get_festival_data(festival_id):
                 'performance_duration': artist.performance_duration,
                 'stage_requirements': artist.stage_requirements,
                 'status': 'confirmed'  # Default status
-            } for artist in artists
-        ],
-        'vendors': [
+            } for artist in Artist.query.filter_by(festival_id=festival_id).all()
+        ]
+    
+    if wanted('vendors'):
+        festival_data['vendors'] = [
             {
                 'id': vendor.id,
                 'name': vendor.name,
@@ -140,26 +335,88 @@ def get_festival_data(festival_id):
                 'cost': vendor.cost,
                 'revenue': vendor.revenue,
                 'status': 'confirmed'  # Default status
-            } for vendor in vendors
-        ],
-        'tickets': [
+            } for vendor in Vendor.query.filter_by(festival_id=festival_id).all()
+        ]
+    
+    if wanted('tickets'):
+        festival_data['tickets'] = [
             {
                 'id': 1,
                 'type': 'General Admission',
                 'price': 50.0,
-                'sold_quantity': 0,
+                'sold_quantity': festival.tickets_sold or 0,
                 'total_quantity': festival.venue_capacity
             }
-        ],
-        'marketing': [],
-        'events': dynamic_events,  # Add dynamic events to the response
-        'synergies': synergies,
-        'vendor_relationships': vendor_relationships
-    }
+        ]
+    
+    if wanted('marketing'):
+        festival_data['marketing'] = [campaign.to_dict() for campaign in festival.campaigns]
     
-    return jsonify(festival_data)
+    # Get dynamic events
+    if wanted('events'):
+        festival_data['events'] = game_coordinator.event_system.check_for_dynamic_events(festival)
+    
+    # Get synergies and relationships
+    if wanted('synergies'):
+        festival_data['synergies'] = game_coordinator.artist_system.calculate_genre_synergies(festival_id)
+    if wanted('vendor_relationships') or wanted('vendor_relationship_summary'):
+        vendor_system = game_coordinator.vendor_system
+        summary = vendor_system.calculate_vendor_relationships(festival_id)
+        if wanted('vendor_relationships'):
+            festival_data['vendor_relationships'] = vendor_system.list_vendor_relationships(festival_id, summary=summary)['relationships']
+        if wanted('vendor_relationship_summary'):
+            festival_data['vendor_relationship_summary'] = summary
+    
+    return festival_data
+
+def festival_state(festival):
+    """Festival payload without events as plain JSON values (dates as jsonify renders them), ready to diff or emit"""
+    return json.loads(app.json.dumps(build_festival_payload(festival, LIVE_FESTIVAL_FIELDS)))
+
+def festival_events(festival):
+    """A new roll of the festival's dynamic events as plain JSON values, sent whole beside the diffed state"""
+    return json.loads(app.json.dumps(game_coordinator.event_system.check_for_dynamic_events(festival)))
+
+def push_festival_update(festival_id):
+    """Send a festival's room a JSON patch from the last payload it was sent to the current one"""
+    if state_sync.snapshot(festival_id) is None:
+        return  # Nobody is watching
+    
+    festival = Festival.query.get(festival_id)
+    if not festival:
+        state_sync.unwatch(festival_id)
+        return
+    if state_sync.snapshot(festival_id)[0] == festival.version:
+        return  # Nothing changed
+    
+    change = state_sync.update(festival_id, festival.version, festival_state(festival))
+    if change:
+        from_version, patch = change
+        socketio.emit('festival_patch', {
+            'festival_id': festival_id,
+            'from_version': from_version,
+            'version': festival.version,
+            'patch': patch,
+            'events': festival_events(festival)
+        }, to=state_sync.room(festival_id))
+
+def pushes_festival_update(view):
+    """After a mutating endpoint, push the festival's changes to its Socket.IO room"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = view(*args, **kwargs)
+        festival_id = kwargs.get('festival_id')
+        if festival_id is None:
+            festival_id = (request.get_json(silent=True) or {}).get('festival_id')
+        try:
+            push_festival_update(int(festival_id))
+        except (TypeError, ValueError):
+            pass
+        return response
+    return wrapper
 
 @app.route('/api/advance_time/<int:festival_id>', methods=['POST'])
+@pushes_festival_update
 def advance_time(festival_id):
     """Advance time by one day"""
     result = game_coordinator.advance_time(festival_id)
@@ -169,20 +426,89 @@ def advance_time(festival_id):
 def get_available_artists():
     """Get available artists for hiring"""
     count = request.args.get('count', 5, type=int)
-    artists = get_cached_artists(count)
-    return jsonify(artists)
+    festival_id = request.args.get('festival_id', 1, type=int)  # Default to festival 1
+    if Festival.query.get(festival_id) is None:
+        return jsonify({'success': False, 'error': 'Festival not found'}), 404
+    artists = get_cached_artists(festival_id, count)
+    return jsonify(artists[:count])
 
 @app.route('/api/artists')
 def get_artists():
     """Get all available artists (alias for available)"""
     return get_available_artists()
 
+@app.route('/api/artists/build_lineup/<int:festival_id>', methods=['POST'])
+def build_lineup(festival_id):
+    """Suggest the best lineup of market artists within the festival's budget"""
+    data = request.get_json() or {}
+    try:
+        pool_size = parse_whole_number(data, 'pool_size')
+        time_limit_ms = parse_whole_number(data, 'time_limit_ms')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        budget = parse_number(data, 'budget')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    genre_targets = data.get('genre_targets') or {}
+    if not isinstance(genre_targets, dict) or not all(isinstance(target, int) for target in genre_targets.values()):
+        return jsonify({'success': False, 'error': 'genre_targets must map genres to whole numbers'}), 400
+    
+    pool_size = min(max(5 if pool_size is None else pool_size, 1), 5000)
+    time_limit_ms = min(max(250 if time_limit_ms is None else time_limit_ms, 10), 2000)
+    
+    result = game_coordinator.build_lineup(
+        festival_id,
+        get_candidate_artists(festival_id, pool_size),
+        budget,
+        genre_targets,
+        time_limit_ms / 1000
+    )
+    return jsonify(result)
+
+@app.route('/api/artists/recommend/<int:festival_id>')
+def recommend_artists(festival_id):
+    """Rank market artists by the marginal value they would add"""
+    top_k = min(max(request.args.get('top_k', 5, type=int), 1), 100)
+    pool_size = min(max(request.args.get('pool_size', 5, type=int), 1), 5000)
+    
+    result = game_coordinator.recommend_artists(festival_id, get_candidate_artists(festival_id, pool_size), top_k)
+    return jsonify(result)
+
 @app.route('/api/vendors/available')
 def get_available_vendors():
-    """Get available vendors for hiring"""
-    count = request.args.get('count', 5, type=int)
-    vendors = get_cached_vendors(count)
-    return jsonify(vendors)
+    """Get available vendors for hiring, filtered and paginated by cursor"""
+    count = min(max(request.args.get('count', 5, type=int), 1), 100)
+    sort = request.args.get('sort', 'id')
+    if sort not in ('id', 'quality', 'cost'):
+        return jsonify({'success': False, 'error': 'sort must be id, quality or cost'}), 400
+    
+    try:
+        vendors, next_cursor = game_coordinator.get_available_vendors(
+            count,
+            specialty=request.args.get('specialty'),
+            min_quality=request.args.get('min_quality', type=int),
+            max_quality=request.args.get('max_quality', type=int),
+            min_cost=request.args.get('min_cost', type=float),
+            max_cost=request.args.get('max_cost', type=float),
+            sort=sort,
+            after=request.args.get('after')
+        )
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    
+    response = jsonify(vendors)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+@app.route('/api/vendors/recommend/<int:festival_id>')
+def recommend_vendors(festival_id):
+    """Rank every market vendor by its fit with the current vendor mix"""
+    top_k = min(max(request.args.get('top_k', 5, type=int), 1), 100)
+    
+    result = game_coordinator.recommend_vendors(festival_id, top_k)
+    return jsonify(result)
 
 @app.route('/api/vendors')
 def get_vendors():
@@ -192,102 +518,30 @@ def get_vendors():
 @app.route('/api/marketing/campaigns')
 def get_marketing_campaigns():
     """Get available marketing campaigns"""
-    campaigns = [
-        {
-            'id': 1,
-            'name': 'Social Media Blitz',
-            'type': 'Social Media',
-            'target_audience': 'Young Adults (18-25)',
-            'effectiveness': 1.25,
-            'duration_days': 7,
-            'cost': 5000,
-            'description': 'Target young adults through social media platforms'
-        },
-        {
-            'id': 2,
-            'name': 'Radio Advertisement',
-            'type': 'Radio',
-            'target_audience': 'Adults (26-40)',
-            'effectiveness': 1.15,
-            'duration_days': 14,
-            'cost': 8000,
-            'description': 'Reach adults through radio commercials'
-        },
-        {
-            'id': 3,
-            'name': 'Billboard Campaign',
-            'type': 'Billboards',
-            'target_audience': 'Families',
-            'effectiveness': 1.20,
-            'duration_days': 30,
-            'cost': 15000,
-            'description': 'High-visibility outdoor advertising for families'
-        },
-        {
-            'id': 4,
-            'name': 'Influencer Partnership',
-            'type': 'Influencer Marketing',
-            'target_audience': 'Music Enthusiasts',
-            'effectiveness': 1.35,
-            'duration_days': 5,
-            'cost': 12000,
-            'description': 'Partner with music influencers for maximum engagement'
-        },
-        {
-            'id': 5,
-            'name': 'TV Commercial',
-            'type': 'TV Commercials',
-            'target_audience': 'Families',
-            'effectiveness': 1.40,
-            'duration_days': 21,
-            'cost': 25000,
-            'description': 'High-impact television advertising for broad reach'
-        },
-        {
-            'id': 6,
-            'name': 'Event Marketing',
-            'type': 'Event Marketing',
-            'target_audience': 'Music Enthusiasts',
-            'effectiveness': 1.30,
-            'duration_days': 5,
-            'cost': 10000,
-            'description': 'Pop-up events and street marketing for direct engagement'
-        },
-        {
-            'id': 7,
-            'name': 'Print Media Campaign',
-            'type': 'Print Media',
-            'target_audience': 'Older Adults (41+)',
-            'effectiveness': 1.10,
-            'duration_days': 14,
-            'cost': 6000,
-            'description': 'Newspaper ads and magazines for traditional audiences'
-        },
-        {
-            'id': 8,
-            'name': 'Email Marketing',
-            'type': 'Email Marketing',
-            'target_audience': 'Adults (26-40)',
-            'effectiveness': 1.05,
-            'duration_days': 3,
-            'cost': 2000,
-            'description': 'Cost-effective email campaigns to existing database'
-        }
-    ]
-    return jsonify(campaigns)
+    marketing_system = game_coordinator.marketing_system
+    response = app.response_class(marketing_system.campaign_catalog_json, mimetype='application/json')
+    response.set_etag(marketing_system.campaign_catalog_etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
 
 @app.route('/api/artists/hire', methods=['POST'])
+@pushes_festival_update
 def hire_artist_endpoint():
     """Hire an artist"""
-    data = request.get_json()
-    festival_id = data.get('festival_id', 1)  # Default to festival 1
-    artist_id = data.get('artist_id')
+    data = request.get_json(silent=True) or {}
+    try:
+        festival_id = parse_whole_number(data, 'festival_id')
+        artist_id = parse_whole_number(data, 'artist_id')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    festival_id = 1 if festival_id is None else festival_id  # Default to festival 1
     
     if not artist_id:
         return jsonify({'success': False, 'error': 'Artist ID required'}), 400
     
     # Get the artist data from cached available artists using the same count as display
-    artists = get_cached_artists(5)  # Use same count as display endpoint
+    artists = get_cached_artists(festival_id, 5)  # Use same count as display endpoint
     artist = next((a for a in artists if a['id'] == artist_id), None)
     
     if not artist:
@@ -295,38 +549,60 @@ def hire_artist_endpoint():
     
     result = game_coordinator.hire_artist(festival_id, artist)
     
-    # Clear the cache after hiring to refresh the available artists
+    # Clear the festival's offers after hiring to refresh its available artists
     if result.get('success'):
-        clear_artist_cache()
+        clear_artist_cache(festival_id)
     
     return jsonify(result)
 
 @app.route('/api/vendors/hire', methods=['POST'])
+@pushes_festival_update
 def hire_vendor_endpoint():
     """Hire a vendor"""
-    data = request.get_json()
-    festival_id = data.get('festival_id', 1)  # Default to festival 1
-    vendor_id = data.get('vendor_id')
+    data = request.get_json(silent=True) or {}
+    try:
+        festival_id = parse_whole_number(data, 'festival_id')
+        vendor_id = parse_whole_number(data, 'vendor_id')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    festival_id = 1 if festival_id is None else festival_id  # Default to festival 1
     
     if not vendor_id:
         return jsonify({'success': False, 'error': 'Vendor ID required'}), 400
     
-    # Get the vendor data from cached available vendors using the same count as display
-    vendors = get_cached_vendors(5)  # Use same count as display endpoint
-    vendor = next((v for v in vendors if v['id'] == vendor_id), None)
+    result = game_coordinator.hire_market_vendor(festival_id, vendor_id)
+    status = 404 if result.get('error') == 'Vendor not found' else 200
+    return jsonify(result), status
+
+@app.route('/api/hire/batch', methods=['POST'])
+@pushes_festival_update
+def hire_batch_endpoint():
+    """Hire several artists and vendors in one request"""
+    data = request.get_json(silent=True) or {}
+    try:
+        festival_id = parse_whole_number(data, 'festival_id')
+        artist_ids = parse_id_list(data, 'artist_ids')
+        vendor_ids = parse_id_list(data, 'vendor_ids')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    festival_id = 1 if festival_id is None else festival_id  # Default to festival 1
     
-    if not vendor:
-        return jsonify({'success': False, 'error': 'Vendor not found'}), 404
+    if not artist_ids and not vendor_ids:
+        return jsonify({'success': False, 'error': 'Artist or vendor IDs required'}), 400
+    if len(artist_ids) + len(vendor_ids) > 500:
+        return jsonify({'success': False, 'error': 'At most 500 items per batch'}), 400
     
-    result = game_coordinator.hire_vendor(festival_id, vendor)
+    artist_pool = {artist['id']: artist for artist in get_cached_artists(festival_id, 5)}
+    result = game_coordinator.hire_batch(festival_id, artist_ids, artist_pool, vendor_ids)
     
-    # Clear the cache after hiring to refresh the available vendors
-    if result.get('success'):
-        clear_vendor_cache()
+    # Refresh the available artists once for the whole batch
+    if any(item['type'] == 'artist' and item['success'] for item in result.get('results', [])):
+        clear_artist_cache(festival_id)
     
     return jsonify(result)
 
 @app.route('/api/marketing/launch', methods=['POST'])
+@pushes_festival_update
 def launch_marketing_campaign():
     """Launch a marketing campaign"""
     data = request.get_json()
@@ -336,10 +612,7 @@ def launch_marketing_campaign():
     if not campaign_id:
         return jsonify({'success': False, 'error': 'Campaign ID required'}), 400
     
-    # Get campaign data
-    campaigns = get_marketing_campaigns().json
-    campaign = next((c for c in campaigns if c['id'] == campaign_id), None)
-    
+    campaign = game_coordinator.marketing_system.campaign_catalog.get(campaign_id)
     if not campaign:
         return jsonify({'success': False, 'error': 'Campaign not found'}), 404
     
@@ -354,6 +627,33 @@ def launch_marketing_campaign():
     )
     return jsonify(result)
 
+@app.route('/api/marketing/optimize/<int:festival_id>', methods=['POST'])
+def optimize_marketing_budget(festival_id):
+    """Allocate a marketing budget across channels and audiences"""
+    data = request.get_json(silent=True) or {}
+    objective = data.get('objective', 'reach')
+    if objective not in game_coordinator.marketing_system.optimizer_objectives:
+        return jsonify({'success': False, 'error': 'Objective must be reach or reputation'}), 400
+    
+    try:
+        budget = parse_number(data, 'budget')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if budget is not None:
+        budget = max(budget, 0.0)
+    
+    result = game_coordinator.optimize_marketing_budget(festival_id, budget, objective)
+    status = 404 if not result['success'] else 200
+    return jsonify(result), status
+
+@app.route('/api/marketing/audience/<int:festival_id>')
+@festival_etag
+def get_marketing_audience(festival_id):
+    """Get how far marketing has reached the festival's audience"""
+    result = game_coordinator.get_audience_summary(festival_id)
+    status = 404 if not result['success'] else 200
+    return jsonify(result), status
+
 @app.route('/api/marketing/recommendations/<int:festival_id>')
 def get_marketing_recommendations(festival_id):
     """Get marketing recommendations"""
@@ -367,6 +667,7 @@ def get_emergency_protocols(festival_id):
     return jsonify(protocols)
 
 @app.route('/api/events/implement_protocol/<int:festival_id>', methods=['POST'])
+@pushes_festival_update
 def implement_protocol(festival_id):
     """Implement an emergency protocol"""
     data = request.get_json()
@@ -374,18 +675,63 @@ def implement_protocol(festival_id):
     return jsonify(result)
 
 @app.route('/api/artists/synergies/<int:festival_id>')
+@festival_etag
 def get_artist_synergies(festival_id):
     """Get artist genre synergies"""
     synergies = game_coordinator.artist_system.calculate_genre_synergies(festival_id)
     return jsonify(synergies)
 
 @app.route('/api/vendors/relationships/<int:festival_id>')
+@festival_etag
 def get_vendor_relationships(festival_id):
-    """Get vendor relationships"""
-    relationships = game_coordinator.vendor_system.calculate_vendor_relationships(festival_id)
-    return jsonify(relationships)
+    """Get the festival's related vendor pairs, a page at a time (all of the first 200 by default)"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 200, type=int), 1), 200)
+    
+    pairs = game_coordinator.vendor_system.list_vendor_relationships(festival_id, page, per_page)
+    response = jsonify(pairs['relationships'])
+    response.headers['X-Total-Count'] = str(pairs['total'])
+    return response
+
+@app.route('/api/vendors/relationships/<int:festival_id>/summary')
+@festival_etag
+def get_vendor_relationship_summary(festival_id):
+    """Get aggregate vendor relationship effects by specialty"""
+    return jsonify(game_coordinator.vendor_system.calculate_vendor_relationships(festival_id))
+
+@app.route('/api/vendors/menu_analytics/<int:festival_id>')
+@festival_etag
+def get_menu_analytics(festival_id):
+    """Get menu variety and price analytics for hired vendors"""
+    Festival.query.get_or_404(festival_id)
+    analytics = game_coordinator.vendor_system.get_menu_analytics(festival_id)
+    return jsonify(analytics)
+
+@app.route('/api/vendors/dietary_coverage/<int:festival_id>')
+def get_dietary_coverage(festival_id):
+    """Get dietary coverage across hired vendors and vendors that would close the gaps"""
+    top_k = min(max(request.args.get('top_k', 5, type=int), 1), 100)
+    
+    result = game_coordinator.get_dietary_coverage(festival_id, top_k)
+    return jsonify(result)
+
+@app.route('/api/vendors/simulate/<int:festival_id>', methods=['POST'])
+def simulate_vendor_service(festival_id):
+    """Simulate vendor queues for one festival day"""
+    data = request.get_json(silent=True) or {}
+    try:
+        attendance = parse_whole_number(data, 'attendance')
+        seed = parse_seed(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if attendance is not None:
+        attendance = min(max(attendance, 0), 200000)
+    
+    result = game_coordinator.simulate_vendor_service(festival_id, attendance, seed)
+    return jsonify(result)
 
 @app.route('/api/artists/assign_slot/<int:festival_id>', methods=['POST'])
+@pushes_festival_update
 def assign_performance_slot(festival_id):
     """Assign performance slot to artist"""
     data = request.get_json()
@@ -396,6 +742,178 @@ def assign_performance_slot(festival_id):
     )
     return jsonify(result)
 
+def parse_whole_number(data, key):
+    """Read an optional whole-number field, accepting numeric strings; raises ValueError if malformed"""
+    value = data.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f'{key} must be a whole number')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{key} must be a whole number')
+
+def parse_number(data, key):
+    """Read an optional finite number field, accepting numeric strings; raises ValueError if malformed"""
+    value = data.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f'{key} must be a number')
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{key} must be a number')
+    if not math.isfinite(number):
+        raise ValueError(f'{key} must be a number')
+    return number
+
+def parse_id_list(data, key):
+    """Read an optional list of whole-number ids (empty if missing); raises ValueError if malformed"""
+    values = data.get(key)
+    if values is None:
+        return []
+    if not isinstance(values, list) or None in values:
+        raise ValueError(f'{key} must be a list of ids')
+    try:
+        return [parse_whole_number({key: value}, key) for value in values]
+    except ValueError:
+        raise ValueError(f'{key} must be a list of ids')
+
+def parse_seed(data):
+    """Read an optional non-negative whole-number seed; raises ValueError if malformed"""
+    seed = parse_whole_number(data, 'seed')
+    if seed is not None and seed < 0:
+        raise ValueError('seed must not be negative')
+    return seed
+
+def parse_start_minute(data):
+    """Read a set start time from either 'start_minute' or an 'HH:MM' 'start_time'"""
+    if data.get('start_minute') is not None:
+        return parse_whole_number(data, 'start_minute')
+    if data.get('start_time'):
+        try:
+            hours, minutes = str(data['start_time']).split(':')
+            return int(hours) * 60 + int(minutes)
+        except ValueError:
+            raise ValueError('start_time must be HH:MM')
+    return None
+
+def parse_set_request(data):
+    """Read the ids and timing of a set request as integers; raises ValueError if any is malformed"""
+    return {
+        key: parse_whole_number(data, key)
+        for key in ('set_id', 'artist_id', 'stage_id', 'day', 'duration')
+    }, parse_start_minute(data)
+
+@app.route('/api/schedule/<int:festival_id>')
+@festival_etag
+def get_timetable(festival_id):
+    """Get the multi-stage festival timetable"""
+    day = request.args.get('day', type=int)
+    timetable = game_coordinator.get_timetable(festival_id, day)
+    if timetable is None:
+        return jsonify({'success': False, 'error': 'Festival not found'}), 404
+    return jsonify(timetable)
+
+@app.route('/api/schedule/stages/<int:festival_id>', methods=['POST'])
+@pushes_festival_update
+def create_stage(festival_id):
+    """Add a stage to the festival grounds"""
+    data = request.get_json() or {}
+    try:
+        capacity = parse_whole_number(data, 'capacity')
+        changeover_minutes = parse_whole_number(data, 'changeover_minutes')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    result = game_coordinator.create_stage(festival_id, dict(
+        data,
+        capacity=5000 if capacity is None else capacity,
+        changeover_minutes=15 if changeover_minutes is None else changeover_minutes
+    ))
+    return jsonify(result)
+
+@app.route('/api/schedule/sets/<int:festival_id>', methods=['POST'])
+@pushes_festival_update
+def schedule_set(festival_id):
+    """Schedule an artist's set on a stage"""
+    data = request.get_json() or {}
+    try:
+        fields, start_minute = parse_set_request(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if not fields['artist_id'] or not fields['stage_id'] or start_minute is None:
+        return jsonify({'success': False, 'error': 'Artist ID, stage ID and start time required'}), 400
+    
+    result = game_coordinator.schedule_set(
+        festival_id,
+        fields['artist_id'],
+        fields['stage_id'],
+        1 if fields['day'] is None else fields['day'],
+        start_minute,
+        fields['duration']
+    )
+    return jsonify(result)
+
+@app.route('/api/schedule/move_set/<int:festival_id>', methods=['POST'])
+@pushes_festival_update
+def move_set(festival_id):
+    """Move a scheduled set to a new stage, day or time"""
+    data = request.get_json() or {}
+    try:
+        fields, start_minute = parse_set_request(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if not fields['set_id']:
+        return jsonify({'success': False, 'error': 'Set ID required'}), 400
+    
+    result = game_coordinator.move_set(
+        festival_id,
+        fields['set_id'],
+        fields['stage_id'],
+        fields['day'],
+        start_minute,
+        fields['duration']
+    )
+    return jsonify(result)
+
+@app.route('/api/schedule/remove_set/<int:festival_id>', methods=['POST'])
+@pushes_festival_update
+def remove_set(festival_id):
+    """Remove a set from the timetable"""
+    data = request.get_json() or {}
+    try:
+        set_id = parse_whole_number(data, 'set_id')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if not set_id:
+        return jsonify({'success': False, 'error': 'Set ID required'}), 400
+    
+    result = game_coordinator.remove_set(festival_id, set_id)
+    return jsonify(result)
+
+@app.route('/api/layout/<int:festival_id>')
+@festival_etag
+def get_layout(festival_id):
+    """Get the saved festival grounds layout"""
+    layout = game_coordinator.get_layout(festival_id)
+    if layout is None:
+        return jsonify({'success': False, 'error': 'Festival not found'}), 404
+    return jsonify(layout)
+
+@app.route('/api/layout/optimize/<int:festival_id>', methods=['POST'])
+@pushes_festival_update
+def optimize_layout(festival_id):
+    """Optimize vendor placement on the festival grounds"""
+    data = request.get_json(silent=True) or {}
+    result = game_coordinator.optimize_layout(festival_id, data.get('seed'))
+    return jsonify(result)
+
 @app.route('/api/weather/forecast/<int:festival_id>')
 def get_weather_forecast(festival_id):
     """Get weather forecast"""
@@ -403,12 +921,25 @@ def get_weather_forecast(festival_id):
     return jsonify(forecast)
 
 @app.route('/api/marketing/social_media/<int:festival_id>')
+@festival_etag
 def get_social_media_impact(festival_id):
     """Get social media impact"""
     impact = game_coordinator.get_social_media_impact(festival_id)
     return jsonify(impact)
 
+@app.route('/api/marketing/social_media/<int:festival_id>/trend')
+@festival_etag
+def get_social_media_trend(festival_id):
+    """Get rolling social media growth and engagement"""
+    window = min(max(request.args.get('window', 7, type=int), 1), 90)
+    days = min(max(request.args.get('days', 30, type=int), 1), 365)
+    trend = game_coordinator.get_social_trend(festival_id, window, days)
+    if trend is None:
+        return jsonify({'error': 'Festival not found'}), 404
+    return jsonify(trend)
+
 @app.route('/api/financial/summary/<int:festival_id>')
+@festival_etag
 def get_financial_summary(festival_id):
     """Get financial summary"""
     festival = Festival.query.get_or_404(festival_id)
@@ -448,33 +979,48 @@ def auto_save_festival():
 
 @app.route('/api/artists/refresh', methods=['POST'])
 def refresh_artists():
-    """Refresh the available artists cache"""
-    clear_artist_cache()
+    """Refresh the available artists cache for one festival, or for all if none is given"""
+    data = request.get_json(silent=True) or {}
+    try:
+        festival_id = parse_whole_number(data, 'festival_id')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    clear_artist_cache(festival_id)
     return jsonify({'success': True, 'message': 'Artist cache refreshed'})
 
+@app.route('/api/artists/offers/stats')
+def get_artist_offer_stats():
+    """Hit, miss and eviction counts for the artist offer cache"""
+    return jsonify(artist_offers.stats())
+
 @app.route('/api/vendors/refresh', methods=['POST'])
 def refresh_vendors():
-    """Refresh the available vendors cache"""
-    clear_vendor_cache()
-    return jsonify({'success': True, 'message': 'Vendor cache refreshed'})
+    """Replace the vendor market with freshly generated vendors"""
+    game_coordinator.vendor_system.reset_market()
+    return jsonify({'success': True, 'message': 'Vendor market refreshed'})
+
+@app.route('/api/vendors/market/generate', methods=['POST'])
+def generate_market_vendors():
+    """Add generated vendors to the hiring market"""
+    data = request.get_json(silent=True) or {}
+    try:
+        count = parse_whole_number(data, 'count')
+        seed = parse_seed(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    count = min(max(1000 if count is None else count, 1), MARKET_GENERATE_LIMIT)
+    
+    generated = game_coordinator.vendor_system.generate_market_vendors(count, seed)
+    return jsonify({'success': True, 'generated': generated})
 
 @app.route('/api/events/force_generate/<int:festival_id>', methods=['POST'])
 def force_generate_events(festival_id):
     """Force generate dynamic events for testing"""
     festival = Festival.query.get_or_404(festival_id)
     
-    # Temporarily increase all event probabilities to 100% for testing
-    original_probabilities = {}
-    for event_type, event_data in game_coordinator.event_system.event_types.items():
-        original_probabilities[event_type] = event_data['probability']
-        event_data['probability'] = 1.0  # 100% chance
-    
-    # Generate events
-    events = game_coordinator.event_system.check_for_dynamic_events(festival)
-    
-    # Restore original probabilities
-    for event_type, probability in original_probabilities.items():
-        game_coordinator.event_system.event_types[event_type]['probability'] = probability
+    # Give every event a 100% chance for this call only
+    certain = {event_type: 1.0 for event_type in game_coordinator.event_system.event_types}
+    events = game_coordinator.event_system.check_for_dynamic_events(festival, probability_overrides=certain)
     
     return jsonify({
         'success': True,
@@ -483,6 +1029,7 @@ def force_generate_events(festival_id):
     })
 
 @app.route('/api/events/respond/<int:festival_id>', methods=['POST'])
+@pushes_festival_update
 def respond_to_event(festival_id):
     """Handle player response to a dynamic event"""
     data = request.get_json()
@@ -518,6 +1065,7 @@ def respond_to_event(festival_id):
         festival.reputation = max(0, min(100, festival.reputation + selected_option['effects']['reputation']))
     
     # Save changes
+    game_coordinator.touch_festivals([festival_id])
     db.session.commit()
     
     # Generate response message
@@ -589,25 +1137,54 @@ def handle_connect():
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    state_sync.disconnect(request.sid)
     print('Client disconnected')
 
+def emit_festival_state(festival):
+    """Send the requesting client the full current payload, refreshing the room's snapshot if stale"""
+    snapshot = state_sync.snapshot(festival.id)
+    if snapshot is None or snapshot[0] != festival.version:
+        snapshot = (festival.version, festival_state(festival))
+        state_sync.watch(festival.id, *snapshot)
+    data = dict(snapshot[1], events=festival_events(festival))
+    emit('festival_state', {'festival_id': festival.id, 'version': snapshot[0], 'data': data})
+
 @socketio.on('join_festival')
 def handle_join_festival(data):
     festival_id = data.get('festival_id')
     if festival_id:
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            emit('festival_error', {'festival_id': festival_id, 'error': 'Festival not found'})
+            return
+        join_room(state_sync.room(festival.id))
+        state_sync.join(festival.id, request.sid)
         print(f'Client joined festival {festival_id}')
-        emit('festival_joined', {'festival_id': festival_id})
+        emit('festival_joined', {'festival_id': festival.id, 'version': festival.version})
+        emit_festival_state(festival)
+
+@socketio.on('leave_festival')
+def handle_leave_festival(data):
+    try:
+        festival_id = int(data.get('festival_id'))
+    except (TypeError, ValueError):
+        return
+    leave_room(state_sync.room(festival_id))
+    state_sync.leave(festival_id, request.sid)
 
 @socketio.on('request_update')
 def handle_request_update(data):
     festival_id = data.get('festival_id')
     if festival_id:
-        # Get updated festival data and emit it
         festival = Festival.query.get(festival_id)
         if festival:
-            emit('festival_updated', {'festival_id': festival_id})
+            # A client already at the current version only needs confirmation
+            if data.get('version') == festival.version:
+                emit('festival_updated', {'festival_id': festival.id, 'version': festival.version})
+            else:
+                emit_festival_state(festival)
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+        upgrade_database()
+    socketio.run(app, debug=os.environ.get('FLASK_DEBUG', '1') == '1', host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Database Upgrade - Bring databases created by older versions up to the current schema
+"""
+import json
+from sqlalchemy import inspect, text
+from models import db, Festival, Stage
+from game_systems.schedule_system import ScheduleSystem
+from game_systems.vendor_system import VendorSystem
+
+# Columns added to tables that already existed; create_all does not alter tables
+ADDED_COLUMNS = {
+    'festival': [
+        ('tickets_sold', 'INTEGER DEFAULT 0'),
+        ('version', 'INTEGER NOT NULL DEFAULT 1')
+    ],
+    'vendor': [
+        ('stock', 'FLOAT DEFAULT 1500.0'),
+        ('stock_capacity', 'FLOAT DEFAULT 1500.0'),
+        ('restock_interval', 'INTEGER DEFAULT 2'),
+        ('days_to_restock', 'INTEGER DEFAULT 2')
+    ]
+}
+
+
+def upgrade_database():
+    """Create missing tables and columns and migrate old data; safe to run on every start.
+
+    Must be called inside an application context. Returns a list of the
+    steps that changed something.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    db.create_all()
+
+    steps = []
+    for table, columns in ADDED_COLUMNS.items():
+        if table not in existing_tables:
+            continue
+        present = {column['name'] for column in inspector.get_columns(table)}
+        for name, definition in columns:
+            if name not in present:
+                db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {definition}'))
+                steps.append(f'added {table}.{name}')
+
+    if 'vendor' in existing_tables:
+        if any(column['name'] == 'menu_items' for column in inspector.get_columns('vendor')):
+            steps.append(f'moved {_migrate_vendor_menus()} vendor menus to menu_item')
+
+    if 'artist' in existing_tables:
+        if 'uq_artist_festival_slot' not in {index['name'] for index in inspector.get_indexes('artist')}:
+            cleared = _clear_duplicate_slots()
+            for index in db.metadata.tables['artist'].indexes:
+                if index.name == 'uq_artist_festival_slot':
+                    index.create(db.session.connection())
+            steps.append(f'indexed artist slots ({cleared} duplicate slots cleared)')
+
+    festivals_without_stages = Festival.query.filter(~Festival.stages.any()).all()
+    schedule_system = ScheduleSystem()
+    for festival in festivals_without_stages:
+        festival.stages = schedule_system.build_default_stages()
+    if festivals_without_stages:
+        steps.append(f'added default stages to {len(festivals_without_stages)} festivals')
+
+    db.session.commit()
+    return steps
+
+
+def _migrate_vendor_menus():
+    """Copy the old JSON vendor.menu_items column into MenuItem rows, then drop it"""
+    vendor_system = VendorSystem()
+    rows = db.session.execute(text('SELECT id, menu_items FROM vendor WHERE menu_items IS NOT NULL')).all()
+    migrated = 0
+    for vendor_id, menu_json in rows:
+        try:
+            menu_items = json.loads(menu_json) or []
+        except ValueError:
+            continue
+        items = vendor_system.build_menu_items(menu_items)
+        for item in items:
+            item.vendor_id = vendor_id
+        db.session.add_all(items)
+        migrated += 1
+
+    db.session.flush()
+    db.session.execute(text('ALTER TABLE vendor DROP COLUMN menu_items'))
+    return migrated
+
+
+def _clear_duplicate_slots():
+    """Keep each festival's slot with its earliest holder so the unique slot index can be built"""
+    return db.session.execute(text(
+        'UPDATE artist SET performance_slot = NULL '
+        'WHERE performance_slot IS NOT NULL AND id NOT IN ('
+        'SELECT MIN(id) FROM artist WHERE performance_slot IS NOT NULL '
+        'GROUP BY festival_id, performance_slot)'
+    )).rowcount
@@ -3,7 +3,15 @@ Artist System - Handles all artist-related game logic
 """
 import random
 import json
+import math
+import time
 from datetime import datetime
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from .catalog import freeze
+from .ranking import rank_by_value
 from models import db, Artist, Festival
 
 class ArtistSystem:
@@ -66,6 +74,23 @@ class ArtistSystem:
             }
         }
         
+        # Synergy groups each genre belongs to (a genre can feed several groups)
+        self.genre_groups = {}
+        for main_genre, synergy_data in self.genre_synergies.items():
+            for genre in synergy_data['related_genres'] + [main_genre]:
+                self.genre_groups.setdefault(genre, []).append(main_genre)
+        
+        # Genre x synergy group membership matrix for vectorized scoring
+        self.synergy_group_names = list(self.genre_synergies)
+        self.genre_index = {genre: i for i, genre in enumerate(dict.fromkeys(self.genres + list(self.genre_groups)))}
+        self.genre_group_matrix = np.zeros((len(self.genre_index), len(self.synergy_group_names)))
+        for genre, groups in self.genre_groups.items():
+            for group in groups:
+                self.genre_group_matrix[self.genre_index[genre], self.synergy_group_names.index(group)] = 1
+        self.group_reputation_bonus = np.array(
+            [self.genre_synergies[group]['reputation_bonus'] for group in self.synergy_group_names], dtype=float
+        )
+        
         # Artist relationship system
         self.artist_relationships = {
             'friendly': {
@@ -113,6 +138,15 @@ class ArtistSystem:
                 'description': 'Headliner slot - main attraction of the night'
             }
         }
+        
+        # Catalogs are shared by every request; freeze them so nothing can modify them in place
+        self.artist_words = freeze(self.artist_words)
+        self.genres = freeze(self.genres)
+        self.genre_synergies = freeze(self.genre_synergies)
+        self.genre_groups = freeze(self.genre_groups)
+        self.genre_index = freeze(self.genre_index)
+        self.artist_relationships = freeze(self.artist_relationships)
+        self.performance_slots = freeze(self.performance_slots)
     
     def generate_artist_name(self):
         """Generate a dynamic artist name using word banks"""
@@ -200,10 +234,13 @@ class ArtistSystem:
             genre = artist.genre
             genre_counts[genre] = genre_counts.get(genre, 0) + 1
         
-        # Check for synergies
+        return self.synergies_from_genre_counts(genre_counts)
+    
+    def synergies_from_genre_counts(self, genre_counts):
+        """Calculate active genre synergies from a genre -> artist count mapping"""
         active_synergies = []
         for main_genre, synergy_data in self.genre_synergies.items():
-            related_genres = synergy_data['related_genres'] + [main_genre]
+            related_genres = list(synergy_data['related_genres']) + [main_genre]
             
             # Count artists in this synergy group
             synergy_count = sum(genre_counts.get(genre, 0) for genre in related_genres)
@@ -225,28 +262,227 @@ class ArtistSystem:
         
         return active_synergies
     
+    def synergy_bonus(self, group_counts):
+        """Reputation bonus from synergy group counts (works on arrays of counts)"""
+        multiplier = np.where(group_counts >= 3, np.minimum(group_counts / 3, 2.0), 0.0)
+        return (multiplier * self.group_reputation_bonus).sum(axis=-1)
+    
+    def rank_candidates(self, candidates, existing_genre_counts, attendance_lift, reputation_value, budget, top_k=5):
+        """Rank candidates by the marginal value of hiring them, in one vectorized pass.
+        
+        attendance_lift is an array aligned with candidates. Each candidate's
+        value is that lift plus the synergy reputation it adds (converted to
+        attendees with reputation_value), and the ranking blends total value
+        with value per $1,000 of fee. Returns the top_k candidates, best first.
+        """
+        if not candidates:
+            return []
+        
+        fees = np.array([candidate['fee'] for candidate in candidates], dtype=float)
+        genre_rows = np.array([self.genre_index.get(candidate['genre'], -1) for candidate in candidates])
+        
+        counts = np.zeros(len(self.genre_index))
+        for genre, count in existing_genre_counts.items():
+            if genre in self.genre_index:
+                counts[self.genre_index[genre]] = count
+        current_groups = counts @ self.genre_group_matrix
+        
+        # Unknown genres belong to no group
+        membership = np.where(genre_rows[:, None] >= 0, self.genre_group_matrix[genre_rows], 0.0)
+        after_groups = current_groups + membership
+        synergy_gain = self.synergy_bonus(after_groups) - self.synergy_bonus(current_groups)
+        completes = (after_groups >= 3) & (current_groups < 3)
+        
+        value = np.asarray(attendance_lift, dtype=float) + synergy_gain * reputation_value
+        top, scores, efficiency = rank_by_value(value, fees, budget, top_k)
+        
+        return [
+            {
+                'artist': candidates[i],
+                'score': float(scores[i]),
+                'attendance_lift': int(attendance_lift[i]),
+                'synergy_reputation': float(synergy_gain[i]),
+                'completes_synergies': [
+                    self.genre_synergies[self.synergy_group_names[g]]['name'] for g in np.flatnonzero(completes[i])
+                ],
+                'value_per_1000': float(efficiency[i])
+            }
+            for i in top
+        ]
+    
+    def optimize_lineup(self, candidates, draw_values, budget, existing_genre_counts=None,
+                        genre_targets=None, reputation_value=50.0, time_limit=0.25):
+        """Choose the candidates that maximize draw plus synergy bonuses within a budget.
+        
+        A 0/1 knapsack over fee buckets picks the additive part of the objective
+        (attendance draw, genre targets and a per-artist share of each synergy
+        group), then a local search of adds and swaps scores the real,
+        threshold-based synergy bonuses until no move helps or time runs out.
+        Falls back to a greedy value-per-fee pass if the DP cannot finish in time.
+        Returns (selected candidate indices, solver name).
+        """
+        deadline = time.perf_counter() + time_limit
+        existing_genre_counts = existing_genre_counts or {}
+        genre_targets = genre_targets or {}
+        
+        fees = [float(candidate['fee']) for candidate in candidates]
+        affordable = [i for i, fee in enumerate(fees) if fee <= budget]
+        if not affordable or budget <= 0:
+            return [], 'empty'
+        
+        # Missing a target genre costs more than any single artist's draw;
+        # draws can be negative for acts below the lineup's average popularity
+        target_penalty = max([draw_values[i] for i in affordable] + [reputation_value]) * 1.5
+        
+        def objective(selection_counts, draw_total):
+            group_counts = {}
+            for genre, count in selection_counts.items():
+                for group in self.genre_groups.get(genre, []):
+                    group_counts[group] = group_counts.get(group, 0) + count
+            
+            score = draw_total
+            for group, count in group_counts.items():
+                if count >= 3:
+                    multiplier = min(count / 3, 2.0)
+                    score += self.genre_synergies[group]['reputation_bonus'] * multiplier * reputation_value
+            for genre, target in genre_targets.items():
+                score -= max(0, target - selection_counts.get(genre, 0)) * target_penalty
+            return score
+        
+        # Additive value used by the knapsack
+        values = []
+        for i in affordable:
+            genre = candidates[i]['genre']
+            value = draw_values[i]
+            for group in self.genre_groups.get(genre, []):
+                value += self.genre_synergies[group]['reputation_bonus'] * reputation_value / 3
+            if genre_targets.get(genre, 0) > existing_genre_counts.get(genre, 0):
+                value += target_penalty
+            values.append(value)
+        
+        selected, solver = self._knapsack(affordable, fees, values, budget, deadline)
+        if selected is None:
+            order = sorted(range(len(affordable)), key=lambda k: values[k] / max(fees[affordable[k]], 1), reverse=True)
+            selected, spent = [], 0.0
+            for k in order:
+                if spent + fees[affordable[k]] <= budget:
+                    selected.append(affordable[k])
+                    spent += fees[affordable[k]]
+            solver = 'greedy'
+        
+        # Local search on the true objective
+        counts = dict(existing_genre_counts)
+        for i in selected:
+            counts[candidates[i]['genre']] = counts.get(candidates[i]['genre'], 0) + 1
+        chosen = set(selected)
+        spent = sum(fees[i] for i in chosen)
+        draw_total = sum(draw_values[i] for i in chosen)
+        best = objective(counts, draw_total)
+        
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for add in affordable:
+                if add in chosen:
+                    continue
+                add_genre = candidates[add]['genre']
+                for drop in [None] + list(chosen):
+                    new_spent = spent + fees[add] - (fees[drop] if drop is not None else 0)
+                    if new_spent > budget:
+                        continue
+                    trial = dict(counts)
+                    trial[add_genre] = trial.get(add_genre, 0) + 1
+                    new_draw = draw_total + draw_values[add]
+                    if drop is not None:
+                        trial[candidates[drop]['genre']] -= 1
+                        new_draw -= draw_values[drop]
+                    score = objective(trial, new_draw)
+                    if score > best + 1e-9:
+                        chosen.add(add)
+                        if drop is not None:
+                            chosen.discard(drop)
+                        counts, spent, draw_total, best = trial, new_spent, new_draw, score
+                        improved = True
+                        break
+                if time.perf_counter() >= deadline:
+                    break
+        
+        return sorted(chosen), solver
+    
+    def _knapsack(self, items, fees, values, budget, deadline, max_buckets=2000):
+        """Solve 0/1 knapsack over fee buckets; returns (selected items, solver) or (None, None) on timeout"""
+        unit = max(budget / max_buckets, 1.0)
+        capacity = int(budget // unit)
+        weights = [math.ceil(fees[i] / unit) for i in items]
+        
+        best = np.zeros(capacity + 1)
+        keep = np.zeros((len(items), capacity + 1), dtype=bool)
+        for k, weight in enumerate(weights):
+            if time.perf_counter() > deadline:
+                return None, None
+            if weight > capacity:
+                continue
+            candidate = best[:capacity + 1 - weight] + values[k]
+            better = candidate > best[weight:]
+            best[weight:][better] = candidate[better]
+            keep[k, weight:] = better
+        
+        selected = []
+        remaining = capacity
+        for k in range(len(items) - 1, -1, -1):
+            if keep[k, remaining]:
+                selected.append(items[k])
+                remaining -= weights[k]
+        return selected, 'dynamic_programming'
+    
     def assign_performance_slot(self, festival_id, artist_id, slot_type):
         """Assign a performance slot to an artist"""
-        artist = Artist.query.filter_by(festival_id=festival_id, id=artist_id).first()
-        if not artist:
-            return {'success': False, 'error': 'Artist not found'}
-        
         if slot_type not in self.performance_slots:
             return {'success': False, 'error': 'Invalid slot type'}
         
-        # Check if slot is available
-        existing_artist = Artist.query.filter_by(festival_id=festival_id, performance_slot=slot_type).first()
-        if existing_artist and existing_artist.id != artist_id:
-            return {'success': False, 'error': f'Slot already assigned to {existing_artist.name}'}
+        # Claim the slot in one conditional statement; the partial unique index
+        # on (festival_id, performance_slot) backs this up under concurrency
+        holder = aliased(Artist)
+        slot_taken = select(holder.id).where(
+            holder.festival_id == festival_id,
+            holder.performance_slot == slot_type,
+            holder.id != artist_id
+        ).exists()
+        statement = (
+            update(Artist)
+            .where(Artist.id == artist_id, Artist.festival_id == festival_id, ~slot_taken)
+            .values(performance_slot=slot_type)
+            .returning(Artist.name)
+            .execution_options(synchronize_session=False)
+        )
         
-        artist.performance_slot = slot_type
-        db.session.commit()
+        try:
+            artist_name = db.session.execute(statement).scalar()
+            if artist_name is None:
+                db.session.rollback()
+            else:
+                Festival.touch([festival_id])
+                db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            artist_name = None
+        
+        if artist_name is None:
+            # Only the failure path pays for a second query to explain why
+            existing_name = db.session.query(Artist.name).filter(
+                Artist.festival_id == festival_id,
+                Artist.performance_slot == slot_type,
+                Artist.id != artist_id
+            ).scalar()
+            if existing_name:
+                return {'success': False, 'error': f'Slot already assigned to {existing_name}'}
+            return {'success': False, 'error': 'Artist not found'}
         
         slot_info = self.performance_slots[slot_type]
         return {
             'success': True,
             'slot_info': slot_info,
-            'artist_name': artist.name
+            'artist_name': artist_name
         }
     
     def check_artist_relationships(self, festival_id, artist_id1, artist_id2):
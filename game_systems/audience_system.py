@@ -0,0 +1,182 @@
+"""
+Audience System - Simulated catchment population that marketing reaches and converts into ticket buyers
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+from .offload import run_cpu_bound
+
+
+class AudienceSystem:
+    """Holds a NumPy population per festival and turns campaign exposure into ticket sales"""
+
+    def __init__(self, audience_sizes, genres, segment_genres):
+        # People living in each festival's catchment area
+        self.population_size = 1000000
+
+        # Populations kept in memory at once; least recently used are rebuilt on demand
+        self.max_populations = 16
+
+        # Audience segments split the catchment in proportion to their sizes
+        self.segments = list(audience_sizes)
+        weights = np.array([audience_sizes[segment] for segment in self.segments], dtype=float)
+        counts = np.floor(weights / weights.sum() * self.population_size).astype(int)
+        counts[-1] += self.population_size - counts.sum()
+        self.segment_bounds = np.concatenate(([0], np.cumsum(counts)))
+
+        # Genres each segment leans towards; segment_focus of its people pick
+        # a favourite from their segment's genres, the rest pick any genre
+        self.genres = list(genres)
+        self.segment_genres = segment_genres
+        self.segment_focus = 0.6
+
+        # Conversion model. A person's daily chance of buying is
+        # daily_conversion * response(exposures) * lineup match * reputation,
+        # where response rises in an S-curve so one ad rarely sells a ticket
+        # but repeated exposure does.
+        self.daily_conversion = 0.03
+        self.half_response_exposures = 3.0
+        self.match_floor = 0.2  # Lineup match for someone whose genre is not booked
+        self.organic_rate = 0.00001  # Daily chance an unexposed person buys anyway
+        self.forget_rate = 0.05  # Daily chance an exposed person forgets one ad
+
+        self._populations = OrderedDict()
+        self._populations_lock = threading.Lock()
+
+    def population(self, festival_id, tickets_sold=0):
+        """Get a festival's population, building it deterministically if not in memory.
+
+        Exposure history lives only in memory; a rebuilt population marks
+        tickets_sold random people as buyers so sales are never counted twice.
+        """
+        with self._populations_lock:
+            population = self._populations.get(festival_id)
+            if population is not None:
+                self._populations.move_to_end(festival_id)
+                return population
+
+        rng = np.random.default_rng(festival_id)
+        segment = np.repeat(np.arange(len(self.segments), dtype=np.int8), np.diff(self.segment_bounds))
+
+        favourite = rng.integers(0, len(self.genres), self.population_size).astype(np.int8)
+        genre_positions = {genre: i for i, genre in enumerate(self.genres)}
+        for s, name in enumerate(self.segments):
+            preferred = np.array([genre_positions[genre] for genre in self.segment_genres.get(name, []) if genre in genre_positions], dtype=np.int8)
+            if not len(preferred):
+                continue
+            start, end = self.segment_bounds[s], self.segment_bounds[s + 1]
+            focused = start + np.flatnonzero(rng.random(end - start) < self.segment_focus)
+            favourite[focused] = preferred[rng.integers(0, len(preferred), len(focused))]
+
+        purchased = np.zeros(self.population_size, dtype=bool)
+        if tickets_sold:
+            purchased[rng.choice(self.population_size, min(tickets_sold, self.population_size), replace=False)] = True
+
+        population = {
+            'segment': segment,
+            'favourite_genre': favourite,
+            'exposures': np.zeros(self.population_size, dtype=np.uint16),
+            'purchased': purchased,
+            'rng': rng,
+            'lock': threading.Lock()  # Held by the greenlet or thread stepping this population
+        }
+        with self._populations_lock:
+            # Another request may have built it meanwhile; keep the first
+            population = self._populations.setdefault(festival_id, population)
+            self._populations.move_to_end(festival_id)
+            while len(self._populations) > self.max_populations:
+                self._populations.popitem(last=False)
+        return population
+
+    def lineup_match(self, lineup):
+        """Per-genre match in [match_floor, 1] from (genre, popularity) pairs of booked artists"""
+        strength = np.zeros(len(self.genres))
+        genre_positions = {genre: i for i, genre in enumerate(self.genres)}
+        for genre, popularity in lineup:
+            if genre in genre_positions:
+                strength[genre_positions[genre]] += (popularity or 0) / 100
+        if strength.max() > 0:
+            strength /= strength.max()
+        return self.match_floor + (1 - self.match_floor) * strength
+
+    def step(self, festival_id, campaigns, lineup, reputation, tickets_sold, capacity):
+        """Simulate one day of exposure and ticket buying for a festival.
+
+        campaigns is a list of (target_audience, daily_reach) for campaigns
+        spending today; each exposes daily_reach people drawn from its
+        segment. lineup is a list of (genre, popularity) for booked artists.
+        Returns the day's new tickets (capped at remaining capacity) and
+        exposure statistics.
+        """
+        population = self.population(festival_id, tickets_sold)
+
+        # The tick covers the whole population; keep it off the event loop
+        with population['lock']:
+            return run_cpu_bound(self._advance, population, campaigns, lineup, reputation, tickets_sold, capacity)
+
+    def _advance(self, population, campaigns, lineup, reputation, tickets_sold, capacity):
+        """One day of step() on an already fetched population"""
+        rng = population['rng']
+        exposures = population['exposures']
+        purchased = population['purchased']
+
+        # Write today's impressions into the exposure counts
+        impressions = 0
+        for target_audience, daily_reach in campaigns:
+            if target_audience not in self.segments or daily_reach <= 0:
+                continue
+            s = self.segments.index(target_audience)
+            start, end = self.segment_bounds[s], self.segment_bounds[s + 1]
+            reached = start + rng.integers(0, end - start, int(daily_reach))
+            hits = np.bincount(reached - start, minlength=end - start)
+            np.minimum(exposures[start:end] + hits, np.iinfo(np.uint16).max, out=exposures[start:end], casting='unsafe')
+            impressions += int(daily_reach)
+
+        match = self.lineup_match(lineup)
+        reputation_factor = 0.5 + reputation / 100
+
+        # Exposed people who have not bought yet
+        candidates = np.flatnonzero((exposures > 0) & ~purchased)
+        seen = exposures[candidates].astype(np.float32)
+        response = seen ** 2 / (seen ** 2 + self.half_response_exposures ** 2)
+        chance = self.daily_conversion * response * match[population['favourite_genre'][candidates]] * reputation_factor
+        draws = rng.random(len(candidates))
+        buyers = candidates[draws < chance]
+
+        # Without fresh exposure the message fades
+        forgetting = candidates[draws > 1 - self.forget_rate]
+        exposures[forgetting] -= 1
+
+        # Word of mouth brings in a few buyers nobody advertised to
+        organic = rng.integers(0, self.population_size, rng.poisson(self.organic_rate * reputation_factor * self.population_size))
+        organic = organic[~purchased[organic] & (exposures[organic] == 0)]
+        buyers = np.unique(np.concatenate((buyers, organic)))
+
+        remaining = max(0, capacity - tickets_sold)
+        if len(buyers) > remaining:
+            buyers = rng.permutation(buyers)[:remaining]
+        purchased[buyers] = True
+
+        return {
+            'new_tickets': int(len(buyers)),
+            'impressions': impressions,
+            'exposed_people': int(len(candidates)),
+            'organic_tickets': int(np.isin(buyers, organic).sum()) if len(organic) else 0
+        }
+
+    def summary(self, festival_id, tickets_sold=0):
+        """Exposure and conversion statistics per segment"""
+        population = self.population(festival_id, tickets_sold)
+        exposed = population['exposures'] > 0
+        segments = []
+        for s, name in enumerate(self.segments):
+            start, end = self.segment_bounds[s], self.segment_bounds[s + 1]
+            segment_exposed = exposed[start:end]
+            segments.append({
+                'target_audience': name,
+                'population': int(end - start),
+                'exposed': int(segment_exposed.sum()),
+                'average_exposures': float(population['exposures'][start:end][segment_exposed].mean()) if segment_exposed.any() else 0.0,
+                'purchased': int(population['purchased'][start:end].sum())
+            })
+        return {'population': self.population_size, 'segments': segments}
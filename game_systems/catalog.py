@@ -0,0 +1,20 @@
+"""
+Catalog - Read-only views of the game systems' static configuration tables
+"""
+from types import MappingProxyType
+
+
+def freeze(value):
+    """Recursively turn dicts into read-only mappings and lists into tuples.
+
+    Catalogs are shared by every request and socket handler, so they are
+    frozen once at startup; per-call variations are passed as arguments
+    instead of being written into the shared tables.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
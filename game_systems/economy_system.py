@@ -2,12 +2,18 @@
 Economy System - Handles all economy-related game logic
 """
 import random
+import numpy as np
+from sqlalchemy import func
 from models import db, Festival, Artist, Vendor
+from .catalog import freeze
+from .vendor_system import VendorSystem
 
 class EconomySystem:
     """Handles economy, pricing, revenue, and financial calculations"""
     
-    def __init__(self):
+    def __init__(self, vendor_system=None):
+        self.vendor_system = vendor_system or VendorSystem()
+        
         # Ticket pricing tiers
         self.ticket_tiers = {
             'General Admission': {
@@ -48,24 +54,45 @@ class EconomySystem:
             'insurance': 0.2,
             'permits': 0.1
         }
+        
+        # Multinomial-logit choice of vendor per purchase occasion
+        self.demand_model = {
+            'purchase_occasions': 1.5,  # Food and drink purchases per attendee
+            'popularity_weight': 2.0,  # Utility per unit of mean menu popularity
+            'quality_weight': 1.0,  # Utility per 50 quality points above 50
+            'price_weight': 0.8,  # Disutility per log of price over the reference
+            'reference_price': 10.0,
+            'outside_utility': 3.0  # Buying nothing or bringing your own
+        }
+        
+        # Catalogs are shared by every request; freeze them so nothing can modify them in place
+        self.ticket_tiers = freeze(self.ticket_tiers)
+        self.revenue_sources = freeze(self.revenue_sources)
+        self.cost_categories = freeze(self.cost_categories)
+        self.demand_model = freeze(self.demand_model)
     
     def calculate_ticket_pricing(self, festival, base_price=None):
         """Calculate optimal ticket pricing based on festival factors"""
+        # Market demand factor (random but influenced by factors)
+        demand_factor = random.uniform(0.8, 1.2)
+        
+        return self.estimate_ticket_price(
+            self.get_average_artist_popularity(festival.id),
+            self.get_average_vendor_quality(festival.id),
+            festival.reputation,
+            base_price,
+            demand_factor
+        )
+    
+    def estimate_ticket_price(self, artist_popularity, vendor_quality, reputation, base_price=None, demand_factor=1.0):
+        """Estimate a ticket price from lineup, vendor and reputation factors"""
         if not base_price:
             base_price = self.ticket_tiers['General Admission']['base_price']
         
-        # Base pricing factors
-        artist_popularity = self.get_average_artist_popularity(festival.id)
-        vendor_quality = self.get_average_vendor_quality(festival.id)
-        festival_reputation = festival.reputation
-        
         # Calculate price adjustments
         popularity_adjustment = (artist_popularity - 50) * 0.5  # ±25% based on popularity
         quality_adjustment = (vendor_quality - 50) * 0.3  # ±15% based on vendor quality
-        reputation_adjustment = (festival_reputation - 50) * 0.4  # ±20% based on reputation
-        
-        # Market demand factor (random but influenced by factors)
-        demand_factor = random.uniform(0.8, 1.2)
+        reputation_adjustment = (reputation - 50) * 0.4  # ±20% based on reputation
         
         # Calculate final price
         final_price = base_price * (1 + popularity_adjustment/100 + quality_adjustment/100 + reputation_adjustment/100) * demand_factor
@@ -92,17 +119,44 @@ class EconomySystem:
     
     def calculate_expected_attendance(self, festival):
         """Calculate expected attendance based on festival factors"""
+        artist_popularity = self.get_average_artist_popularity(festival.id)
+        return self.estimate_attendance(artist_popularity, festival.marketing_budget, festival.reputation)
+    
+    def estimate_attendance_by_festival(self, festival_ids=None):
+        """Expected attendance for many festivals (all if None) from one grouped query"""
+        query = db.session.query(
+            Festival.id, Festival.marketing_budget, Festival.reputation, func.avg(Artist.popularity)
+        ).outerjoin(Artist, Artist.festival_id == Festival.id)
+        if festival_ids is not None:
+            query = query.filter(Festival.id.in_(festival_ids))
+        rows = query.group_by(Festival.id).order_by(Festival.id).all()
+        if not rows:
+            return {}
+        
+        ids, marketing, reputation, popularity = zip(*rows)
+        attendance = self.estimate_attendance(
+            np.array([50 if value is None else value for value in popularity], dtype=float),
+            np.array([value or 0.0 for value in marketing], dtype=float),
+            np.array(reputation, dtype=float)
+        )
+        return dict(zip(ids, attendance.tolist()))
+    
+    def estimate_attendance(self, artist_popularity, marketing_budget, reputation):
+        """Estimate attendance for a given lineup popularity, marketing spend and reputation.
+        
+        Arguments may also be NumPy arrays, in which case an array of
+        estimates is returned.
+        """
         base_attendance = 5000  # Base attendance
         
         # Artist popularity factor
-        artist_popularity = self.get_average_artist_popularity(festival.id)
         artist_factor = 1 + (artist_popularity - 50) / 100  # ±50% based on popularity
         
         # Marketing factor
-        marketing_factor = 1 + (festival.marketing_budget / 10000) * 0.5  # Marketing boost
+        marketing_factor = 1 + (marketing_budget / 10000) * 0.5  # Marketing boost
         
         # Reputation factor
-        reputation_factor = 1 + (festival.reputation - 50) / 100  # ±50% based on reputation
+        reputation_factor = 1 + (reputation - 50) / 100  # ±50% based on reputation
         
         # Competition factor (if other festivals exist)
         competition_factor = 0.9  # Assume some competition
@@ -110,6 +164,8 @@ class EconomySystem:
         # Calculate final attendance
         expected_attendance = base_attendance * artist_factor * marketing_factor * reputation_factor * competition_factor
         
+        if np.ndim(expected_attendance):
+            return np.clip(np.trunc(expected_attendance), 1000, 50000).astype(int)
         return max(1000, min(50000, int(expected_attendance)))
     
     def calculate_ticket_revenue(self, festival, ticket_price, attendance):
@@ -148,34 +204,84 @@ class EconomySystem:
     
     def calculate_vendor_revenue(self, festival_id, attendance):
         """Calculate vendor revenue and festival commission"""
-        vendors = Vendor.query.filter_by(festival_id=festival_id).all()
-        if not vendors:
-            return {'total_vendor_revenue': 0, 'festival_commission': 0}
-        
-        total_vendor_revenue = 0
-        
-        for vendor in vendors:
-            # Base revenue per attendee
-            base_revenue_per_attendee = vendor.revenue / 1000  # Normalize to per 1000 attendees
-            
-            # Quality multiplier
-            quality_multiplier = vendor.quality / 50
-            
-            # Attendance factor
-            attendance_factor = min(attendance / 5000, 2.0)  # Cap at 2x for large crowds
-            
-            # Calculate vendor's total revenue
-            vendor_revenue = base_revenue_per_attendee * attendance * quality_multiplier * attendance_factor
-            total_vendor_revenue += vendor_revenue
-        
-        # Festival commission (15% of vendor revenue)
-        festival_commission = total_vendor_revenue * self.revenue_sources['vendor_commissions']
-        
+        return self.calculate_vendor_revenues({festival_id: attendance})[festival_id]
+    
+    def calculate_vendor_revenues(self, attendance_by_festival):
+        """Vendor revenue and festival commission for many festivals in one pass.
+        
+        attendance_by_festival maps festival id to attendance. Returns the
+        same mapping with revenue totals, the share of purchase occasions
+        captured by vendors and a per-vendor breakdown.
+        """
+        festival_ids = list(attendance_by_festival)
+        demand = self.estimate_vendor_orders(attendance_by_festival)
+        features, festival_index, orders = demand['features'], demand['festival_index'], demand['orders']
+        captured_share = demand['captured_share']
+        revenue = orders * features['price']
+        festival_revenue = np.bincount(festival_index, weights=revenue, minlength=len(festival_ids))
+        commission_rate = self.revenue_sources['vendor_commissions']
+        
+        results = {
+            festival_id: {
+                'total_vendor_revenue': float(festival_revenue[i]),
+                'festival_commission': float(festival_revenue[i] * commission_rate),
+                'captured_share': float(captured_share[i]),
+                'vendors': []
+            }
+            for i, festival_id in enumerate(festival_ids)
+        }
+        for vendor_id, festival_id, vendor_orders, vendor_revenue in zip(
+                features['vendor_ids'], features['festival_ids'], orders, revenue):
+            results[int(festival_id)]['vendors'].append({
+                'vendor_id': int(vendor_id),
+                'orders': float(vendor_orders),
+                'revenue': float(vendor_revenue)
+            })
+        return results
+    
+    def estimate_vendor_orders(self, attendance_by_festival):
+        """Expected orders per vendor for many festivals, aligned with the vendor demand features"""
+        festival_ids = list(attendance_by_festival)
+        features = self.vendor_system.get_demand_features(festival_ids)
+        
+        # Position of each vendor's festival in festival_ids
+        festival_positions = {festival_id: i for i, festival_id in enumerate(festival_ids)}
+        festival_index = np.array([festival_positions[festival_id] for festival_id in features['festival_ids']], dtype=int)
+        attendance = np.array([attendance_by_festival[festival_id] for festival_id in festival_ids], dtype=float)
+        
+        orders, captured_share = self.allocate_vendor_demand(
+            festival_index, attendance, features['popularity'], features['quality'],
+            features['price'], features['item_count'] > 0
+        )
         return {
-            'total_vendor_revenue': total_vendor_revenue,
-            'festival_commission': festival_commission
+            'features': features,
+            'festival_index': festival_index,
+            'orders': orders,
+            'captured_share': captured_share
         }
     
+    def allocate_vendor_demand(self, festival_index, attendance, popularity, quality, price, available):
+        """Allocate purchase occasions across vendors with a multinomial logit.
+        
+        Each attendee's purchase occasions go to one of their festival's
+        vendors or to the outside option, with probability proportional to
+        exp(utility). Vendor arrays are aligned; festival_index points each
+        vendor at its entry in attendance. Returns expected orders per vendor
+        and the captured share per festival.
+        """
+        model = self.demand_model
+        prices = np.maximum(price, 0.01)
+        utility = (model['popularity_weight'] * popularity
+                   + model['quality_weight'] * (quality - 50) / 50
+                   - model['price_weight'] * np.log(prices / model['reference_price']))
+        weights = np.where(available, np.exp(utility - model['outside_utility']), 0.0)
+        
+        # Logit denominator per festival; the outside option contributes exp(0) = 1
+        denominators = 1.0 + np.bincount(festival_index, weights=weights, minlength=len(attendance))
+        shares = weights / denominators[festival_index]
+        orders = shares * attendance[festival_index] * model['purchase_occasions']
+        return orders, 1.0 - 1.0 / denominators
+    
     def calculate_total_costs(self, festival):
         """Calculate total festival costs"""
         total_costs = 0
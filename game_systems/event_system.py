@@ -3,6 +3,7 @@ Event System - Handles all event-related game logic
 """
 import random
 from datetime import datetime, timedelta
+from .catalog import freeze
 from models import db, Festival, Artist, Vendor
 
 class EventSystem:
@@ -57,6 +58,7 @@ class EventSystem:
             },
             'Vendor Problems': {
                 'probability': 0.15,
+                'trigger': 'stockout',  # Raised by vendor stock-outs, not the random roll
                 'severity': 'low',
                 'description': 'Food vendors experiencing issues',
                 'effects': {
@@ -145,6 +147,7 @@ class EventSystem:
             },
             'Food Shortage': {
                 'probability': 0.06,
+                'trigger': 'stockout',
                 'severity': 'medium',
                 'description': 'Vendors running out of food supplies',
                 'effects': {
@@ -178,6 +181,10 @@ class EventSystem:
             }
         }
         
+        # Share of a day's food demand left unmet before stock-outs count as a
+        # festival-wide Food Shortage rather than individual Vendor Problems
+        self.food_shortage_threshold = 0.10
+        
         # Weather conditions and their effects
         self.weather_conditions = {
             'Sunny': {
@@ -249,6 +256,11 @@ class EventSystem:
                 'description': 'Basic response to address immediate concerns'
             }
         }
+        
+        # Catalogs are shared by every request; freeze them so nothing can modify them in place
+        self.event_types = freeze(self.event_types)
+        self.weather_conditions = freeze(self.weather_conditions)
+        self.crisis_responses = freeze(self.crisis_responses)
     
     def generate_weather_forecast(self, festival_date):
         """Generate weather forecast for the festival date"""
@@ -272,8 +284,15 @@ class EventSystem:
             'date': festival_date
         }
     
-    def check_for_dynamic_events(self, festival):
-        """Check if any dynamic events should occur"""
+    def check_for_dynamic_events(self, festival, stockouts=None, probability_overrides=None):
+        """Check if any dynamic events should occur.
+        
+        stockouts is the festival's inventory result for the day, with total
+        demand, unmet demand and the ids of vendors that ran out; it drives
+        the stock-out events instead of the random roll. probability_overrides
+        maps event types to a base probability used for this call only.
+        """
+        probability_overrides = probability_overrides or {}
         events = []
         
         # Get festival-specific data for more dynamic events
@@ -281,8 +300,11 @@ class EventSystem:
         vendors = Vendor.query.filter_by(festival_id=festival.id).all()
         
         for event_type, event_data in self.event_types.items():
+            if event_data.get('trigger') == 'stockout':
+                continue
+            
             # Check probability based on festival state
-            base_probability = event_data['probability']
+            base_probability = probability_overrides.get(event_type, event_data['probability'])
             
             # Adjust probability based on festival reputation
             if festival.reputation < 30:
@@ -298,6 +320,13 @@ class EventSystem:
             if random.random() < base_probability:
                 events.append(self.create_dynamic_event(event_type, festival, artists, vendors))
         
+        if stockouts and stockouts['vendor_ids']:
+            stocked_out_ids = set(stockouts['vendor_ids'])
+            stocked_out = [vendor for vendor in vendors if vendor.id in stocked_out_ids]
+            unmet_share = stockouts['unmet'] / stockouts['demand'] if stockouts['demand'] else 0
+            event_type = 'Food Shortage' if unmet_share >= self.food_shortage_threshold else 'Vendor Problems'
+            events.append(self.create_dynamic_event(event_type, festival, artists, stocked_out))
+        
         return events
     
     def create_dynamic_event(self, event_type, festival, artists=None, vendors=None):
@@ -417,7 +446,7 @@ class EventSystem:
             return f"⚡ Complete power failure has affected the entire festival grounds! Performances are halted and safety systems are compromised."
         
         # Fallback to generic description
-        return event_data['description']
+        return self.event_types[event_type]['description']
     
     def generate_interactive_options(self, event_type, festival, effects):
         """Generate interactive response options for events"""
@@ -873,6 +902,7 @@ class EventSystem:
         festival.budget += mitigated_effects.get('budget', 0)
         festival.reputation = max(0, min(100, festival.reputation + mitigated_effects.get('reputation', 0)))
         
+        Festival.touch([festival.id])
         db.session.commit()
         
         return {
@@ -957,6 +987,7 @@ class EventSystem:
         # Add protocol to festival (you might want to store this in the database)
         # For now, we'll just return the implementation result
         
+        Festival.touch([festival.id])
         db.session.commit()
         
         return {
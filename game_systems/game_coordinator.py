@@ -1,12 +1,22 @@
 """
 Game Coordinator - Manages all game systems and provides unified interface
 """
+import time
+from collections import Counter
+import numpy as np
+from sqlalchemy import case, delete, func, insert, update
 from .artist_system import ArtistSystem
 from .vendor_system import VendorSystem
 from .economy_system import EconomySystem
 from .marketing_system import MarketingSystem
 from .event_system import EventSystem
-from models import db, Festival, Artist, Vendor
+from .schedule_system import ScheduleSystem
+from .layout_system import LayoutSystem
+from .service_simulation import VendorQueueSimulator
+from .inventory_system import InventorySystem
+from .audience_system import AudienceSystem
+from .offload import run_cpu_bound
+from models import db, Festival, Artist, Vendor, MenuItem, MarketVendor, Campaign
 
 class GameCoordinator:
     """Coordinates all game systems and provides unified interface"""
@@ -14,9 +24,20 @@ class GameCoordinator:
     def __init__(self):
         self.artist_system = ArtistSystem()
         self.vendor_system = VendorSystem()
-        self.economy_system = EconomySystem()
-        self.marketing_system = MarketingSystem()
+        self.economy_system = EconomySystem(self.vendor_system)
+        self.marketing_system = MarketingSystem(self.artist_system)
         self.event_system = EventSystem()
+        self.schedule_system = ScheduleSystem()
+        self.layout_system = LayoutSystem()
+        self.service_simulator = VendorQueueSimulator()
+        self.inventory_system = InventorySystem()
+        self.audience_system = AudienceSystem(
+            self.marketing_system.audience_sizes, self.artist_system.genres, self.marketing_system.audience_genres
+        )
+    
+    def touch_festivals(self, festival_ids=None):
+        """Bump the version of festivals (all if None) so their ETags change; see Festival.touch"""
+        Festival.touch(festival_ids)
     
     def get_festival_summary(self, festival_id):
         """Get comprehensive festival summary"""
@@ -77,8 +98,16 @@ class GameCoordinator:
         # Decrease days remaining
         festival.days_remaining -= 1
         
-        # Check for dynamic events
-        events = self.event_system.check_for_dynamic_events(festival)
+        # Deliver today's share of running campaigns
+        marketing_gains = self.marketing_system.apply_campaign_effects([festival_id])
+        
+        # Simulated audience sees today's ads and buys tickets
+        ticket_sales = self.sell_tickets(festival)
+        self.marketing_system.record_social_metrics(festival, ticket_sales['impressions'], ticket_sales['new_tickets'])
+        
+        # Sell from vendor stock, then check for dynamic events
+        stockouts = self.step_inventory([festival_id])[festival_id]
+        events = self.event_system.check_for_dynamic_events(festival, stockouts)
         
         # Apply event effects
         for event in events:
@@ -91,6 +120,7 @@ class GameCoordinator:
                 festival.reputation = max(0, min(100, festival.reputation + event['effects'].get('reputation', 0)))
                 festival.budget += event['effects'].get('budget', 0)
         
+        self.touch_festivals([festival_id])
         db.session.commit()
         
         return {
@@ -98,9 +128,78 @@ class GameCoordinator:
             'days_remaining': festival.days_remaining,
             'events': events,
             'new_budget': festival.budget,
-            'new_reputation': festival.reputation
+            'new_reputation': festival.reputation,
+            'marketing_reputation': marketing_gains.get(festival_id, 0),
+            'stockouts': len(stockouts['vendor_ids']),
+            'new_tickets': ticket_sales['new_tickets'],
+            'tickets_sold': festival.tickets_sold
         }
     
+    def sell_tickets(self, festival):
+        """Run one day of the audience model for a festival and record new ticket sales"""
+        campaigns = db.session.query(
+            Campaign.target_audience, Campaign.reach, Campaign.duration, Campaign.start_day
+        ).filter(Campaign.festival_id == festival.id, Campaign.status == 'active').all()
+        lineup = db.session.query(Artist.genre, Artist.popularity).filter_by(festival_id=festival.id).all()
+        
+        # Campaign reach is spread evenly over its days of spend
+        spending = [
+            (target_audience, reach / max(duration, 1))
+            for target_audience, reach, duration, start_day in campaigns
+            if 1 <= start_day - festival.days_remaining <= duration
+        ]
+        
+        result = self.audience_system.step(
+            festival.id, spending, lineup, festival.reputation,
+            festival.tickets_sold or 0, festival.venue_capacity
+        )
+        festival.tickets_sold = (festival.tickets_sold or 0) + result['new_tickets']
+        return result
+    
+    def get_audience_summary(self, festival_id):
+        """Get exposure and ticket conversion by audience segment"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        summary = self.audience_system.summary(festival_id, festival.tickets_sold or 0)
+        summary['success'] = True
+        summary['tickets_sold'] = festival.tickets_sold or 0
+        summary['venue_capacity'] = festival.venue_capacity
+        return summary
+    
+    def step_inventory(self, festival_ids=None):
+        """Run one day of vendor sales against stock for many festivals (all if None).
+        
+        Demand is each vendor's expected orders at the festival's expected
+        attendance. Stock is written in the caller's transaction (not
+        committed); the caller touches the festivals and commits. Returns,
+        per festival, total and unmet demand and the vendors that ran out.
+        """
+        attendance_by_festival = self.economy_system.estimate_attendance_by_festival(festival_ids)
+        demand = self.economy_system.estimate_vendor_orders(attendance_by_festival)
+        state = self.inventory_system.load_state(list(attendance_by_festival))
+        
+        # Align expected orders with inventory rows by vendor id
+        orders = np.zeros(len(state['vendor_ids']))
+        positions = np.searchsorted(state['vendor_ids'], demand['features']['vendor_ids'])
+        orders[positions] = demand['orders']
+        
+        result = self.inventory_system.step(state, orders)
+        self.inventory_system.save_state(state)
+        
+        festival_ids = list(attendance_by_festival)
+        festival_positions = {festival_id: i for i, festival_id in enumerate(festival_ids)}
+        festival_index = np.array([festival_positions[festival_id] for festival_id in state['festival_ids']], dtype=int)
+        total_demand = np.bincount(festival_index, weights=orders, minlength=len(festival_ids))
+        total_unmet = np.bincount(festival_index, weights=result['unmet'], minlength=len(festival_ids))
+        
+        stockouts = {festival_id: {'demand': float(total_demand[i]), 'unmet': float(total_unmet[i]), 'vendor_ids': []}
+                     for i, festival_id in enumerate(festival_ids)}
+        for vendor_id, festival_id in zip(state['vendor_ids'][result['unmet'] > 0], state['festival_ids'][result['unmet'] > 0]):
+            stockouts[int(festival_id)]['vendor_ids'].append(int(vendor_id))
+        return stockouts
+    
     def hire_artist(self, festival_id, artist_data):
         """Hire an artist using the artist system"""
         festival = Festival.query.get(festival_id)
@@ -126,7 +225,9 @@ class GameCoordinator:
         festival.budget -= artist_data['fee']
         
         db.session.add(artist)
+        self.touch_festivals([festival_id])
         db.session.commit()
+        self.marketing_system.update_lineup_affinity(festival_id, {artist.genre: 1})
         
         return {
             'success': True,
@@ -151,13 +252,66 @@ class GameCoordinator:
             quality=vendor_data['quality'],
             cost=vendor_data['cost'],
             revenue=vendor_data['revenue'],
-            menu_items=vendor_data['menu_items']
+            menu=self.vendor_system.build_menu_items(vendor_data['menu_items']),
+            **self.inventory_system.initial_inventory(
+                vendor_data['specialty'],
+                self.vendor_system.vendor_specialties[vendor_data['specialty']]['revenue_multiplier']
+            )
         )
         
         # Update festival budget
         festival.budget -= vendor_data['cost']
         
         db.session.add(vendor)
+        self.touch_festivals([festival_id])
+        db.session.commit()
+        
+        return {
+            'success': True,
+            'vendor_id': vendor.id,
+            'remaining_budget': festival.budget
+        }
+    
+    def hire_market_vendor(self, festival_id, market_vendor_id):
+        """Hire a vendor from the market, moving its menu over to the festival"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        market_vendor = MarketVendor.query.get(market_vendor_id)
+        if not market_vendor:
+            return {'success': False, 'error': 'Vendor not found'}
+        
+        if festival.budget < market_vendor.cost:
+            return {'success': False, 'error': 'Insufficient budget'}
+        
+        vendor = Vendor(
+            festival_id=festival_id,
+            name=market_vendor.name,
+            specialty=market_vendor.specialty,
+            quality=market_vendor.quality,
+            cost=market_vendor.cost,
+            revenue=market_vendor.revenue,
+            **self.inventory_system.initial_inventory(
+                market_vendor.specialty,
+                self.vendor_system.vendor_specialties[market_vendor.specialty]['revenue_multiplier']
+            )
+        )
+        db.session.add(vendor)
+        db.session.flush()
+        
+        # Move the menu rows, then claim the market row; another hire may have got there first
+        db.session.execute(
+            update(MenuItem).where(MenuItem.market_vendor_id == market_vendor_id)
+            .values(vendor_id=vendor.id, market_vendor_id=None)
+        )
+        claimed = db.session.execute(delete(MarketVendor).where(MarketVendor.id == market_vendor_id)).rowcount
+        if not claimed:
+            db.session.rollback()
+            return {'success': False, 'error': 'Vendor not found'}
+        
+        festival.budget -= market_vendor.cost
+        self.touch_festivals([festival_id])
         db.session.commit()
         
         return {
@@ -166,6 +320,122 @@ class GameCoordinator:
             'remaining_budget': festival.budget
         }
     
+    def hire_batch(self, festival_id, artist_ids, artist_pool, vendor_ids):
+        """Hire many market artists and vendors in one transaction.
+        
+        artist_pool maps artist offer ids to artist data; vendor_ids refer to
+        the vendor market. Unknown or repeated ids fail on their own, and the
+        rest are hired together only if their total cost fits the budget.
+        Returns a result per requested item, artists first.
+        """
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        results = []
+        artists = []
+        requested = set()
+        for artist_id in artist_ids:
+            artist = artist_pool.get(artist_id)
+            error = 'Duplicate item' if ('artist', artist_id) in requested else None if artist else 'Artist not found'
+            requested.add(('artist', artist_id))
+            results.append({'type': 'artist', 'id': artist_id, 'success': error is None, 'error': error})
+            if error is None:
+                artists.append(artist)
+        
+        found = {vendor.id: vendor for vendor in MarketVendor.query.filter(MarketVendor.id.in_(vendor_ids)).all()}
+        vendors = []
+        for vendor_id in vendor_ids:
+            vendor = found.get(vendor_id)
+            error = 'Duplicate item' if ('vendor', vendor_id) in requested else None if vendor else 'Vendor not found'
+            requested.add(('vendor', vendor_id))
+            results.append({'type': 'vendor', 'id': vendor_id, 'success': error is None, 'error': error})
+            if error is None:
+                vendors.append(vendor)
+        
+        total_cost = sum(artist['fee'] for artist in artists) + sum(vendor.cost for vendor in vendors)
+        if total_cost > festival.budget:
+            for result in results:
+                if result['success']:
+                    result.update(success=False, error='Insufficient budget')
+            return {'success': False, 'error': 'Insufficient budget', 'total_cost': total_cost, 'results': results}
+        
+        artist_table = Artist.__table__
+        artist_rows = [
+            {
+                'festival_id': festival_id,
+                'name': artist['name'],
+                'genre': artist['genre'],
+                'popularity': artist['popularity'],
+                'fee': artist['fee'],
+                'performance_duration': artist['performance_duration'],
+                'stage_requirements': artist['stage_requirements'],
+                'special_requests': artist.get('special_requests', [])
+            }
+            for artist in artists
+        ]
+        new_artist_ids = db.session.execute(
+            insert(artist_table).returning(artist_table.c.id, sort_by_parameter_order=True), artist_rows
+        ).scalars().all() if artist_rows else []
+        
+        vendor_table = Vendor.__table__
+        vendor_rows = [
+            {
+                'festival_id': festival_id,
+                'name': vendor.name,
+                'specialty': vendor.specialty,
+                'quality': vendor.quality,
+                'cost': vendor.cost,
+                'revenue': vendor.revenue,
+                **self.inventory_system.initial_inventory(
+                    vendor.specialty, self.vendor_system.vendor_specialties[vendor.specialty]['revenue_multiplier']
+                )
+            }
+            for vendor in vendors
+        ]
+        new_vendor_ids = db.session.execute(
+            insert(vendor_table).returning(vendor_table.c.id, sort_by_parameter_order=True), vendor_rows
+        ).scalars().all() if vendor_rows else []
+        
+        if vendors:
+            # Move every menu in one statement, then claim the market rows
+            market_ids = [vendor.id for vendor in vendors]
+            menu_table = MenuItem.__table__
+            db.session.execute(
+                update(menu_table).where(menu_table.c.market_vendor_id.in_(market_ids)).values(
+                    vendor_id=case(dict(zip(market_ids, new_vendor_ids)), value=menu_table.c.market_vendor_id),
+                    market_vendor_id=None
+                )
+            )
+            claimed = db.session.execute(
+                delete(MarketVendor.__table__).where(MarketVendor.__table__.c.id.in_(market_ids))
+            ).rowcount
+            if claimed != len(market_ids):
+                db.session.rollback()
+                error = 'Some vendors were hired by another festival'
+                for result in results:
+                    if result['success']:
+                        result.update(success=False, error=error)
+                return {'success': False, 'error': error, 'results': results}
+        
+        festival.budget -= total_cost
+        self.touch_festivals([festival_id])
+        db.session.commit()
+        self.marketing_system.update_lineup_affinity(festival_id, Counter(artist['genre'] for artist in artists))
+        
+        new_ids = iter(list(new_artist_ids) + list(new_vendor_ids))
+        for result in results:
+            if result['success']:
+                result['hired_id'] = next(new_ids)
+        
+        return {
+            'success': True,
+            'hired': len(artists) + len(vendors),
+            'total_cost': total_cost,
+            'remaining_budget': festival.budget,
+            'results': results
+        }
+    
     def run_marketing_campaign(self, festival_id, campaign_type, target_audience, budget):
         """Run a marketing campaign using the marketing system"""
         festival = Festival.query.get(festival_id)
@@ -190,13 +460,168 @@ class GameCoordinator:
             artists.append(artist_data)
         return artists
     
-    def get_available_vendors(self, count=5):
-        """Get available vendors for hiring"""
-        vendors = []
-        for i in range(count):
-            vendor_data = self.vendor_system.generate_single_vendor(i + 1)
-            vendors.append(vendor_data)
-        return vendors
+    def get_available_vendors(self, count=5, **filters):
+        """Get a page of market vendors for hiring and the cursor for the next page"""
+        self.vendor_system.ensure_market_stock()
+        return self.vendor_system.search_market(count, **filters)
+    
+    def build_lineup(self, festival_id, candidates, budget=None, genre_targets=None, time_limit=0.25):
+        """Pick the best set of market artists for the festival's remaining budget"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        started = time.perf_counter()
+        budget = festival.budget if budget is None else min(budget, festival.budget)
+        
+        artists = Artist.query.filter_by(festival_id=festival_id).all()
+        existing_genre_counts = {}
+        for artist in artists:
+            existing_genre_counts[artist.genre] = existing_genre_counts.get(artist.genre, 0) + 1
+        
+        # Each artist's draw is the same attendance lift recommend_artists ranks by
+        _, attendance_lift = self.attendance_lift(
+            festival, sum(artist.popularity or 0 for artist in artists), len(artists), candidates
+        )
+        draw_values = attendance_lift.tolist()
+        reputation_value = self.economy_system.estimate_attendance(50, festival.marketing_budget, festival.reputation) / 100
+        
+        selected, solver = self.artist_system.optimize_lineup(
+            candidates, draw_values, budget, existing_genre_counts, genre_targets, reputation_value, time_limit
+        )
+        lineup = [candidates[i] for i in selected]
+        total_fee = sum(artist['fee'] for artist in lineup)
+        
+        # Projected financials with the proposed lineup in place
+        genre_counts = dict(existing_genre_counts)
+        for artist in lineup:
+            genre_counts[artist['genre']] = genre_counts.get(artist['genre'], 0) + 1
+        popularities = [artist.popularity for artist in artists] + [artist['popularity'] for artist in lineup]
+        average_popularity = sum(popularities) / len(popularities) if popularities else 50
+        synergies = self.artist_system.synergies_from_genre_counts(genre_counts)
+        reputation = min(100, festival.reputation + sum(synergy['reputation_bonus'] for synergy in synergies))
+        
+        expected_attendance = self.economy_system.estimate_attendance(average_popularity, festival.marketing_budget, reputation)
+        ticket_price = self.economy_system.estimate_ticket_price(
+            average_popularity, self.economy_system.get_average_vendor_quality(festival_id), reputation
+        )
+        ticket_revenue = self.economy_system.calculate_ticket_revenue(festival, ticket_price, expected_attendance)
+        
+        return {
+            'success': True,
+            'solver': solver,
+            'lineup': lineup,
+            'total_fee': total_fee,
+            'remaining_budget': festival.budget - total_fee,
+            'synergies': synergies,
+            'unmet_genre_targets': {
+                genre: target - genre_counts.get(genre, 0)
+                for genre, target in (genre_targets or {}).items()
+                if genre_counts.get(genre, 0) < target
+            },
+            'projected': {
+                'average_popularity': average_popularity,
+                'reputation': reputation,
+                'expected_attendance': expected_attendance,
+                'ticket_price': ticket_price,
+                'ticket_revenue': ticket_revenue['total_revenue']
+            },
+            'candidates_considered': len(candidates),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+    
+    def attendance_lift(self, festival, popularity_total, artist_count, candidates):
+        """Current expected attendance and, per candidate, the attendance gained by adding them.
+        
+        The lift is measured against the current lineup's average popularity,
+        one candidate at a time; both the lineup builder and the
+        recommendations use this definition of an artist's draw.
+        """
+        current_popularity = popularity_total / artist_count if artist_count else 50
+        current_attendance = self.economy_system.estimate_attendance(
+            current_popularity, festival.marketing_budget, festival.reputation
+        )
+        
+        # Lineup average popularity after adding each candidate
+        candidate_popularity = np.array([candidate['popularity'] for candidate in candidates], dtype=float)
+        new_popularity = (popularity_total + candidate_popularity) / (artist_count + 1)
+        attendance_lift = self.economy_system.estimate_attendance(
+            new_popularity, festival.marketing_budget, festival.reputation
+        ) - current_attendance
+        return current_attendance, attendance_lift
+    
+    def recommend_artists(self, festival_id, candidates, top_k=5):
+        """Rank market artists by how much hiring each would add to the festival"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        genre_rows = db.session.query(
+            Artist.genre, func.count(Artist.id), func.sum(Artist.popularity)
+        ).filter_by(festival_id=festival_id).group_by(Artist.genre).all()
+        existing_genre_counts = {genre: count for genre, count, _ in genre_rows}
+        artist_count = sum(existing_genre_counts.values())
+        popularity_total = sum(total or 0 for _, _, total in genre_rows)
+        
+        current_attendance, attendance_lift = self.attendance_lift(festival, popularity_total, artist_count, candidates)
+        reputation_value = self.economy_system.estimate_attendance(50, festival.marketing_budget, festival.reputation) / 100
+        
+        recommendations = self.artist_system.rank_candidates(
+            candidates, existing_genre_counts, attendance_lift, reputation_value, festival.budget, top_k
+        )
+        
+        return {
+            'success': True,
+            'recommendations': recommendations,
+            'current_attendance': current_attendance,
+            'candidates_considered': len(candidates)
+        }
+    
+    def recommend_vendors(self, festival_id, top_k=5):
+        """Rank every market vendor by how well it fits the festival's current vendor mix"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        self.vendor_system.ensure_market_stock()
+        specialty_counts = self.vendor_system.get_specialty_counts(festival_id)
+        recommendations, considered = self.vendor_system.rank_market(
+            specialty_counts,
+            self.vendor_system.get_specialty_revenue(festival_id),
+            festival.budget,
+            top_k
+        )
+        
+        return {
+            'success': True,
+            'recommendations': recommendations,
+            'current_vendor_count': int(specialty_counts.sum()),
+            'candidates_considered': considered
+        }
+    
+    def get_dietary_coverage(self, festival_id, top_k=5):
+        """Report which diets the hired vendors can feed and suggest market vendors for the gaps"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        self.vendor_system.ensure_market_stock()
+        vendor_counts = self.vendor_system.calculate_dietary_coverage(festival_id)[festival_id]
+        
+        return {
+            'success': True,
+            'coverage': [
+                {
+                    'diet': diet,
+                    'avoids': self.vendor_system.dietary_profiles[diet],
+                    'vendor_count': count,
+                    'covered': count > 0
+                }
+                for diet, count in vendor_counts.items()
+            ],
+            'gaps': [diet for diet, count in vendor_counts.items() if count == 0],
+            'suggestions': self.vendor_system.suggest_market_dietary_vendors(vendor_counts, top_k)
+        }
     
     def get_marketing_recommendations(self, festival_id):
         """Get marketing recommendations"""
@@ -206,6 +631,17 @@ class GameCoordinator:
         
         return self.marketing_system.get_recommended_campaigns(festival)
     
+    def optimize_marketing_budget(self, festival_id, budget=None, objective='reach'):
+        """Split a marketing budget across channels and audiences"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        if budget is None:
+            budget = festival.budget
+        
+        return self.marketing_system.optimize_budget(festival, budget, objective)
+    
     def get_emergency_protocols(self, festival_id):
         """Get emergency protocols"""
         festival = Festival.query.get(festival_id)
@@ -226,6 +662,94 @@ class GameCoordinator:
         """Assign a performance slot to an artist"""
         return self.artist_system.assign_performance_slot(festival_id, artist_id, slot_type)
     
+    def get_timetable(self, festival_id, day=None):
+        """Get the multi-stage timetable for a festival"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return None
+        
+        return self.schedule_system.get_timetable(festival_id, day)
+    
+    def create_stage(self, festival_id, stage_data):
+        """Add a stage to a festival"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        return self.schedule_system.create_stage(
+            festival_id,
+            stage_data.get('name'),
+            stage_data.get('capacity', 5000),
+            stage_data.get('changeover_minutes', 15)
+        )
+    
+    def schedule_set(self, festival_id, artist_id, stage_id, day, start_minute, duration=None):
+        """Add an artist's set to the timetable"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        return self.schedule_system.schedule_set(festival_id, artist_id, stage_id, day, start_minute, duration)
+    
+    def move_set(self, festival_id, set_id, stage_id=None, day=None, start_minute=None, duration=None):
+        """Move a set to a different stage, day or time"""
+        return self.schedule_system.move_set(festival_id, set_id, stage_id, day, start_minute, duration)
+    
+    def remove_set(self, festival_id, set_id):
+        """Remove a set from the timetable"""
+        return self.schedule_system.remove_set(festival_id, set_id)
+    
+    def get_layout(self, festival_id):
+        """Get the saved festival grounds layout"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return None
+        
+        return self.layout_system.get_layout(festival_id)
+    
+    def optimize_layout(self, festival_id, seed=None):
+        """Place hired vendors on the grounds to maximize neighbor relationships"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        stages = self.schedule_system.get_stages(festival_id)
+        return self.layout_system.optimize_layout(
+            festival_id,
+            stages,
+            self.vendor_system.relationship_matrix,
+            self.vendor_system.specialty_index,
+            seed
+        )
+    
+    def simulate_vendor_service(self, festival_id, attendance=None, seed=None):
+        """Simulate a festival day of attendee queues at the hired vendors"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return {'success': False, 'error': 'Festival not found'}
+        
+        if attendance is None:
+            attendance = self.economy_system.calculate_expected_attendance(festival)
+        
+        profiles = self.vendor_system.get_menu_profiles(festival_id)
+        vendors = []
+        for vendor in Vendor.query.filter_by(festival_id=festival_id).order_by(Vendor.id).all():
+            profile = profiles.get(vendor.id, {'categories': {}, 'average_price': 0.0})
+            vendors.append({
+                'id': vendor.id,
+                'name': vendor.name,
+                'specialty': vendor.specialty,
+                'quality': vendor.quality,
+                'average_price': profile['average_price'],
+                'service_minutes': self.service_simulator.service_minutes(
+                    profile['categories'], vendor.quality, self.vendor_system.food_categories
+                )
+            })
+        
+        result = run_cpu_bound(self.service_simulator.simulate, vendors, attendance, seed)
+        result['success'] = True
+        return result
+    
     def get_weather_forecast(self, festival_id):
         """Get weather forecast for the festival"""
         festival = Festival.query.get(festival_id)
@@ -243,4 +767,12 @@ class GameCoordinator:
         if not festival:
             return None
         
-        return self.marketing_system.calculate_social_media_impact(festival) 
\ No newline at end of file
+        return self.marketing_system.calculate_social_media_impact(festival)
+    
+    def get_social_trend(self, festival_id, window=7, days=30):
+        """Get rolling social media aggregates"""
+        festival = Festival.query.get(festival_id)
+        if not festival:
+            return None
+        
+        return self.marketing_system.get_social_trend(festival_id, window, days) 
\ No newline at end of file
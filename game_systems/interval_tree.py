@@ -0,0 +1,137 @@
+"""
+Interval Tree - Balanced interval index used for timetable clash detection
+"""
+
+
+class _Node:
+    """AVL node keyed by (start, key) and augmented with the subtree's max end"""
+
+    __slots__ = ('start', 'end', 'key', 'max_end', 'height', 'left', 'right')
+
+    def __init__(self, start, end, key):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.max_end = end
+        self.height = 1
+        self.left = None
+        self.right = None
+
+
+def _height(node):
+    return node.height if node else 0
+
+
+def _update(node):
+    node.height = 1 + max(_height(node.left), _height(node.right))
+    node.max_end = node.end
+    if node.left and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+
+
+def _rotate_right(node):
+    pivot = node.left
+    node.left = pivot.right
+    pivot.right = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rotate_left(node):
+    pivot = node.right
+    node.right = pivot.left
+    pivot.left = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rebalance(node):
+    _update(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if balance < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+class IntervalTree:
+    """Self-balancing tree of half-open [start, end) intervals.
+
+    Insert and remove are O(log n); an overlap query is O(log n + k) where k
+    is the number of intervals returned. Each interval carries a ``key`` that
+    must be unique among intervals sharing the same start.
+    """
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, start, end, key):
+        """Insert the interval [start, end) identified by key"""
+        if end <= start:
+            raise ValueError('Interval end must be greater than its start')
+        self._root = self._insert(self._root, start, end, key)
+        self._size += 1
+
+    def remove(self, start, key):
+        """Remove the interval starting at start with the given key"""
+        self._root, removed = self._remove(self._root, start, key)
+        if removed:
+            self._size -= 1
+        return removed
+
+    def overlapping(self, start, end):
+        """Return (start, end, key) tuples for every interval overlapping [start, end)"""
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_end <= start:
+                continue
+            stack.append(node.left)
+            if node.start < end:
+                if node.end > start:
+                    results.append((node.start, node.end, node.key))
+                stack.append(node.right)
+        return results
+
+    def _insert(self, node, start, end, key):
+        if node is None:
+            return _Node(start, end, key)
+        if (start, key) < (node.start, node.key):
+            node.left = self._insert(node.left, start, end, key)
+        else:
+            node.right = self._insert(node.right, start, end, key)
+        return _rebalance(node)
+
+    def _remove(self, node, start, key):
+        if node is None:
+            return None, False
+        if (start, key) < (node.start, node.key):
+            node.left, removed = self._remove(node.left, start, key)
+        elif (start, key) > (node.start, node.key):
+            node.right, removed = self._remove(node.right, start, key)
+        else:
+            removed = True
+            if node.left is None:
+                return node.right, removed
+            if node.right is None:
+                return node.left, removed
+            successor = node.right
+            while successor.left:
+                successor = successor.left
+            node.start, node.end, node.key = successor.start, successor.end, successor.key
+            node.right, _ = self._remove(node.right, successor.start, successor.key)
+        return _rebalance(node), removed
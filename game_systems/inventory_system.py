@@ -0,0 +1,81 @@
+"""
+Inventory System - Handles vendor stock, restocking and stock-outs
+"""
+import numpy as np
+from sqlalchemy import update
+from models import db, Vendor
+
+
+class InventorySystem:
+    """Handles per-vendor inventory as arrays updated in one step per day"""
+
+    def __init__(self):
+        # Orders a vendor holds after a restock, before the specialty multiplier
+        self.base_capacity = 1500
+
+        # Days between deliveries; anything else gets the default
+        self.restock_intervals = {
+            'Food Truck': 1,
+            'Beverage Stand': 1,
+            'Coffee Shop': 1,
+            'Wine Bar': 3,
+            'Cheese Platter': 3
+        }
+        self.default_restock_interval = 2
+
+    def initial_inventory(self, specialty, revenue_multiplier):
+        """Column values for a newly hired vendor, fully stocked"""
+        capacity = float(round(self.base_capacity * revenue_multiplier))
+        interval = self.restock_intervals.get(specialty, self.default_restock_interval)
+        return {
+            'stock': capacity,
+            'stock_capacity': capacity,
+            'restock_interval': interval,
+            'days_to_restock': interval
+        }
+
+    def load_state(self, festival_ids=None):
+        """Inventory columns for the vendors of the given festivals (all if None) as aligned arrays"""
+        query = db.session.query(
+            Vendor.id, Vendor.festival_id, Vendor.stock, Vendor.stock_capacity,
+            Vendor.restock_interval, Vendor.days_to_restock
+        )
+        if festival_ids is not None:
+            query = query.filter(Vendor.festival_id.in_(festival_ids))
+        rows = query.order_by(Vendor.id).all()
+
+        columns = list(zip(*rows)) if rows else [()] * 6
+        return {
+            'vendor_ids': np.array(columns[0], dtype=int),
+            'festival_ids': np.array(columns[1], dtype=int),
+            'stock': np.array([value or 0.0 for value in columns[2]], dtype=float),
+            'stock_capacity': np.array([value or 0.0 for value in columns[3]], dtype=float),
+            'restock_interval': np.array(
+                [value or self.default_restock_interval for value in columns[4]], dtype=int
+            ),
+            'days_to_restock': np.array([value or 0 for value in columns[5]], dtype=int)
+        }
+
+    def step(self, state, demand):
+        """Advance every vendor in state by one day against demand (orders aligned with state).
+
+        Vendors due a delivery are restocked to capacity first, then sell what
+        they can. Updates state in place and returns sold and unmet orders.
+        """
+        due = state['days_to_restock'] <= 0
+        state['stock'] = np.where(due, state['stock_capacity'], state['stock'])
+        state['days_to_restock'] = np.where(due, state['restock_interval'], state['days_to_restock']) - 1
+
+        sold = np.minimum(state['stock'], demand)
+        state['stock'] = state['stock'] - sold
+        return {'sold': sold, 'unmet': demand - sold}
+
+    def save_state(self, state):
+        """Write stock levels back in one bulk UPDATE by primary key"""
+        if not len(state['vendor_ids']):
+            return
+
+        db.session.execute(update(Vendor), [
+            {'id': int(vendor_id), 'stock': float(stock), 'days_to_restock': int(days)}
+            for vendor_id, stock, days in zip(state['vendor_ids'], state['stock'], state['days_to_restock'])
+        ])
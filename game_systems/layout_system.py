@@ -0,0 +1,175 @@
+"""
+Layout System - Handles the festival grounds grid and vendor placement
+"""
+import math
+import random
+import time
+from sqlalchemy import insert
+from models import db, Festival, Vendor, FestivalGrounds, LayoutPlot
+from .offload import run_cpu_bound
+
+
+class LayoutSystem:
+    """Handles festival grounds layout and vendor placement optimization"""
+
+    def __init__(self):
+        # Extra free plots relative to the number of stages and vendors
+        self.grid_slack = 0.3
+
+        # Simulated annealing schedule
+        self.annealing = {
+            'initial_temperature': 0.3,
+            'final_temperature': 0.002,
+            'iterations_per_vendor': 300,
+            'min_iterations': 20000,
+            'time_limit': 0.8  # seconds
+        }
+
+    def get_layout(self, festival_id):
+        """Get the saved grounds layout for a festival"""
+        grounds = FestivalGrounds.query.filter_by(festival_id=festival_id).first()
+        if not grounds:
+            return {'grounds': None, 'plots': []}
+
+        plots = LayoutPlot.query.filter_by(festival_id=festival_id).order_by(LayoutPlot.y, LayoutPlot.x).all()
+        return {'grounds': grounds.to_dict(), 'plots': [plot.to_dict() for plot in plots]}
+
+    def optimize_layout(self, festival_id, stages, relationship_matrix, specialty_index, seed=None):
+        """Place hired vendors on the grounds grid and save the best layout found.
+
+        Stages sit on fixed plots along the top edge. Vendors are arranged by
+        simulated annealing over swap/move steps, maximizing the sum of
+        relationship_matrix entries over every pair of vendors on adjacent
+        plots (complementary neighbors score positive, competitors negative).
+        Each step is scored incrementally from the neighbors of the two plots
+        it touches rather than by rescoring the whole grid.
+        """
+        rng = random.Random(seed)
+        vendors = Vendor.query.filter_by(festival_id=festival_id).order_by(Vendor.id).all()
+
+        # Size the grid for stages plus vendors with some free plots to move into
+        cells_needed = max(len(vendors) + len(stages), 1) * (1 + self.grid_slack)
+        width = max(int(math.ceil(math.sqrt(cells_needed))), len(stages), 2)
+        height = max(int(math.ceil(cells_needed / width)), 2)
+
+        # Stage plots spread evenly along the top row
+        stage_cells = {}
+        for i, stage in enumerate(stages):
+            x = (i * width) // max(len(stages), 1)
+            stage_cells[x] = stage
+
+        specialties = [specialty_index.get(vendor.specialty, 0) for vendor in vendors]
+        weights = [[float(value) for value in row] for row in relationship_matrix]
+
+        # The annealing is pure computation; keep it off the event loop
+        best_position, best_score, steps = run_cpu_bound(
+            self._anneal, width, height, list(stage_cells), specialties, weights, rng
+        )
+
+        self._save_layout(festival_id, width, height, stage_cells, vendors, best_position, best_score)
+
+        result = self.get_layout(festival_id)
+        result['success'] = True
+        result['iterations'] = steps
+        return result
+
+    def _anneal(self, width, height, stage_cells, specialties, weights, rng):
+        """Simulated annealing over vendor placements; returns (best position per vendor, its score, steps run)"""
+        vendor_count = len(specialties)
+
+        # occupant per cell: vendor index, -1 for empty, -2 for stage
+        occupant = [-1] * (width * height)
+        for x in stage_cells:
+            occupant[x] = -2
+        free_cells = [cell for cell in range(width * height) if occupant[cell] == -1]
+
+        neighbors = []
+        for cell in range(width * height):
+            cx, cy = cell % width, cell // width
+            neighbors.append([
+                ny * width + nx
+                for ny in range(cy - 1, cy + 2)
+                for nx in range(cx - 1, cx + 2)
+                if (nx, ny) != (cx, cy) and 0 <= nx < width and 0 <= ny < height
+            ])
+
+        def contribution(vendor, cell):
+            row = weights[specialties[vendor]]
+            total = 0.0
+            for neighbor in neighbors[cell]:
+                other = occupant[neighbor]
+                if other >= 0 and other != vendor:
+                    total += row[specialties[other]]
+            return total
+
+        # Random initial placement
+        position = rng.sample(free_cells, vendor_count)
+        for vendor, cell in enumerate(position):
+            occupant[cell] = vendor
+        score = sum(contribution(vendor, cell) for vendor, cell in enumerate(position)) / 2
+
+        best_score, best_position = score, list(position)
+        iterations = max(self.annealing['min_iterations'], self.annealing['iterations_per_vendor'] * vendor_count)
+        start_temp = self.annealing['initial_temperature']
+        cooling = (self.annealing['final_temperature'] / start_temp) ** (1 / iterations)
+        deadline = time.perf_counter() + self.annealing['time_limit']
+
+        temperature = start_temp
+        steps = 0
+        while steps < iterations and vendor_count > 1:
+            if steps % 1000 == 0 and time.perf_counter() > deadline:
+                break
+            steps += 1
+            temperature *= cooling
+
+            vendor = rng.randrange(vendor_count)
+            source = position[vendor]
+            target = rng.choice(free_cells)
+            if target == source:
+                continue
+            other = occupant[target]
+
+            # Delta from the neighborhoods of the two cells involved; a direct
+            # pair between the two moved vendors is counted on both sides and cancels
+            before = contribution(vendor, source) + (contribution(other, target) if other >= 0 else 0.0)
+            occupant[source], occupant[target] = other, vendor
+            after = contribution(vendor, target) + (contribution(other, source) if other >= 0 else 0.0)
+            delta = after - before
+
+            if delta >= 0 or rng.random() < math.exp(delta / temperature):
+                position[vendor] = target
+                if other >= 0:
+                    position[other] = source
+                score += delta
+                if score > best_score + 1e-9:
+                    best_score, best_position = score, list(position)
+            else:
+                occupant[source], occupant[target] = vendor, other
+
+        return best_position, best_score, steps
+
+    def _save_layout(self, festival_id, width, height, stage_cells, vendors, position, score):
+        """Replace the festival's saved layout"""
+        LayoutPlot.query.filter_by(festival_id=festival_id).delete()
+
+        grounds = FestivalGrounds.query.filter_by(festival_id=festival_id).first()
+        if not grounds:
+            grounds = FestivalGrounds(festival_id=festival_id, width=width, height=height)
+            db.session.add(grounds)
+        grounds.width = width
+        grounds.height = height
+        grounds.layout_score = round(score, 4)
+
+        plots = [
+            {'festival_id': festival_id, 'x': x, 'y': 0, 'kind': 'stage', 'stage_id': stage.id, 'vendor_id': None}
+            for x, stage in stage_cells.items()
+        ]
+        plots.extend(
+            {'festival_id': festival_id, 'x': cell % width, 'y': cell // width, 'kind': 'vendor',
+             'stage_id': None, 'vendor_id': vendors[vendor].id}
+            for vendor, cell in enumerate(position)
+        )
+        if plots:
+            db.session.execute(insert(LayoutPlot), plots)
+        Festival.touch([festival_id])
+        db.session.commit()
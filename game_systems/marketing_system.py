@@ -1,13 +1,20 @@
 """
 Marketing System - Handles all marketing-related game logic
 """
+import hashlib
+import json
 import random
-from models import db, Festival
+import threading
+from types import MappingProxyType
+import numpy as np
+from sqlalchemy import func, update
+from .catalog import freeze
+from models import db, Festival, Artist, Campaign, SocialMetric
 
 class MarketingSystem:
     """Handles marketing campaigns, analytics, and reputation management"""
     
-    def __init__(self):
+    def __init__(self, artist_system=None):
         # Marketing campaign types and their effects
         self.campaign_types = {
             'Social Media': {
@@ -105,6 +112,109 @@ class MarketingSystem:
             }
         }
         
+        # Ready-made campaign offers; duration and effectiveness come from campaign_types
+        campaign_offers = [
+            {'name': 'Social Media Blitz', 'type': 'Social Media', 'target_audience': 'Young Adults (18-25)', 'cost': 5000,
+             'description': 'Target young adults through social media platforms'},
+            {'name': 'Radio Advertisement', 'type': 'Radio', 'target_audience': 'Adults (26-40)', 'cost': 8000,
+             'description': 'Reach adults through radio commercials'},
+            {'name': 'Billboard Campaign', 'type': 'Billboards', 'target_audience': 'Families', 'cost': 15000,
+             'description': 'High-visibility outdoor advertising for families'},
+            {'name': 'Influencer Partnership', 'type': 'Influencer Marketing', 'target_audience': 'Music Enthusiasts', 'cost': 12000,
+             'description': 'Partner with music influencers for maximum engagement'},
+            {'name': 'TV Commercial', 'type': 'TV Commercials', 'target_audience': 'Families', 'cost': 25000,
+             'description': 'High-impact television advertising for broad reach'},
+            {'name': 'Event Marketing', 'type': 'Event Marketing', 'target_audience': 'Music Enthusiasts', 'cost': 10000,
+             'description': 'Pop-up events and street marketing for direct engagement'},
+            {'name': 'Print Media Campaign', 'type': 'Print Media', 'target_audience': 'Older Adults (41+)', 'cost': 6000,
+             'description': 'Newspaper ads and magazines for traditional audiences'},
+            {'name': 'Email Marketing', 'type': 'Email Marketing', 'target_audience': 'Adults (26-40)', 'cost': 2000,
+             'description': 'Cost-effective email campaigns to existing database'}
+        ]
+        
+        # Id-indexed, read-only catalog plus its serialized form and ETag, built once
+        catalog = {}
+        for campaign_id, offer in enumerate(campaign_offers, start=1):
+            campaign_data = self.campaign_types[offer['type']]
+            preferred = offer['type'] in self.target_audiences[offer['target_audience']]['preferred_channels']
+            catalog[campaign_id] = MappingProxyType({
+                'id': campaign_id,
+                'name': offer['name'],
+                'type': offer['type'],
+                'target_audience': offer['target_audience'],
+                'effectiveness': round(min(1.0, campaign_data['effectiveness'] * (1.2 if preferred else 1.0)), 3),
+                'duration_days': campaign_data['duration'],
+                'cost': offer['cost'],
+                'description': offer['description']
+            })
+        self.campaign_catalog = MappingProxyType(catalog)
+        self.campaign_catalog_json = json.dumps([dict(campaign) for campaign in catalog.values()])
+        self.campaign_catalog_etag = hashlib.sha256(self.campaign_catalog_json.encode()).hexdigest()[:32]
+        
+        # People reachable in each audience; reach from one channel saturates
+        # towards this as spend grows
+        self.audience_sizes = {
+            'Young Adults (18-25)': 400000,
+            'Adults (26-40)': 600000,
+            'Older Adults (41+)': 500000,
+            'Families': 350000,
+            'Music Enthusiasts': 250000
+        }
+        
+        # Adstock carryover per channel: the share of a campaign's accumulated
+        # effect that persists into the next day. Broadcast and outdoor media
+        # linger; direct and social channels fade quickly.
+        self.adstock_decay = {
+            'Social Media': 0.5,
+            'Print Media': 0.6,
+            'Radio': 0.6,
+            'TV Commercials': 0.75,
+            'Billboards': 0.8,
+            'Influencer Marketing': 0.55,
+            'Event Marketing': 0.45,
+            'Email Marketing': 0.3
+        }
+        
+        # A finished campaign is closed once its remaining adstock is this small
+        self.adstock_floor = 0.01
+        
+        # What optimize_budget can maximize
+        self.optimizer_objectives = ('reach', 'reputation')
+        
+        # Genres each audience is drawn to
+        self.audience_genres = {
+            'Young Adults (18-25)': ['Electronic', 'Hip Hop', 'Pop', 'EDM', 'Trap', 'House', 'Techno'],
+            'Adults (26-40)': ['Indie', 'Alternative', 'Rock', 'R&B', 'House', 'Pop'],
+            'Older Adults (41+)': ['Rock', 'Jazz', 'Blues', 'Classical', 'Folk', 'Soul', 'Country'],
+            'Families': ['Pop', 'Folk', 'Country', 'Acoustic', 'World', 'Singer-Songwriter'],
+            'Music Enthusiasts': ['Experimental', 'Indie', 'Jazz', 'Ambient', 'Metal', 'Punk', 'Techno', 'World']
+        }
+        
+        # Genre x audience affinity: 1 for an audience's own genres, less for
+        # genres sharing a synergy group with one of them, scaled up by the
+        # group's marketing_bonus. A lineup's affinity to an audience is the
+        # mean row of its artists; campaign effectiveness and reach scale by
+        # 1 + lineup_affinity_weight * (affinity - affinity of a random lineup).
+        self.affinity_levels = {'preferred': 1.0, 'related': 0.5, 'other': 0.1}
+        self.lineup_affinity_weight = 0.5
+        self.lineup_affinity_range = (0.75, 1.5)
+        self.genre_affinity = None
+        if artist_system is not None:
+            self._build_genre_affinity(artist_system)
+        
+        # Per festival artist count and summed affinity rows, updated as artists are hired
+        self._lineup_affinity = {}
+        self._lineup_affinity_lock = threading.Lock()
+        
+        # Daily social media dynamics
+        self.social_dynamics = {
+            'follow_rate': 0.002,  # Followers gained per impression at reputation 50
+            'organic_growth': 0.004,  # Daily follower growth per point of sentiment
+            'churn_rate': 0.001,  # Share of followers lost each day
+            'impression_engagement': 0.01,  # Engagements per impression
+            'ticket_engagement': 2  # Engagements per ticket sold that day
+        }
+        
         # Marketing metrics and KPIs
         self.metrics = {
             'reach': 'Number of people exposed to marketing',
@@ -114,63 +224,139 @@ class MarketingSystem:
             'brand_awareness': 'Recognition of festival brand',
             'sentiment': 'Public opinion and social media sentiment'
         }
+        
+        # Catalogs are shared by every request; freeze them so nothing can modify them in place
+        self.campaign_types = freeze(self.campaign_types)
+        self.target_audiences = freeze(self.target_audiences)
+        self.audience_sizes = freeze(self.audience_sizes)
+        self.adstock_decay = freeze(self.adstock_decay)
+        self.audience_genres = freeze(self.audience_genres)
+        self.affinity_levels = freeze(self.affinity_levels)
+        self.social_dynamics = freeze(self.social_dynamics)
+        self.metrics = freeze(self.metrics)
+    
+    def _build_genre_affinity(self, artist_system):
+        """Precompute the genre x audience affinity matrix from the artist system's genres"""
+        audiences = list(self.target_audiences)
+        self.affinity_genre_index = artist_system.genre_index
+        self.genre_affinity = np.zeros((len(self.affinity_genre_index), len(audiences)))
+        
+        for a, audience in enumerate(audiences):
+            preferred = set(self.audience_genres.get(audience, []))
+            preferred_groups = {group for genre in preferred for group in artist_system.genre_groups.get(genre, [])}
+            for genre, g in self.affinity_genre_index.items():
+                groups = artist_system.genre_groups.get(genre, [])
+                if genre in preferred:
+                    level = self.affinity_levels['preferred']
+                elif preferred_groups.intersection(groups):
+                    level = self.affinity_levels['related']
+                else:
+                    level = self.affinity_levels['other']
+                bonus = max((artist_system.genre_synergies[group]['marketing_bonus'] for group in groups), default=0.0)
+                self.genre_affinity[g, a] = level * (1 + bonus)
+        
+        # What a lineup picked uniformly across genres would score
+        genre_rows = [self.affinity_genre_index[genre] for genre in artist_system.genres]
+        self.neutral_affinity = self.genre_affinity[genre_rows].mean(axis=0)
     
-    def calculate_campaign_effectiveness(self, campaign_type, target_audience, festival_reputation):
+    def lineup_affinity(self, festival_id):
+        """Campaign multiplier per target audience (in target_audiences order) for a festival's lineup"""
+        if self.genre_affinity is None:
+            return np.ones(len(self.target_audiences))
+        
+        with self._lineup_affinity_lock:
+            cached = self._lineup_affinity.get(festival_id)
+            if cached is not None:
+                artists, affinity = cached['artists'], cached['affinity']
+        
+        if cached is None:
+            counts = dict(
+                db.session.query(Artist.genre, func.count(Artist.id)).filter(Artist.festival_id == festival_id).group_by(Artist.genre).all()
+            )
+            artists, affinity = self._genre_count_affinity(counts)
+            with self._lineup_affinity_lock:
+                self._lineup_affinity.setdefault(festival_id, {'artists': artists, 'affinity': affinity})
+        
+        if not artists:
+            return np.ones(len(self.target_audiences))
+        mean_affinity = affinity / artists
+        return np.clip(1 + self.lineup_affinity_weight * (mean_affinity - self.neutral_affinity), *self.lineup_affinity_range)
+    
+    def update_lineup_affinity(self, festival_id, genre_counts):
+        """Add newly hired artists ({genre: count}) to a festival's cached lineup affinity"""
+        if self.genre_affinity is None:
+            return
+        
+        artists, affinity = self._genre_count_affinity(genre_counts)
+        with self._lineup_affinity_lock:
+            cached = self._lineup_affinity.get(festival_id)
+            if cached is None:
+                return  # Built from the database on next use
+            cached['artists'] += artists
+            cached['affinity'] = cached['affinity'] + affinity
+    
+    def _genre_count_affinity(self, genre_counts):
+        """Artist count and summed affinity rows for {genre: count}"""
+        counts = np.zeros(self.genre_affinity.shape[0])
+        for genre, count in genre_counts.items():
+            if genre in self.affinity_genre_index:
+                counts[self.affinity_genre_index[genre]] += count
+        return int(counts.sum()), counts @ self.genre_affinity
+    
+    def calculate_campaign_effectiveness(self, campaign_type, target_audience, festival_reputation, lineup_affinity=1.0):
         """Calculate the effectiveness of a marketing campaign"""
         campaign_data = self.campaign_types[campaign_type]
         audience_data = self.target_audiences[target_audience]
         
-        # Base effectiveness
-        base_effectiveness = campaign_data['effectiveness']
-        
-        # Channel preference bonus
-        channel_bonus = 0.2 if campaign_type in audience_data['preferred_channels'] else 0
-        
-        # Reputation bonus (higher reputation = better marketing results)
-        reputation_bonus = (festival_reputation - 50) * 0.002  # ±10% based on reputation
-        
-        # Random factor
-        random_factor = random.uniform(0.8, 1.2)
-        
-        # Calculate final effectiveness
-        final_effectiveness = base_effectiveness * (1 + channel_bonus + reputation_bonus) * random_factor
-        
-        return min(1.0, max(0.1, final_effectiveness))  # Clamp between 0.1 and 1.0
+        return float(self._effectiveness(
+            campaign_data['effectiveness'],
+            campaign_type in audience_data['preferred_channels'],
+            festival_reputation,
+            lineup_affinity,
+            random.uniform(0.8, 1.2)  # Random factor
+        ))
     
-    def calculate_campaign_reach(self, campaign_type, budget, target_audience, effectiveness):
+    def calculate_campaign_reach(self, campaign_type, budget, target_audience, effectiveness, lineup_affinity=1.0):
         """Calculate the reach of a marketing campaign"""
         campaign_data = self.campaign_types[campaign_type]
         audience_data = self.target_audiences[target_audience]
         
-        # Base reach calculation
-        base_reach = (budget / campaign_data['base_cost']) * 10000  # 10k people per base cost
-        
-        # Apply multipliers
-        reach_multiplier = campaign_data['reach_multiplier']
-        audience_multiplier = audience_data['reach_multiplier']
-        effectiveness_multiplier = effectiveness
-        
-        final_reach = base_reach * reach_multiplier * audience_multiplier * effectiveness_multiplier
-        
-        return int(final_reach)
+        reach_per_dollar = self._reach_per_dollar(
+            campaign_data['base_cost'], campaign_data['reach_multiplier'], audience_data['reach_multiplier'],
+            effectiveness, lineup_affinity
+        )
+        return int(budget * reach_per_dollar)
     
     def calculate_reputation_impact(self, campaign_type, effectiveness, current_reputation):
         """Calculate reputation impact of a marketing campaign"""
-        campaign_data = self.campaign_types[campaign_type]
-        
-        # Base reputation boost
-        base_boost = campaign_data['reputation_boost']
+        return float(self._reputation_boost(
+            self.campaign_types[campaign_type]['reputation_boost'], effectiveness, current_reputation
+        ))
+    
+    # The campaign formulas below take plain numbers or NumPy arrays, so a
+    # single campaign and the budget optimizer's channel x audience grid
+    # share one implementation.
+    
+    def _effectiveness(self, base_effectiveness, preferred_channel, reputation, lineup_affinity=1.0, random_factor=1.0):
+        """Effectiveness clamped to [0.1, 1]"""
+        # Channel preference bonus
+        channel_bonus = 0.2 * np.asarray(preferred_channel, dtype=float)
         
-        # Effectiveness modifier
-        effectiveness_modifier = effectiveness
+        # Reputation bonus (higher reputation = better marketing results)
+        reputation_bonus = (reputation - 50) * 0.002  # ±10% based on reputation
         
+        final_effectiveness = base_effectiveness * (1 + channel_bonus + reputation_bonus) * random_factor * lineup_affinity
+        return np.clip(final_effectiveness, 0.1, 1.0)
+    
+    def _reach_per_dollar(self, base_cost, channel_reach, audience_reach, effectiveness, lineup_affinity=1.0):
+        """People reached per dollar spent; 10k people per base cost before multipliers"""
+        return 10000 / base_cost * channel_reach * audience_reach * effectiveness * lineup_affinity
+    
+    def _reputation_boost(self, base_boost, effectiveness, reputation):
+        """Total reputation a campaign delivers"""
         # Diminishing returns for high reputation
-        reputation_factor = max(0.5, 1 - (current_reputation - 50) / 100)
-        
-        # Calculate final reputation boost
-        reputation_boost = base_boost * effectiveness_modifier * reputation_factor
-        
-        return reputation_boost
+        reputation_factor = np.maximum(0.5, 1 - (reputation - 50) / 100)
+        return base_boost * effectiveness * reputation_factor
     
     def run_marketing_campaign(self, festival, campaign_type, target_audience, budget):
         """Execute a marketing campaign and return results"""
@@ -183,14 +369,17 @@ class MarketingSystem:
         if budget < self.campaign_types[campaign_type]['base_cost']:
             return {'success': False, 'error': 'Insufficient budget for campaign'}
         
+        # How well the lineup appeals to the target audience
+        lineup_affinity = float(self.lineup_affinity(festival.id)[list(self.target_audiences).index(target_audience)])
+        
         # Calculate campaign effectiveness
         effectiveness = self.calculate_campaign_effectiveness(
-            campaign_type, target_audience, festival.reputation
+            campaign_type, target_audience, festival.reputation, lineup_affinity
         )
         
         # Calculate reach
         reach = self.calculate_campaign_reach(
-            campaign_type, budget, target_audience, effectiveness
+            campaign_type, budget, target_audience, effectiveness, lineup_affinity
         )
         
         # Calculate reputation impact
@@ -198,25 +387,205 @@ class MarketingSystem:
             campaign_type, effectiveness, festival.reputation
         )
         
-        # Update festival budget and reputation
+        campaign = Campaign(
+            festival_id=festival.id,
+            campaign_type=campaign_type,
+            target_audience=target_audience,
+            budget=budget,
+            start_day=festival.days_remaining,
+            duration=self.campaign_types[campaign_type]['duration'],
+            reach=reach,
+            effectiveness=effectiveness,
+            reputation_boost=reputation_boost,
+            decay=self.adstock_decay[campaign_type]
+        )
+        
+        # Reputation now builds up day by day in apply_campaign_effects
         festival.budget -= budget
-        festival.reputation = min(100, festival.reputation + reputation_boost)
         festival.marketing_budget += budget
         
+        db.session.add(campaign)
+        Festival.touch([festival.id])
         db.session.commit()
         
         return {
             'success': True,
+            'campaign_id': campaign.id,
             'campaign_type': campaign_type,
             'target_audience': target_audience,
             'budget_spent': budget,
             'effectiveness': effectiveness,
             'reach': reach,
+            'lineup_affinity': lineup_affinity,
+            'duration': campaign.duration,
             'reputation_boost': reputation_boost,
             'new_reputation': festival.reputation,
             'remaining_budget': festival.budget
         }
     
+    def apply_campaign_effects(self, festival_ids=None):
+        """Deliver one day of every active campaign's effect, for many festivals (all if None).
+        
+        Each campaign adds an equal share of its reputation_boost to its
+        adstock on every day of its duration; each day the festival gains
+        (1 - decay) of the adstock and the rest carries over, so the total
+        delivered converges on reputation_boost. Reputation is a whole
+        number, so applied_boost keeps the exact running total and the
+        festival gains the whole points it has crossed. All campaigns are
+        updated as arrays and written back with two bulk UPDATEs in the
+        caller's transaction (not committed). Returns the reputation gained
+        per festival.
+        """
+        query = db.session.query(
+            Campaign.id, Campaign.festival_id, Campaign.start_day, Campaign.duration,
+            Campaign.reputation_boost, Campaign.decay, Campaign.adstock, Campaign.applied_boost,
+            Festival.days_remaining, Festival.reputation
+        ).join(Festival, Campaign.festival_id == Festival.id).filter(Campaign.status == 'active')
+        if festival_ids is not None:
+            query = query.filter(Campaign.festival_id.in_(festival_ids))
+        rows = query.all()
+        if not rows:
+            return {}
+        
+        (campaign_ids, campaign_festivals, start_day, duration, boost, decay,
+         adstock, applied, days_remaining, reputation) = (np.array(column) for column in zip(*rows))
+        duration = duration.astype(float)
+        adstock = adstock.astype(float)
+        decay = decay.astype(float)
+        
+        # Day 1 is the first tick after launch
+        day = start_day - days_remaining
+        spending = (day >= 1) & (day <= duration)
+        adstock = adstock + np.where(spending, boost / np.maximum(duration, 1), 0.0)
+        effect = (1 - decay) * adstock
+        adstock = adstock - effect
+        previous = applied.astype(float)
+        applied = previous + effect
+        finished = (day > duration) & (adstock < self.adstock_floor)
+        
+        # Whole points delivered so far, rounded so a campaign's total matches its boost
+        whole_points = np.floor(applied + 0.5) - np.floor(previous + 0.5)
+        
+        festivals, first_rows, festival_index = np.unique(campaign_festivals, return_index=True, return_inverse=True)
+        gains = np.bincount(festival_index, weights=whole_points, minlength=len(festivals)).astype(int)
+        new_reputation = np.clip(np.rint(reputation[first_rows].astype(float)).astype(int) + gains, 0, 100)
+        
+        db.session.execute(update(Campaign), [
+            {'id': int(campaign_id), 'adstock': float(stock), 'applied_boost': float(total),
+             'status': 'completed' if done else 'active'}
+            for campaign_id, stock, total, done in zip(campaign_ids, adstock, applied, finished)
+        ])
+        db.session.execute(update(Festival), [
+            {'id': int(festival_id), 'reputation': int(value)}
+            for festival_id, value in zip(festivals, new_reputation)
+        ])
+        
+        # Bulk UPDATEs bypass objects already loaded in the session; expire them so
+        # they reload from this transaction rather than overwrite it on the next flush
+        updated_festivals = set(festivals.tolist())
+        for instance in list(db.session.identity_map.values()):
+            if isinstance(instance, Campaign) or (isinstance(instance, Festival) and instance.id in updated_festivals):
+                db.session.expire(instance)
+        
+        return {int(festival_id): int(gain) for festival_id, gain in zip(festivals, gains)}
+    
+    def optimize_budget(self, festival, budget, objective='reach'):
+        """Split a marketing budget across every channel x audience combination.
+        
+        Each combination's value uses the expected (non-random) effectiveness
+        and the reach formula for its initial slope, saturating towards the
+        audience size: value(b) = S * (1 - exp(-a * b / S)). The objective is
+        reach, or reputation (reputation_boost per base-cost's worth of
+        saturated reach). The value curves are concave, so the optimum sets
+        equal marginal returns across funded combinations; that level is
+        found by bisection, and combinations that cannot reach their
+        channel's minimum spend are dropped and the split re-solved.
+        """
+        channels = list(self.campaign_types)
+        audiences = list(self.target_audiences)
+        channel_data = [self.campaign_types[channel] for channel in channels]
+        
+        base_cost = np.array([data['base_cost'] for data in channel_data], dtype=float)[:, None]
+        base_effectiveness = np.array([data['effectiveness'] for data in channel_data])[:, None]
+        channel_reach = np.array([data['reach_multiplier'] for data in channel_data])[:, None]
+        audience_reach = np.array([self.target_audiences[audience]['reach_multiplier'] for audience in audiences])[None, :]
+        preferred = np.array([
+            [channel in self.target_audiences[audience]['preferred_channels'] for audience in audiences]
+            for channel in channels
+        ])
+        saturation = np.broadcast_to(
+            np.array([self.audience_sizes[audience] for audience in audiences], dtype=float)[None, :], preferred.shape
+        )
+        
+        # The single-campaign formulas over the whole grid, with the random factor at its mean
+        lineup_affinity = self.lineup_affinity(festival.id)[None, :]
+        effectiveness = self._effectiveness(base_effectiveness, preferred, festival.reputation, lineup_affinity)
+        reach_per_dollar = self._reach_per_dollar(base_cost, channel_reach, audience_reach, effectiveness, lineup_affinity)
+        
+        # Reputation of a base-cost campaign, spread over the people it reaches
+        boost = np.array([data['reputation_boost'] for data in channel_data], dtype=float)[:, None]
+        reputation_per_person = self._reputation_boost(boost, effectiveness, festival.reputation) / (reach_per_dollar * base_cost)
+        
+        if objective not in self.optimizer_objectives:
+            return {'success': False, 'error': 'Objective must be reach or reputation'}
+        if objective == 'reputation':
+            value_per_person = reputation_per_person
+        else:
+            value_per_person = np.ones(preferred.shape)
+        
+        slope = (reach_per_dollar * value_per_person).ravel()  # Marginal value of the first dollar
+        spread = (saturation / reach_per_dollar).ravel()  # Dollars per e-fold of saturation
+        minimum = np.broadcast_to(base_cost, preferred.shape).ravel()
+        
+        def allocate(level, active):
+            # Spend where the marginal value slope * exp(-b / spread) equals level
+            return np.where(active & (slope > level), spread * np.log(np.maximum(slope, 1e-12) / level), 0.0)
+        
+        active = minimum <= budget
+        allocation = np.zeros(len(slope))
+        while active.any():
+            low, high = 1e-12, slope[active].max()
+            for _ in range(100):
+                level = np.sqrt(low * high)
+                if allocate(level, active).sum() > budget:
+                    low = level
+                else:
+                    high = level
+            allocation = allocate(high, active)
+            
+            # Drop the weakest combination funded below its minimum spend and re-solve
+            short = active & (allocation > 0) & (allocation < minimum)
+            if not short.any():
+                break
+            weakest = np.flatnonzero(short)[np.argmin(slope[short])]
+            active[weakest] = False
+        
+        reach = (saturation.ravel() * (1 - np.exp(-allocation / spread)))
+        value = reach * value_per_person.ravel()
+        funded = np.flatnonzero(allocation > 0)
+        funded = funded[np.argsort(-allocation[funded])]
+        
+        return {
+            'success': True,
+            'objective': objective,
+            'budget': budget,
+            'allocated': float(allocation.sum()),
+            'expected_reach': int(reach.sum()),
+            'expected_reputation': float((reach * reputation_per_person.ravel()).sum()),
+            'allocation': [
+                {
+                    'campaign_type': channels[i // len(audiences)],
+                    'target_audience': audiences[i % len(audiences)],
+                    'budget': round(float(allocation[i]), 2),
+                    'expected_reach': int(reach[i]),
+                    'expected_value': float(value[i]),
+                    'effectiveness': float(effectiveness.ravel()[i]),
+                    'marginal_value_per_dollar': float(slope[i] * np.exp(-allocation[i] / spread[i]))
+                }
+                for i in funded
+            ]
+        }
+    
     def get_marketing_analytics(self, festival):
         """Get comprehensive marketing analytics for a festival"""
         # Calculate marketing efficiency
@@ -303,8 +672,9 @@ class MarketingSystem:
     
     def calculate_social_media_impact(self, festival):
         """Calculate social media impact and sentiment"""
-        # Simulate social media metrics
-        followers = festival.reputation * 100
+        # Use the recorded audience once ticks have started, otherwise estimate it
+        latest = SocialMetric.query.filter_by(festival_id=festival.id).order_by(SocialMetric.day.desc()).first()
+        followers = latest.followers if latest else festival.reputation * 100
         engagement_rate = min(0.1, festival.reputation / 1000)
         sentiment_score = (festival.reputation - 50) / 50  # -1 to 1 scale
         
@@ -321,6 +691,86 @@ class MarketingSystem:
             'trending_topics': self.generate_trending_topics(festival)
         }
     
+    def record_social_metrics(self, festival, impressions=0, new_tickets=0):
+        """Add today's social media metrics to the festival's time series (not committed)"""
+        previous = SocialMetric.query.filter_by(festival_id=festival.id).order_by(SocialMetric.day.desc()).first()
+        dynamics = self.social_dynamics
+        sentiment = (festival.reputation - 50) / 50
+        followers = previous.followers if previous else festival.reputation * 100
+        
+        gained = impressions * dynamics['follow_rate'] * festival.reputation / 50
+        gained += followers * dynamics['organic_growth'] * sentiment
+        new_followers = int(round((gained - followers * dynamics['churn_rate']) * random.uniform(0.9, 1.1)))
+        new_followers = max(new_followers, -followers)
+        followers += new_followers
+        
+        engagements = followers * min(0.1, festival.reputation / 1000)
+        engagements += impressions * dynamics['impression_engagement'] + new_tickets * dynamics['ticket_engagement']
+        engagements = int(engagements * random.uniform(0.9, 1.1))
+        
+        metric = SocialMetric(
+            festival_id=festival.id,
+            day=previous.day + 1 if previous else 1,
+            days_remaining=festival.days_remaining,
+            followers=followers,
+            new_followers=new_followers,
+            impressions=impressions,
+            engagements=engagements,
+            sentiment=sentiment,
+            total_impressions=(previous.total_impressions if previous else 0) + impressions,
+            total_engagements=(previous.total_engagements if previous else 0) + engagements,
+            total_sentiment=(previous.total_sentiment if previous else 0.0) + sentiment
+        )
+        db.session.add(metric)
+        return metric
+    
+    def get_social_trend(self, festival_id, window=7, days=30):
+        """Rolling social media aggregates over the last days recorded ticks.
+        
+        Each point covers the window days ending on its day. Sums come from
+        the difference of two running totals, so only the days + window
+        most recent rows are read whatever the length of the history.
+        """
+        latest = db.session.query(func.max(SocialMetric.day)).filter(SocialMetric.festival_id == festival_id).scalar()
+        if not latest:
+            return {'window': window, 'latest': None, 'series': []}
+        
+        first_day = max(latest - days + 1, 1)
+        rows = db.session.query(
+            SocialMetric.day, SocialMetric.followers, SocialMetric.new_followers,
+            SocialMetric.total_impressions, SocialMetric.total_engagements, SocialMetric.total_sentiment
+        ).filter(
+            SocialMetric.festival_id == festival_id, SocialMetric.day >= max(first_day - window, 1)
+        ).order_by(SocialMetric.day).all()
+        day, followers, new_followers, impressions, engagements, sentiment = (np.array(column) for column in zip(*rows))
+        
+        # Running totals before day 1 are zero and followers are day 1's starting count
+        if day[0] == 1:
+            day = np.concatenate(([0], day))
+            followers = np.concatenate(([followers[0] - new_followers[0]], followers))
+            impressions, engagements, sentiment = (np.concatenate(([0], column)) for column in (impressions, engagements, sentiment))
+        
+        end = np.arange(first_day, latest + 1) - day[0]
+        start = np.maximum(end - window, 0)
+        span = end - start
+        
+        follower_growth = followers[end] - followers[start]
+        window_engagements = engagements[end] - engagements[start]
+        series = [
+            {
+                'day': int(day[e]),
+                'followers': int(followers[e]),
+                'follower_growth': int(follower_growth[i]),
+                'growth_rate': float(follower_growth[i] / max(followers[start[i]], 1)),
+                'impressions': int(impressions[e] - impressions[start[i]]),
+                'engagements': int(window_engagements[i]),
+                'engagement_rate': float(window_engagements[i] / (span[i] * max(followers[e], 1))),
+                'average_sentiment': float((sentiment[e] - sentiment[start[i]]) / span[i])
+            }
+            for i, e in enumerate(end)
+        ]
+        return {'window': window, 'latest': series[-1], 'series': series}
+    
     def generate_trending_topics(self, festival):
         """Generate trending topics related to the festival"""
         topics = []
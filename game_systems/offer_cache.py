@@ -0,0 +1,101 @@
+"""
+Offer Cache - Per-festival candidate offers with TTL expiry, LRU eviction and hit/miss metrics
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class OfferCache:
+    """Keeps each festival's market offers for a while so players see a stable set of candidates"""
+
+    def __init__(self, ttl=900, max_entries=256, clock=time.monotonic):
+        # Seconds before a festival's offers are regenerated
+        self.ttl = ttl
+
+        # Festivals kept at once; least recently used are dropped first
+        self.max_entries = max_entries
+
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, offers)
+        self._key_locks = {}  # key -> [lock, holders]; kept only while the key has an entry or a holder
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @contextmanager
+    def lock(self, key):
+        """Hold a key's lock while its offers are built or changed, so concurrent misses build them once"""
+        with self._lock:
+            holder = self._key_locks.get(key)
+            if holder is None:
+                holder = self._key_locks[key] = [threading.RLock(), 0]
+            holder[1] += 1
+        try:
+            with holder[0]:
+                yield
+        finally:
+            with self._lock:
+                holder[1] -= 1
+                self._drop_lock(key)
+
+    def _drop_lock(self, key):
+        """Forget a key's lock once nobody holds it and it has no entry; call with self._lock held"""
+        holder = self._key_locks.get(key)
+        if holder is not None and not holder[1] and key not in self._entries:
+            del self._key_locks[key]
+
+    def get(self, key, loader):
+        """Offers for key, calling loader() to build them if missing or expired"""
+        with self.lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= self._clock():
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+
+            offers = loader()
+            with self._lock:
+                self._entries[key] = (self._clock() + self.ttl, offers)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._drop_lock(evicted)
+                    self.evictions += 1
+            return offers
+
+    def invalidate(self, key):
+        """Drop one festival's offers so the next request builds new ones"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._drop_lock(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for key in list(self._key_locks):
+                self._drop_lock(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'locks': len(self._key_locks),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
@@ -0,0 +1,24 @@
+"""
+Offload - Runs CPU-heavy computations in a native thread when an event loop serves the app
+"""
+import sys
+
+
+def run_cpu_bound(func, *args, **kwargs):
+    """Call func(*args, **kwargs) and return its result without stalling the event loop.
+
+    Under eventlet or gevent monkey patching every request and websocket
+    shares one loop, so a long computation would freeze them all; it is
+    handed to the loop's native thread pool instead and the calling
+    greenlet waits for the result. Otherwise func is simply called. func
+    must not touch the database session or other per-request state.
+    """
+    if 'eventlet' in sys.modules:
+        from eventlet import patcher, tpool
+        if patcher.is_monkey_patched('thread'):
+            return tpool.execute(func, *args, **kwargs)
+    if 'gevent' in sys.modules:
+        from gevent import get_hub, monkey
+        if monkey.is_module_patched('threading'):
+            return get_hub().threadpool.apply(func, args, kwargs)
+    return func(*args, **kwargs)
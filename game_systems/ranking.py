@@ -0,0 +1,35 @@
+"""
+Ranking - Shared scoring used to recommend artists and vendors for hire
+"""
+import numpy as np
+from .catalog import freeze
+
+# How a candidate's total value and its value per $1,000 of cost are blended
+RECOMMENDATION_WEIGHTS = freeze({'value': 0.6, 'efficiency': 0.4})
+
+
+def rank_by_value(value, costs, budget, top_k, weights=RECOMMENDATION_WEIGHTS):
+    """Score candidates and pick the top_k affordable ones, best first.
+
+    value and costs are arrays aligned with the candidates. Each score
+    blends value and value per $1,000 of cost, both scaled to [-1, 1];
+    candidates costing more than budget are never picked. Returns
+    (top indices, scores, value per $1,000).
+    """
+    value = np.asarray(value, dtype=float)
+    costs = np.asarray(costs, dtype=float)
+    efficiency = value / np.maximum(costs, 1) * 1000
+
+    scores = weights['value'] * _normalized(value) + weights['efficiency'] * _normalized(efficiency)
+    scores = np.where(costs <= budget, scores, -np.inf)
+
+    top_k = min(top_k, int(np.isfinite(scores).sum()))
+    if top_k <= 0:
+        return np.array([], dtype=int), scores, efficiency
+    top = np.argpartition(-scores, top_k - 1)[:top_k]
+    return top[np.argsort(-scores[top])], scores, efficiency
+
+
+def _normalized(values):
+    scale = np.abs(values).max() if len(values) else 0
+    return values / scale if scale > 0 else values
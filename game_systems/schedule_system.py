@@ -0,0 +1,282 @@
+"""
+Schedule System - Handles multi-stage, multi-day festival timetables
+"""
+import json
+import threading
+from models import db, Festival, Artist, Stage, PerformanceSet
+from .interval_tree import IntervalTree
+
+
+class FestivalTimeline:
+    """In-memory interval index of one festival's timetable.
+
+    ``stage_trees`` holds one tree per stage so changeover clashes are a single
+    stage query, and ``festival_tree`` holds every set so artist double-bookings
+    and conflicting artists are a single query across all stages.
+    """
+
+    def __init__(self):
+        self.stage_trees = {}
+        self.festival_tree = IntervalTree()
+        self.sets = {}  # set_id -> (artist_id, stage_id, start, end)
+        self.artist_conflicts = {}  # artist_id -> frozenset of conflicting artist ids
+
+    def add(self, set_id, artist_id, stage_id, start, end):
+        self.stage_trees.setdefault(stage_id, IntervalTree()).insert(start, end, set_id)
+        self.festival_tree.insert(start, end, set_id)
+        self.sets[set_id] = (artist_id, stage_id, start, end)
+
+    def discard(self, set_id):
+        entry = self.sets.pop(set_id, None)
+        if entry is None:
+            return
+        _, stage_id, start, _ = entry
+        self.stage_trees[stage_id].remove(start, set_id)
+        self.festival_tree.remove(start, set_id)
+
+
+class ScheduleSystem:
+    """Handles stages, timetabled sets and clash detection"""
+
+    def __init__(self):
+        # Stages every new festival starts with
+        self.default_stages = [
+            {'name': 'Main Stage', 'capacity': 15000, 'changeover_minutes': 30},
+            {'name': 'Second Stage', 'capacity': 6000, 'changeover_minutes': 20},
+            {'name': 'Tent Stage', 'capacity': 2000, 'changeover_minutes': 15}
+        ]
+
+        # Scheduling limits
+        self.max_festival_days = 7
+        self.max_set_duration = 360  # minutes
+
+        # Lazily built per-festival interval indexes
+        self._timelines = {}
+        self._timelines_lock = threading.RLock()
+
+    def get_timeline(self, festival_id):
+        """Get the interval index for a festival, building it from the database on first use"""
+        with self._timelines_lock:
+            timeline = self._timelines.get(festival_id)
+            if timeline is None:
+                timeline = FestivalTimeline()
+                for performance_set in PerformanceSet.query.filter_by(festival_id=festival_id).all():
+                    timeline.add(performance_set.id, performance_set.artist_id, performance_set.stage_id,
+                                 performance_set.absolute_start, performance_set.absolute_end)
+                self._timelines[festival_id] = timeline
+            return timeline
+
+    def invalidate(self, festival_id):
+        """Drop the cached interval index so it is rebuilt on next use"""
+        with self._timelines_lock:
+            self._timelines.pop(festival_id, None)
+
+    def build_default_stages(self):
+        """New, unsaved default stages for a festival being created"""
+        return [Stage(**stage_data) for stage_data in self.default_stages]
+
+    def get_stages(self, festival_id):
+        """Get the festival's stages"""
+        return Stage.query.filter_by(festival_id=festival_id).order_by(Stage.id).all()
+
+    def create_stage(self, festival_id, name, capacity=5000, changeover_minutes=15):
+        """Add a stage to the festival"""
+        if not name:
+            return {'success': False, 'error': 'Stage name required'}
+        if changeover_minutes < 0:
+            return {'success': False, 'error': 'Changeover time cannot be negative'}
+
+        stage = Stage(
+            festival_id=festival_id,
+            name=name,
+            capacity=capacity,
+            changeover_minutes=changeover_minutes
+        )
+        db.session.add(stage)
+        Festival.touch([festival_id])
+        db.session.commit()
+
+        return {'success': True, 'stage': stage.to_dict()}
+
+    def get_timetable(self, festival_id, day=None):
+        """Get the festival timetable, optionally limited to a single day"""
+        stages = self.get_stages(festival_id)
+        query = PerformanceSet.query.filter_by(festival_id=festival_id)
+        if day is not None:
+            query = query.filter_by(day=day)
+        performance_sets = query.order_by(PerformanceSet.day, PerformanceSet.start_minute).all()
+
+        artist_names = dict(
+            db.session.query(Artist.id, Artist.name).filter_by(festival_id=festival_id).all()
+        )
+
+        sets_by_stage = {stage.id: [] for stage in stages}
+        for performance_set in performance_sets:
+            set_data = performance_set.to_dict()
+            set_data['artist_name'] = artist_names.get(performance_set.artist_id)
+            sets_by_stage.setdefault(performance_set.stage_id, []).append(set_data)
+
+        return {
+            'stages': [
+                dict(stage.to_dict(), sets=sets_by_stage.get(stage.id, []))
+                for stage in stages
+            ],
+            'set_count': len(performance_sets)
+        }
+
+    def find_clashes(self, festival_id, artist_id, stage, start, end, ignore_set_id=None):
+        """Find every clash a set would cause, using the festival's interval index"""
+        timeline = self.get_timeline(festival_id)
+        clashes = []
+
+        # Stage clashes - other sets on this stage, including the changeover gap
+        changeover = stage.changeover_minutes or 0
+        stage_tree = timeline.stage_trees.get(stage.id)
+        if stage_tree:
+            for _, _, set_id in stage_tree.overlapping(start - changeover, end + changeover):
+                if set_id != ignore_set_id:
+                    clashes.append({
+                        'type': 'stage',
+                        'set_id': set_id,
+                        'artist_id': timeline.sets[set_id][0],
+                        'description': f'{stage.name} needs {changeover} minutes between sets'
+                    })
+
+        # Artist and conflict clashes - anything playing at the same time on any stage
+        conflicts = self._get_artist_conflicts(timeline, artist_id)
+        for _, _, set_id in timeline.festival_tree.overlapping(start, end):
+            if set_id == ignore_set_id:
+                continue
+            other_artist_id = timeline.sets[set_id][0]
+            if other_artist_id == artist_id:
+                clashes.append({
+                    'type': 'artist',
+                    'set_id': set_id,
+                    'artist_id': other_artist_id,
+                    'description': 'Artist is already performing at this time'
+                })
+            elif (other_artist_id in conflicts
+                  or artist_id in self._get_artist_conflicts(timeline, other_artist_id)):
+                clashes.append({
+                    'type': 'conflict',
+                    'set_id': set_id,
+                    'artist_id': other_artist_id,
+                    'description': 'These artists refuse to perform at the same time'
+                })
+
+        return clashes
+
+    def schedule_set(self, festival_id, artist_id, stage_id, day, start_minute, duration=None):
+        """Add a set to the timetable if it does not clash"""
+        artist = Artist.query.filter_by(festival_id=festival_id, id=artist_id).first()
+        if not artist:
+            return {'success': False, 'error': 'Artist not found'}
+
+        stage = Stage.query.filter_by(festival_id=festival_id, id=stage_id).first()
+        if not stage:
+            return {'success': False, 'error': 'Stage not found'}
+
+        if duration is None:
+            duration = artist.performance_duration or 60
+
+        error = self._validate_timing(day, start_minute, duration)
+        if error:
+            return {'success': False, 'error': error}
+
+        # Check, save and index under one lock so two requests cannot book the same slot
+        with self._timelines_lock:
+            start = (day - 1) * PerformanceSet.MINUTES_PER_DAY + start_minute
+            clashes = self.find_clashes(festival_id, artist_id, stage, start, start + duration)
+            if clashes:
+                return {'success': False, 'error': 'Schedule clash', 'clashes': clashes}
+
+            performance_set = PerformanceSet(
+                festival_id=festival_id,
+                artist_id=artist_id,
+                stage_id=stage_id,
+                day=day,
+                start_minute=start_minute,
+                duration=duration
+            )
+            db.session.add(performance_set)
+            Festival.touch([festival_id])
+            db.session.commit()
+
+            self.get_timeline(festival_id).add(performance_set.id, artist_id, stage_id,
+                                               performance_set.absolute_start, performance_set.absolute_end)
+
+        return {'success': True, 'set': performance_set.to_dict(), 'artist_name': artist.name}
+
+    def move_set(self, festival_id, set_id, stage_id=None, day=None, start_minute=None, duration=None):
+        """Move an existing set to a new stage, day or start time"""
+        performance_set = PerformanceSet.query.filter_by(festival_id=festival_id, id=set_id).first()
+        if not performance_set:
+            return {'success': False, 'error': 'Set not found'}
+
+        stage_id = performance_set.stage_id if stage_id is None else stage_id
+        day = performance_set.day if day is None else day
+        start_minute = performance_set.start_minute if start_minute is None else start_minute
+        duration = performance_set.duration if duration is None else duration
+
+        stage = Stage.query.filter_by(festival_id=festival_id, id=stage_id).first()
+        if not stage:
+            return {'success': False, 'error': 'Stage not found'}
+
+        error = self._validate_timing(day, start_minute, duration)
+        if error:
+            return {'success': False, 'error': error}
+
+        with self._timelines_lock:
+            start = (day - 1) * PerformanceSet.MINUTES_PER_DAY + start_minute
+            clashes = self.find_clashes(festival_id, performance_set.artist_id, stage, start, start + duration,
+                                        ignore_set_id=set_id)
+            if clashes:
+                return {'success': False, 'error': 'Schedule clash', 'clashes': clashes}
+
+            performance_set.stage_id = stage_id
+            performance_set.day = day
+            performance_set.start_minute = start_minute
+            performance_set.duration = duration
+            Festival.touch([festival_id])
+            db.session.commit()
+
+            timeline = self.get_timeline(festival_id)
+            timeline.discard(set_id)
+            timeline.add(set_id, performance_set.artist_id, stage_id,
+                         performance_set.absolute_start, performance_set.absolute_end)
+
+        return {'success': True, 'set': performance_set.to_dict()}
+
+    def remove_set(self, festival_id, set_id):
+        """Remove a set from the timetable"""
+        performance_set = PerformanceSet.query.filter_by(festival_id=festival_id, id=set_id).first()
+        if not performance_set:
+            return {'success': False, 'error': 'Set not found'}
+
+        with self._timelines_lock:
+            db.session.delete(performance_set)
+            Festival.touch([festival_id])
+            db.session.commit()
+
+            self.get_timeline(festival_id).discard(set_id)
+
+        return {'success': True, 'set_id': set_id}
+
+    def _validate_timing(self, day, start_minute, duration):
+        """Return an error message if the requested timing is invalid"""
+        if not 1 <= day <= self.max_festival_days:
+            return f'Day must be between 1 and {self.max_festival_days}'
+        if not 0 <= start_minute < PerformanceSet.MINUTES_PER_DAY:
+            return 'Start time must be within the day'
+        if not 0 < duration <= self.max_set_duration:
+            return f'Duration must be between 1 and {self.max_set_duration} minutes'
+        return None
+
+    def _get_artist_conflicts(self, timeline, artist_id):
+        """Get the set of artist ids an artist refuses to play alongside"""
+        conflicts = timeline.artist_conflicts.get(artist_id)
+        if conflicts is None:
+            raw = db.session.query(Artist.conflicts_with).filter_by(id=artist_id).scalar()
+            conflicts = frozenset(json.loads(raw)) if raw else frozenset()
+            timeline.artist_conflicts[artist_id] = conflicts
+        return conflicts
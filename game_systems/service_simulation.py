@@ -0,0 +1,186 @@
+"""
+Service Simulation - Discrete-event simulation of attendee queues at vendors
+"""
+import heapq
+from collections import deque
+import numpy as np
+
+ARRIVAL = 0
+DEPARTURE = 1
+
+
+class VendorQueueSimulator:
+    """Simulates attendees arriving, choosing vendors and queuing during festival hours"""
+
+    def __init__(self):
+        # Festival opening hours in minutes after midnight
+        self.opening_minute = 12 * 60
+        self.closing_minute = 24 * 60
+
+        # Mean minutes to serve one order for each food category prep time
+        self.prep_minutes = {
+            'instant': 0.75,
+            'fast': 2.0,
+            'medium': 4.0
+        }
+
+        # Serving points per specialty; anything else gets the default
+        self.service_points = {
+            'Food Court': 4,
+            'Restaurant Tent': 3,
+            'Beverage Stand': 3,
+            'Cocktail Bar': 3
+        }
+        self.default_service_points = 2
+
+        # Attendee behaviour
+        self.visits_per_attendee = 2.0  # Mean purchase trips per attendee
+        self.vendors_considered = 3  # Options an attendee compares before queuing
+        self.mean_patience = 15.0  # Mean minutes an attendee is willing to wait
+
+        # Share of trips in the lunch and dinner rushes (rest spread evenly)
+        self.rush_periods = [
+            {'center': 13 * 60, 'spread': 45, 'share': 0.25},
+            {'center': 19 * 60, 'spread': 60, 'share': 0.35}
+        ]
+
+    def service_minutes(self, category_counts, quality, food_categories):
+        """Mean minutes per order from a vendor's menu mix; better vendors work faster"""
+        total_items = sum(category_counts.values())
+        if not total_items:
+            return self.prep_minutes['medium']
+
+        minutes = sum(
+            self.prep_minutes[food_categories.get(category, {}).get('prep_time', 'medium')] * count
+            for category, count in category_counts.items()
+        ) / total_items
+        return minutes * (1.25 - quality / 200)
+
+    def simulate(self, vendors, attendance, seed=None):
+        """Run one festival day.
+
+        vendors is a list of dicts with id, name, specialty, quality, mean
+        service minutes (``service_minutes``) and average order value
+        (``average_price``). Returns totals and per-vendor statistics for
+        wait times, lost sales and throughput.
+        """
+        if not vendors or attendance <= 0:
+            return {'attendance': attendance, 'orders': 0, 'served': 0, 'lost': 0, 'vendors': []}
+
+        rng = np.random.default_rng(seed)
+        vendor_count = len(vendors)
+        servers = [self.service_points.get(vendor['specialty'], self.default_service_points) for vendor in vendors]
+        service_means = [vendor['service_minutes'] for vendor in vendors]
+        prices = [vendor['average_price'] for vendor in vendors]
+
+        # Attendees favour better vendors when drawing the options they compare
+        quality = np.array([vendor['quality'] for vendor in vendors], dtype=float)
+        attraction = np.exp((quality - 50) / 20)
+        attraction /= attraction.sum()
+
+        # Pre-draw every random quantity in bulk
+        trips = int(rng.poisson(self.visits_per_attendee * attendance))
+        arrival_times = np.sort(self._draw_arrival_times(rng, trips))
+        options = rng.choice(vendor_count, size=(trips, min(self.vendors_considered, vendor_count)), p=attraction)
+        patience = rng.exponential(self.mean_patience, trips)
+        service_draws = rng.exponential(1.0, trips)
+
+        busy = [0] * vendor_count
+        queues = [deque() for _ in range(vendor_count)]
+        served = [0] * vendor_count
+        lost = [0] * vendor_count
+        total_wait = [0.0] * vendor_count
+        max_queue = [0] * vendor_count
+        busy_minutes = [0.0] * vendor_count
+        waits = []
+
+        events = [(float(arrival_times[trip]), ARRIVAL, trip, -1) for trip in range(trips)]
+        heapq.heapify(events)
+
+        while events:
+            now, kind, trip, vendor = heapq.heappop(events)
+
+            if kind == ARRIVAL:
+                # Pick the option with the shortest expected wait, ties to higher quality
+                best_vendor, best_wait = -1, None
+                for option in options[trip]:
+                    option = int(option)
+                    expected_wait = 0.0
+                    if busy[option] >= servers[option]:
+                        expected_wait = (len(queues[option]) + 1) * service_means[option] / servers[option]
+                    if best_wait is None or expected_wait < best_wait or (
+                            expected_wait == best_wait and quality[option] > quality[best_vendor]):
+                        best_vendor, best_wait = option, expected_wait
+
+                if best_wait > patience[trip]:
+                    lost[best_vendor] += 1
+                    continue
+
+                if busy[best_vendor] < servers[best_vendor]:
+                    busy[best_vendor] += 1
+                    duration = service_draws[trip] * service_means[best_vendor]
+                    busy_minutes[best_vendor] += duration
+                    waits.append(0.0)
+                    heapq.heappush(events, (now + duration, DEPARTURE, trip, best_vendor))
+                else:
+                    queue = queues[best_vendor]
+                    queue.append((now, trip))
+                    if len(queue) > max_queue[best_vendor]:
+                        max_queue[best_vendor] = len(queue)
+            else:
+                served[vendor] += 1
+                queue = queues[vendor]
+                if queue:
+                    arrived, next_trip = queue.popleft()
+                    wait = now - arrived
+                    total_wait[vendor] += wait
+                    waits.append(wait)
+                    duration = service_draws[next_trip] * service_means[vendor]
+                    busy_minutes[vendor] += duration
+                    heapq.heappush(events, (now + duration, DEPARTURE, next_trip, vendor))
+                else:
+                    busy[vendor] -= 1
+
+        hours = (self.closing_minute - self.opening_minute) / 60
+        wait_array = np.array(waits) if waits else np.zeros(1)
+        total_served = sum(served)
+        total_lost = sum(lost)
+
+        return {
+            'attendance': attendance,
+            'orders': trips,
+            'served': total_served,
+            'lost': total_lost,
+            'lost_share': total_lost / trips if trips else 0,
+            'lost_sales': sum(lost[i] * prices[i] for i in range(vendor_count)),
+            'average_wait': float(wait_array.mean()),
+            'p95_wait': float(np.percentile(wait_array, 95)),
+            'vendors': [
+                {
+                    'vendor_id': vendors[i]['id'],
+                    'name': vendors[i]['name'],
+                    'specialty': vendors[i]['specialty'],
+                    'service_points': servers[i],
+                    'served': served[i],
+                    'lost': lost[i],
+                    'throughput_per_hour': served[i] / hours,
+                    'average_wait': total_wait[i] / served[i] if served[i] else 0.0,
+                    'max_queue': max_queue[i],
+                    'utilization': busy_minutes[i] / (servers[i] * (self.closing_minute - self.opening_minute)),
+                    'sales': served[i] * prices[i],
+                    'lost_sales': lost[i] * prices[i]
+                }
+                for i in range(vendor_count)
+            ]
+        }
+
+    def _draw_arrival_times(self, rng, trips):
+        """Draw trip times across opening hours, with lunch and dinner rushes"""
+        times = rng.uniform(self.opening_minute, self.closing_minute, trips)
+        rush_choice = rng.random(trips)
+        threshold = 0.0
+        for rush in self.rush_periods:
+            in_rush = (rush_choice >= threshold) & (rush_choice < threshold + rush['share'])
+            times[in_rush] = rng.normal(rush['center'], rush['spread'], int(in_rush.sum()))
+            threshold += rush['share']
+        return np.clip(times, self.opening_minute, self.closing_minute - 1)
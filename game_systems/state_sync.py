@@ -0,0 +1,120 @@
+"""
+State Sync - Keeps the last festival payload sent to each room and diffs new ones into JSON patches
+"""
+import json
+import threading
+
+
+class FestivalStateSync:
+    """Holds one snapshot per watched festival and turns payload changes into RFC 6902 patches.
+
+    Snapshots and room members live in this process, so a change made in
+    one worker is only pushed to the clients connected to that worker: live
+    push needs the app to run as a single worker.
+    """
+
+    def __init__(self):
+        self._snapshots = {}  # festival_id -> (version, payload)
+        self._members = {}  # festival_id -> ids of the clients in its room
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def room(festival_id):
+        """Socket.IO room for a festival's dashboards"""
+        return f'festival_{festival_id}'
+
+    def join(self, festival_id, client_id):
+        """Record a client in a festival's room"""
+        with self._lock:
+            self._members.setdefault(festival_id, set()).add(client_id)
+
+    def leave(self, festival_id, client_id):
+        """Take a client out of a festival's room, dropping the snapshot once the room is empty"""
+        with self._lock:
+            members = self._members.get(festival_id)
+            if members is None:
+                return
+            members.discard(client_id)
+            if not members:
+                del self._members[festival_id]
+                self._snapshots.pop(festival_id, None)
+
+    def disconnect(self, client_id):
+        """Take a client out of every room it joined"""
+        with self._lock:
+            festival_ids = [festival_id for festival_id, members in self._members.items() if client_id in members]
+        for festival_id in festival_ids:
+            self.leave(festival_id, client_id)
+
+    def watch(self, festival_id, version, payload):
+        """Start tracking a festival from a freshly built payload; ignored while its room is empty"""
+        with self._lock:
+            if festival_id in self._members:
+                self._snapshots[festival_id] = (version, payload)
+
+    def unwatch(self, festival_id):
+        with self._lock:
+            self._snapshots.pop(festival_id, None)
+
+    def snapshot(self, festival_id):
+        """(version, payload) last sent for a festival, or None if nobody is watching"""
+        with self._lock:
+            return self._snapshots.get(festival_id)
+
+    def update(self, festival_id, version, payload):
+        """Replace a watched festival's snapshot and return (previous version, patch), or None if unwatched"""
+        with self._lock:
+            previous = self._snapshots.get(festival_id)
+            if previous is None:
+                return None
+            self._snapshots[festival_id] = (version, payload)
+        return previous[0], self.diff(previous[1], payload)
+
+    @classmethod
+    def diff(cls, old, new, path=''):
+        """JSON patch operations turning old into new.
+
+        Objects are compared key by key and lists of equal length item by
+        item; anything else that differs is replaced whole, as is any
+        subtree whose changes would take more bytes than its new value.
+        Lists that only grew get their new items appended.
+        """
+        operations = cls._diff_children(old, new, path)
+        if operations is None:
+            return [] if old == new and type(old) is type(new) else [{'op': 'replace', 'path': path, 'value': new}]
+
+        if len(operations) > 1:
+            replacement = [{'op': 'replace', 'path': path, 'value': new}]
+            if len(json.dumps(replacement)) < len(json.dumps(operations)):
+                return replacement
+        return operations
+
+    @classmethod
+    def _diff_children(cls, old, new, path):
+        """Operations for matching containers, or None if old and new must be compared whole"""
+        if isinstance(old, dict) and isinstance(new, dict):
+            operations = []
+            for key in old:
+                if key not in new:
+                    operations.append({'op': 'remove', 'path': f'{path}/{cls._escape(key)}'})
+            for key, value in new.items():
+                child = f'{path}/{cls._escape(key)}'
+                if key not in old:
+                    operations.append({'op': 'add', 'path': child, 'value': value})
+                else:
+                    operations.extend(cls.diff(old[key], value, child))
+            return operations
+
+        if isinstance(old, list) and isinstance(new, list):
+            if len(old) == len(new):
+                operations = []
+                for i, (old_item, new_item) in enumerate(zip(old, new)):
+                    operations.extend(cls.diff(old_item, new_item, f'{path}/{i}'))
+                return operations
+            if len(new) > len(old) and new[:len(old)] == old:
+                return [{'op': 'add', 'path': f'{path}/-', 'value': item} for item in new[len(old):]]
+        return None
+
+    @staticmethod
+    def _escape(key):
+        return str(key).replace('~', '~0').replace('/', '~1')
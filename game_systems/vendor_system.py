@@ -2,8 +2,13 @@
 Vendor System - Handles all vendor-related game logic
 """
 import random
-import json
-from models import db, Vendor, Festival
+from itertools import islice
+import numpy as np
+from sqlalchemy import case, func, insert, tuple_
+from sqlalchemy.orm import selectinload
+from .catalog import freeze
+from .ranking import rank_by_value
+from models import db, Vendor, Festival, MenuItem, MarketVendor
 
 class VendorSystem:
     """Handles vendor management, specialties, quality, and relationships"""
@@ -93,6 +98,31 @@ class VendorSystem:
             }
         }
         
+        # Relationship effects between vendor specialties
+        self.relationship_effects = {
+            'complementary': {'effect': 'Revenue +15% for both vendors', 'modifier': 0.15},
+            'competitive': {'effect': 'Revenue -10% for both vendors', 'modifier': -0.10}
+        }
+        
+        # Precomputed specialty x specialty relationship matrix. A pair is
+        # complementary if either specialty lists the other as complementary,
+        # otherwise competitive if either lists the other as competitive.
+        self.specialty_names = list(self.vendor_specialties)
+        self.specialty_index = {specialty: i for i, specialty in enumerate(self.specialty_names)}
+        size = len(self.specialty_names)
+        self.complementary_matrix = np.zeros((size, size))
+        self.competitive_matrix = np.zeros((size, size))
+        for specialty, data in self.vendor_specialties.items():
+            for other in data['complementary']:
+                self.complementary_matrix[self.specialty_index[specialty], self.specialty_index[other]] = 1
+                self.complementary_matrix[self.specialty_index[other], self.specialty_index[specialty]] = 1
+            for other in data['competitive']:
+                self.competitive_matrix[self.specialty_index[specialty], self.specialty_index[other]] = 1
+                self.competitive_matrix[self.specialty_index[other], self.specialty_index[specialty]] = 1
+        self.competitive_matrix *= 1 - self.complementary_matrix
+        self.relationship_matrix = (self.complementary_matrix * self.relationship_effects['complementary']['modifier']
+                                    + self.competitive_matrix * self.relationship_effects['competitive']['modifier'])
+        
         # Food categories and their properties
         self.food_categories = {
             'American': {
@@ -166,6 +196,23 @@ class VendorSystem:
             'Juice': {'price': 4, 'popularity': 0.6}
         }
         
+        # Menu composition per specialty
+        self.food_menu_specialties = ['Food Truck', 'Restaurant Tent', 'Food Court']
+        self.menu_cuisines = ['American', 'Mexican', 'Italian', 'Asian', 'Mediterranean']
+        self.food_menu_size = (3, 6)  # Inclusive range of main food items
+        self.beverage_menus = {
+            'Wine Bar': ['Wine'],
+            'Cocktail Bar': ['Cocktails', 'Beer'],
+            'Coffee Shop': ['Coffee', 'Tea'],
+            'Beverage Stand': ['Soft Drinks', 'Water', 'Juice', 'Smoothies']
+        }
+        dessert = {'name': 'Specialty Dessert', 'category': 'Desserts', 'price_range': (4, 12), 'allergens': ['dairy', 'gluten']}
+        self.signature_items = {
+            'Dessert Cart': dessert,
+            'Cheese Platter': dessert,
+            'Vegan Station': {'name': 'Vegan Special', 'category': 'Vegan', 'price_range': (7, 14), 'allergens': ['nuts']}
+        }
+        
         # Vendor quality levels
         self.quality_levels = {
             'Poor': {'multiplier': 0.7, 'description': 'Basic quality, low prices'},
@@ -174,24 +221,82 @@ class VendorSystem:
             'Excellent': {'multiplier': 1.2, 'description': 'High quality'},
             'Premium': {'multiplier': 1.4, 'description': 'Top-tier quality'}
         }
+        
+        # Vendor name parts; specialties with a suffix always use it
+        self.name_adjectives = ['Tasty', 'Fresh', 'Gourmet', 'Artisan', 'Local', 'Organic', 'Fusion', 'Traditional', 'Modern', 'Rustic', 'Urban', 'Coastal']
+        self.name_nouns = ['Bites', 'Eats', 'Kitchen', 'Cuisine', 'Grill', 'Cafe', 'Bar', 'Stand', 'Cart', 'Truck', 'Tent', 'Station']
+        self.name_suffixes = {
+            'Beverage Stand': 'Refreshments',
+            'Cocktail Bar': 'Cocktails',
+            'Wine Bar': 'Wines',
+            'Coffee Shop': 'Coffee',
+            'Dessert Cart': 'Sweets'
+        }
+        
+        # Hiring market: topped up to market_size when it drops below market_min_size
+        self.market_size = 500
+        self.market_min_size = 200
+        
+        # Allergen bits for MenuItem.allergen_mask
+        self.allergen_bits = {'dairy': 1, 'gluten': 2, 'nuts': 4, 'soy': 8}
+        
+        # Diets checked for coverage and the allergens each must avoid
+        self.dietary_profiles = {
+            'Dairy-free': ['dairy'],
+            'Gluten-free': ['gluten'],
+            'Nut-free': ['nuts'],
+            'Soy-free': ['soy'],
+            'Dairy- and gluten-free': ['dairy', 'gluten'],
+            'Free from all major allergens': ['dairy', 'gluten', 'nuts', 'soy']
+        }
+        
+        # Menu categories that are drinks; a diet is only covered by food
+        self.drink_categories = ['Beverages']
+        
+        # For each diet, a bitmap over every possible item mask marking the
+        # masks that diet can eat. A menu is summarized the same way (bit m set
+        # if it has an item with mask m), so a diet is covered when the two
+        # bitmaps intersect.
+        self.dietary_names = list(self.dietary_profiles)
+        mask_count = 1 << len(self.allergen_bits)
+        self.diet_safe_bitmaps = np.zeros(len(self.dietary_names), dtype=np.int64)
+        for i, diet in enumerate(self.dietary_names):
+            avoid = self.allergen_mask(self.dietary_profiles[diet])
+            for mask in range(mask_count):
+                if not mask & avoid:
+                    self.diet_safe_bitmaps[i] |= 1 << mask
+        
+        # Catalogs are shared by every request; freeze them so nothing can modify them in place
+        self.vendor_specialties = freeze(self.vendor_specialties)
+        self.relationship_effects = freeze(self.relationship_effects)
+        self.specialty_index = freeze(self.specialty_index)
+        self.food_categories = freeze(self.food_categories)
+        self.beverage_types = freeze(self.beverage_types)
+        self.food_menu_specialties = freeze(self.food_menu_specialties)
+        self.menu_cuisines = freeze(self.menu_cuisines)
+        self.beverage_menus = freeze(self.beverage_menus)
+        self.signature_items = freeze(self.signature_items)
+        self.quality_levels = freeze(self.quality_levels)
+        self.name_adjectives = freeze(self.name_adjectives)
+        self.name_nouns = freeze(self.name_nouns)
+        self.name_suffixes = freeze(self.name_suffixes)
+        self.allergen_bits = freeze(self.allergen_bits)
+        self.dietary_profiles = freeze(self.dietary_profiles)
+        self.drink_categories = freeze(self.drink_categories)
+    
+    def allergen_mask(self, allergens):
+        """Encode allergen names as a bitmask; unknown names are ignored"""
+        mask = 0
+        for allergen in allergens:
+            mask |= self.allergen_bits.get(allergen, 0)
+        return mask
     
     def generate_vendor_name(self, specialty):
         """Generate a vendor name based on specialty"""
-        food_names = ['Bites', 'Eats', 'Kitchen', 'Cuisine', 'Grill', 'Cafe', 'Bar', 'Stand', 'Cart', 'Truck', 'Tent', 'Station']
-        adjectives = ['Tasty', 'Fresh', 'Gourmet', 'Artisan', 'Local', 'Organic', 'Fusion', 'Traditional', 'Modern', 'Rustic', 'Urban', 'Coastal']
-        
-        if specialty == 'Beverage Stand':
-            return f"{random.choice(adjectives)} Refreshments"
-        elif specialty == 'Cocktail Bar':
-            return f"{random.choice(adjectives)} Cocktails"
-        elif specialty == 'Wine Bar':
-            return f"{random.choice(adjectives)} Wines"
-        elif specialty == 'Coffee Shop':
-            return f"{random.choice(adjectives)} Coffee"
-        elif specialty == 'Dessert Cart':
-            return f"{random.choice(adjectives)} Sweets"
-        else:
-            return f"{random.choice(adjectives)} {random.choice(food_names)}"
+        adjective = random.choice(self.name_adjectives)
+        if specialty in self.name_suffixes:
+            return f"{adjective} {self.name_suffixes[specialty]}"
+        return f"{adjective} {random.choice(self.name_nouns)}"
     
     def generate_single_vendor(self, vendor_id):
         """Generate a single vendor with dynamic properties"""
@@ -235,7 +340,7 @@ class VendorSystem:
             'fee': cost,
             'revenue': revenue,
             'commission_rate': 0.15,
-            'menu_items': json.dumps(menu_items),
+            'menu_items': menu_items,
             'description': specialty_data['description']
         }
     
@@ -243,11 +348,10 @@ class VendorSystem:
         """Generate menu items based on vendor specialty"""
         menu_items = []
         
-        if specialty in ['Food Truck', 'Restaurant Tent', 'Food Court']:
+        if specialty in self.food_menu_specialties:
             # Main food items
-            food_categories = ['American', 'Mexican', 'Italian', 'Asian', 'Mediterranean']
-            for _ in range(random.randint(3, 6)):
-                category = random.choice(food_categories)
+            for _ in range(random.randint(*self.food_menu_size)):
+                category = random.choice(self.menu_cuisines)
                 category_data = self.food_categories[category]
                 price = random.randint(*category_data['price_range'])
                 menu_items.append({
@@ -257,88 +361,373 @@ class VendorSystem:
                     'allergens': category_data['allergens']
                 })
         
-        if specialty in ['Beverage Stand', 'Cocktail Bar', 'Wine Bar', 'Coffee Shop']:
-            # Beverage items
-            if specialty == 'Wine Bar':
-                beverages = ['Wine']
-            elif specialty == 'Cocktail Bar':
-                beverages = ['Cocktails', 'Beer']
-            elif specialty == 'Coffee Shop':
-                beverages = ['Coffee', 'Tea']
-            else:
-                beverages = ['Soft Drinks', 'Water', 'Juice', 'Smoothies']
-            
-            for beverage in beverages:
-                beverage_data = self.beverage_types[beverage]
-                menu_items.append({
-                    'name': beverage,
-                    'category': 'Beverages',
-                    'price': beverage_data['price'],
-                    'allergens': []
-                })
-        
-        if specialty in ['Dessert Cart', 'Cheese Platter']:
-            # Dessert items
+        # Beverage items
+        for beverage in self.beverage_menus.get(specialty, []):
+            beverage_data = self.beverage_types[beverage]
             menu_items.append({
-                'name': 'Specialty Dessert',
-                'category': 'Desserts',
-                'price': random.randint(4, 12),
-                'allergens': ['dairy', 'gluten']
+                'name': beverage,
+                'category': 'Beverages',
+                'price': beverage_data['price'],
+                'allergens': []
             })
         
-        if specialty == 'Vegan Station':
-            # Vegan items
+        if specialty in self.signature_items:
+            # Dessert and vegan specials
+            item = self.signature_items[specialty]
             menu_items.append({
-                'name': 'Vegan Special',
-                'category': 'Vegan',
-                'price': random.randint(7, 14),
-                'allergens': ['nuts']
+                'name': item['name'],
+                'category': item['category'],
+                'price': random.randint(*item['price_range']),
+                'allergens': item['allergens']
             })
         
         return menu_items
     
-    def calculate_vendor_relationships(self, festival_id):
-        """Calculate vendor relationships and their effects"""
-        vendors = Vendor.query.filter_by(festival_id=festival_id).all()
-        if len(vendors) < 2:
+    def generate_market_vendors(self, count, seed=None):
+        """Generate count market vendors with menus and bulk-insert them.
+        
+        Follows generate_single_vendor and generate_menu, but draws every
+        attribute for the whole batch as NumPy arrays and writes vendors and
+        menu items with one executemany INSERT each.
+        """
+        if count <= 0:
+            return 0
+        
+        rng = np.random.default_rng(seed)
+        specialty_data = [self.vendor_specialties[specialty] for specialty in self.specialty_names]
+        quality_low = np.array([data['quality_range'][0] for data in specialty_data])
+        quality_high = np.array([data['quality_range'][1] for data in specialty_data])
+        base_cost = np.array([data['base_cost'] for data in specialty_data])
+        revenue_multiplier = np.array([data['revenue_multiplier'] for data in specialty_data])
+        level_names = list(self.quality_levels)
+        level_multiplier = np.array([self.quality_levels[level]['multiplier'] for level in level_names])
+        
+        kinds = rng.integers(0, len(self.specialty_names), count)
+        quality = rng.integers(quality_low[kinds], quality_high[kinds] + 1)
+        levels = np.digitize(quality, [60, 70, 80, 90])  # Same bands as get_quality_level
+        cost = base_cost[kinds] + rng.integers(-500, 1001, count)
+        revenue = np.floor(1000 * revenue_multiplier[kinds] * level_multiplier[levels])
+        adjectives = rng.integers(0, len(self.name_adjectives), count)
+        nouns = rng.integers(0, len(self.name_nouns), count)
+        
+        rows = []
+        for i in range(count):
+            specialty = self.specialty_names[kinds[i]]
+            suffix = self.name_suffixes.get(specialty) or self.name_nouns[nouns[i]]
+            rows.append({
+                'name': f"{self.name_adjectives[adjectives[i]]} {suffix}",
+                'specialty': specialty,
+                'quality': int(quality[i]),
+                'quality_level': level_names[levels[i]],
+                'cost': float(cost[i]),
+                'revenue': float(revenue[i]),
+                'commission_rate': 0.15
+            })
+        
+        # Core inserts on the tables skip per-row ORM bookkeeping
+        market_table = MarketVendor.__table__
+        ids = db.session.execute(
+            insert(market_table).returning(market_table.c.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        menu_rows = self._generate_market_menus(kinds, np.array(ids), rng)
+        if menu_rows:
+            db.session.execute(insert(MenuItem.__table__), menu_rows)
+        db.session.commit()
+        return count
+    
+    def _generate_market_menus(self, kinds, vendor_ids, rng):
+        """MenuItem rows for freshly generated market vendors, following generate_menu"""
+        rows = []
+        
+        def add_items(owners, name, category, prices, allergens):
+            allergen_text = ','.join(allergens)
+            mask = self.allergen_mask(allergens)
+            rows.extend(
+                {'market_vendor_id': int(owner), 'name': name, 'category': category, 'price': float(price),
+                 'allergens': allergen_text, 'allergen_mask': mask}
+                for owner, price in zip(owners, prices)
+            )
+        
+        specialties = np.array(self.specialty_names)[kinds]
+        
+        # Main food items: a random number of random cuisines per vendor
+        food_owners = vendor_ids[np.isin(specialties, self.food_menu_specialties)]
+        item_counts = rng.integers(self.food_menu_size[0], self.food_menu_size[1] + 1, len(food_owners))
+        owners = np.repeat(food_owners, item_counts)
+        cuisines = rng.integers(0, len(self.menu_cuisines), len(owners))
+        for i, cuisine in enumerate(self.menu_cuisines):
+            data = self.food_categories[cuisine]
+            chosen = cuisines == i
+            prices = rng.integers(data['price_range'][0], data['price_range'][1] + 1, int(chosen.sum()))
+            add_items(owners[chosen], f"{cuisine} Special", cuisine, prices, data['allergens'])
+        
+        # Fixed beverage lists
+        for specialty, beverages in self.beverage_menus.items():
+            owners = vendor_ids[specialties == specialty]
+            for beverage in beverages:
+                add_items(owners, beverage, 'Beverages', [self.beverage_types[beverage]['price']] * len(owners), [])
+        
+        # Dessert and vegan specials
+        for specialty, item in self.signature_items.items():
+            owners = vendor_ids[specialties == specialty]
+            prices = rng.integers(item['price_range'][0], item['price_range'][1] + 1, len(owners))
+            add_items(owners, item['name'], item['category'], prices, item['allergens'])
+        
+        return rows
+    
+    def ensure_market_stock(self):
+        """Top the hiring market back up to market_size once it runs low"""
+        available = db.session.query(func.count(MarketVendor.id)).scalar()
+        if available < self.market_min_size:
+            return self.generate_market_vendors(self.market_size - available)
+        return 0
+    
+    def reset_market(self, seed=None):
+        """Replace every market vendor with a freshly generated market"""
+        db.session.query(MenuItem).filter(MenuItem.market_vendor_id.isnot(None)).delete(synchronize_session=False)
+        db.session.query(MarketVendor).delete(synchronize_session=False)
+        db.session.commit()
+        return self.generate_market_vendors(self.market_size, seed)
+    
+    def search_market(self, limit=5, specialty=None, min_quality=None, max_quality=None,
+                      min_cost=None, max_cost=None, sort='id', after=None):
+        """Filter the hiring market with keyset pagination.
+        
+        sort is 'id', 'quality' (best first) or 'cost' (cheapest first).
+        after is the cursor returned with the previous page. Returns the page
+        as vendor dicts and the cursor for the next page (None at the end).
+        """
+        query = MarketVendor.query.options(selectinload(MarketVendor.menu))
+        if specialty:
+            query = query.filter(MarketVendor.specialty == specialty)
+        if min_quality is not None:
+            query = query.filter(MarketVendor.quality >= min_quality)
+        if max_quality is not None:
+            query = query.filter(MarketVendor.quality <= max_quality)
+        if min_cost is not None:
+            query = query.filter(MarketVendor.cost >= min_cost)
+        if max_cost is not None:
+            query = query.filter(MarketVendor.cost <= max_cost)
+        
+        # Keyset position: (sort value, id) of the last row already returned
+        if after:
+            value, _, last_id = after.partition(':')
+            last_id = int(last_id or value)
+            if sort == 'quality':
+                query = query.filter(tuple_(MarketVendor.quality, MarketVendor.id) < tuple_(int(value), last_id))
+            elif sort == 'cost':
+                query = query.filter(tuple_(MarketVendor.cost, MarketVendor.id) > tuple_(float(value), last_id))
+            else:
+                query = query.filter(MarketVendor.id > last_id)
+        
+        # Both columns run the same direction so the (column, id) index serves the order
+        if sort == 'quality':
+            query = query.order_by(MarketVendor.quality.desc(), MarketVendor.id.desc())
+        elif sort == 'cost':
+            query = query.order_by(MarketVendor.cost, MarketVendor.id)
+        else:
+            query = query.order_by(MarketVendor.id)
+        
+        rows = query.limit(limit + 1).all()
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            if sort == 'quality':
+                next_cursor = f"{last.quality}:{last.id}"
+            elif sort == 'cost':
+                next_cursor = f"{last.cost}:{last.id}"
+            else:
+                next_cursor = str(last.id)
+        
+        return [self.market_vendor_dict(vendor) for vendor in page], next_cursor
+    
+    def market_vendor_dict(self, market_vendor):
+        """Market vendor in the same shape as generate_single_vendor"""
+        return market_vendor.to_dict(self.vendor_specialties[market_vendor.specialty]['description'])
+    
+    def market_details(self, market_ids):
+        """Market vendor dicts with menus for the given ids, keyed by id; vendors hired meanwhile are left out"""
+        vendors = MarketVendor.query.options(selectinload(MarketVendor.menu)).filter(MarketVendor.id.in_(market_ids)).all()
+        return {vendor.id: self.market_vendor_dict(vendor) for vendor in vendors}
+    
+    def get_specialty_counts(self, festival_id):
+        """Count hired vendors per specialty as a vector aligned with specialty_names"""
+        counts = np.zeros(len(self.specialty_names))
+        rows = db.session.query(Vendor.specialty, func.count(Vendor.id)).filter_by(
+            festival_id=festival_id
+        ).group_by(Vendor.specialty).all()
+        for specialty, count in rows:
+            if specialty in self.specialty_index:
+                counts[self.specialty_index[specialty]] = count
+        return counts
+    
+    def get_specialty_revenue(self, festival_id):
+        """Sum hired vendors' base revenue per specialty as a vector aligned with specialty_names"""
+        revenue = np.zeros(len(self.specialty_names))
+        rows = db.session.query(Vendor.specialty, func.sum(Vendor.revenue)).filter_by(
+            festival_id=festival_id
+        ).group_by(Vendor.specialty).all()
+        for specialty, total in rows:
+            if specialty in self.specialty_index:
+                revenue[self.specialty_index[specialty]] = total or 0
+        return revenue
+    
+    def rank_candidates(self, candidates, specialty_counts, specialty_revenue, budget, top_k=5):
+        """Rank candidate vendors against the current vendor mix in one vectorized pass.
+        
+        A candidate's value is its own revenue adjusted by its relationships
+        with every hired vendor, plus the revenue change it causes for those
+        vendors. The ranking blends that value with value per $1,000 of cost.
+        Returns the top_k affordable candidates, best first.
+        """
+        if not candidates:
             return []
         
-        relationships = []
+        costs = np.array([candidate['cost'] for candidate in candidates], dtype=float)
+        revenue = np.array([candidate['revenue'] for candidate in candidates], dtype=float)
+        rows = np.array([self.specialty_index.get(candidate['specialty'], -1) for candidate in candidates])
+        
+        # Unknown specialties relate to nothing
+        relationships = np.where(rows[:, None] >= 0, self.relationship_matrix[rows], 0.0)
+        own_modifier = relationships @ specialty_counts
+        mix_effect = own_modifier * revenue + relationships @ specialty_revenue
+        
+        value = revenue + mix_effect
+        top, scores, efficiency = rank_by_value(value, costs, budget, top_k)
+        
+        complementary = np.where(rows[:, None] >= 0, self.complementary_matrix[rows], 0.0) @ specialty_counts
+        competitive = np.where(rows[:, None] >= 0, self.competitive_matrix[rows], 0.0) @ specialty_counts
+        return [
+            {
+                'vendor': candidates[i],
+                'score': float(scores[i]),
+                'revenue_modifier': float(own_modifier[i]),
+                'mix_effect': float(mix_effect[i]),
+                'complementary_partners': int(complementary[i]),
+                'competitors': int(competitive[i]),
+                'value_per_1000': float(efficiency[i])
+            }
+            for i in top
+        ]
+    
+    def rank_market(self, specialty_counts, specialty_revenue, budget, top_k=5):
+        """rank_candidates over every vendor in the hiring market.
+        
+        Only the columns the ranking needs are read for the whole market;
+        full details are loaded for the top_k alone. Returns the ranking and
+        the number of vendors considered.
+        """
+        rows = db.session.query(MarketVendor.id, MarketVendor.specialty, MarketVendor.cost, MarketVendor.revenue).all()
+        candidates = [
+            {'id': market_id, 'specialty': specialty, 'cost': cost, 'revenue': revenue}
+            for market_id, specialty, cost, revenue in rows
+        ]
+        ranked = self.rank_candidates(candidates, specialty_counts, specialty_revenue, budget, top_k)
         
-        for i, vendor1 in enumerate(vendors):
-            for vendor2 in vendors[i+1:]:
-                relationship = self.check_vendor_relationship(vendor1, vendor2)
-                if relationship['type'] != 'neutral':
-                    relationships.append(relationship)
+        details = self.market_details([entry['vendor']['id'] for entry in ranked])
+        ranked = [entry for entry in ranked if entry['vendor']['id'] in details]
+        for entry in ranked:
+            entry['vendor'] = details[entry['vendor']['id']]
+        return ranked, len(candidates)
+    
+    def calculate_vendor_relationships(self, festival_id):
+        """Calculate aggregate vendor relationship effects from per-specialty counts"""
+        counts = self.get_specialty_counts(festival_id)
+        vendor_count = int(counts.sum())
+        
+        # Unordered vendor pairs per specialty pair: c_a * c_b, or c_a choose 2 on the diagonal
+        def pair_total(matrix):
+            return int((counts @ matrix @ counts - (np.diag(matrix) * counts).sum()) / 2)
+        
+        # Revenue modifier applied to each vendor of a specialty by everyone else
+        modifiers = self.relationship_matrix @ counts - np.diag(self.relationship_matrix)
+        
+        return {
+            'vendor_count': vendor_count,
+            'complementary_pairs': pair_total(self.complementary_matrix),
+            'competitive_pairs': pair_total(self.competitive_matrix),
+            'average_revenue_modifier': float((modifiers * counts).sum() / vendor_count) if vendor_count else 0.0,
+            'by_specialty': [
+                {
+                    'specialty': specialty,
+                    'count': int(counts[i]),
+                    'revenue_modifier': float(modifiers[i])
+                }
+                for i, specialty in enumerate(self.specialty_names) if counts[i]
+            ]
+        }
+    
+    def list_vendor_relationships(self, festival_id, page=1, per_page=20, summary=None):
+        """List individual non-neutral vendor pairs, one page at a time.
         
-        return relationships
+        summary is the festival's calculate_vendor_relationships result, if
+        the caller already has it.
+        """
+        if summary is None:
+            summary = self.calculate_vendor_relationships(festival_id)
+        total = summary['complementary_pairs'] + summary['competitive_pairs']
+        start = (page - 1) * per_page
+        
+        relationships = []
+        if start < total:
+            vendors_by_specialty = {}
+            for vendor in Vendor.query.filter_by(festival_id=festival_id).order_by(Vendor.id).all():
+                vendors_by_specialty.setdefault(vendor.specialty, []).append(vendor)
+            
+            pairs = self._iter_related_pairs(vendors_by_specialty, start)
+            relationships = [self.check_vendor_relationship(vendor1, vendor2)
+                             for vendor1, vendor2 in islice(pairs, per_page)]
+        
+        return {
+            'relationships': relationships,
+            'page': page,
+            'per_page': per_page,
+            'total': total
+        }
+    
+    def _iter_related_pairs(self, vendors_by_specialty, start):
+        """Yield non-neutral vendor pairs from position start, skipping whole specialty blocks before it"""
+        position = 0
+        for a, specialty1 in enumerate(self.specialty_names):
+            for b in range(a, len(self.specialty_names)):
+                if not self.relationship_matrix[a, b]:
+                    continue
+                group1 = vendors_by_specialty.get(specialty1, [])
+                group2 = vendors_by_specialty.get(self.specialty_names[b], [])
+                pair_count = len(group1) * (len(group1) - 1) // 2 if a == b else len(group1) * len(group2)
+                if position + pair_count <= start:
+                    position += pair_count
+                    continue
+                for i, vendor1 in enumerate(group1):
+                    for vendor2 in (group1[i + 1:] if a == b else group2):
+                        if position >= start:
+                            yield vendor1, vendor2
+                        position += 1
     
     def check_vendor_relationship(self, vendor1, vendor2):
         """Check relationship between two vendors"""
-        specialty1 = vendor1.specialty
-        specialty2 = vendor2.specialty
-        
-        specialty_data1 = self.vendor_specialties[specialty1]
-        specialty_data2 = self.vendor_specialties[specialty2]
+        a = self.specialty_index[vendor1.specialty]
+        b = self.specialty_index[vendor2.specialty]
         
         # Check if complementary
-        if specialty2 in specialty_data1.get('complementary', []):
+        if self.complementary_matrix[a, b]:
             return {
                 'type': 'complementary',
                 'vendor1': vendor1.name,
                 'vendor2': vendor2.name,
-                'effect': 'Revenue +15% for both vendors',
-                'bonus': 0.15
+                'effect': self.relationship_effects['complementary']['effect'],
+                'bonus': self.relationship_effects['complementary']['modifier']
             }
         
         # Check if competitive
-        if specialty2 in specialty_data1.get('competitive', []):
+        if self.competitive_matrix[a, b]:
             return {
                 'type': 'competitive',
                 'vendor1': vendor1.name,
                 'vendor2': vendor2.name,
-                'effect': 'Revenue -10% for both vendors',
-                'penalty': -0.10
+                'effect': self.relationship_effects['competitive']['effect'],
+                'penalty': self.relationship_effects['competitive']['modifier']
             }
         
         return {
@@ -349,7 +738,7 @@ class VendorSystem:
             'bonus': 0.0
         }
     
-    def calculate_vendor_quality_score(self, vendor):
+    def calculate_vendor_quality_score(self, vendor, menu_item_count=None):
         """Calculate overall quality score for a vendor"""
         base_quality = vendor.quality
         
@@ -358,17 +747,273 @@ class VendorSystem:
         level_multiplier = self.quality_levels[quality_level]['multiplier']
         
         # Menu variety bonus
-        menu_items = json.loads(vendor.menu_items) if vendor.menu_items else []
-        variety_bonus = min(len(menu_items) * 0.05, 0.2)  # Max 20% bonus
+        if menu_item_count is None:
+            menu_item_count = db.session.query(func.count(MenuItem.id)).filter_by(vendor_id=vendor.id).scalar()
+        variety_bonus = min(menu_item_count * 0.05, 0.2)  # Max 20% bonus
         
         # Specialization bonus
-        specialty_data = self.vendor_specialties.get(vendor.specialty, {})
         specialization_bonus = 0.1 if vendor.specialty in ['Wine Bar', 'Cocktail Bar'] else 0.05
         
         total_quality = base_quality * level_multiplier * (1 + variety_bonus + specialization_bonus)
         
         return min(total_quality, 100)  # Cap at 100
     
+    def build_menu_items(self, menu_items):
+        """Build MenuItem rows from generated menu dicts"""
+        return [
+            MenuItem(
+                name=item['name'],
+                category=item['category'],
+                price=item['price'],
+                allergens=','.join(item.get('allergens', [])),
+                allergen_mask=self.allergen_mask(item.get('allergens', []))
+            )
+            for item in menu_items
+        ]
+    
+    def get_menu_profiles(self, festival_ids):
+        """Per-vendor menu category counts and average price for one or more festivals"""
+        if isinstance(festival_ids, int):
+            festival_ids = [festival_ids]
+        
+        rows = db.session.query(
+            MenuItem.vendor_id, MenuItem.category, func.count(MenuItem.id), func.sum(MenuItem.price)
+        ).join(Vendor).filter(Vendor.festival_id.in_(festival_ids)).group_by(MenuItem.vendor_id, MenuItem.category).all()
+        
+        profiles = {}
+        for vendor_id, category, count, price_total in rows:
+            profile = profiles.setdefault(vendor_id, {'categories': {}, 'item_count': 0, 'price_total': 0.0})
+            profile['categories'][category] = count
+            profile['item_count'] += count
+            profile['price_total'] += price_total
+        for profile in profiles.values():
+            profile['average_price'] = profile.pop('price_total') / profile['item_count']
+        return profiles
+    
+    def item_popularity_expression(self):
+        """SQL expression for a menu item's popularity; beverages by drink, food by category"""
+        beverage_popularity = case(
+            {name: data['popularity'] for name, data in self.beverage_types.items()},
+            value=MenuItem.name,
+            else_=self.food_categories['Beverages']['popularity']
+        )
+        return case(
+            (MenuItem.category == 'Beverages', beverage_popularity),
+            else_=case(
+                {category: data['popularity'] for category, data in self.food_categories.items()},
+                value=MenuItem.category,
+                else_=0.5
+            )
+        )
+    
+    def get_demand_features(self, festival_ids):
+        """Vendor arrays for demand modelling across one or more festivals.
+        
+        Returns aligned NumPy arrays of vendor id, festival id, quality, mean
+        menu popularity, mean menu price and item count, aggregated in SQL.
+        Vendors without a menu get an item count of zero.
+        """
+        if isinstance(festival_ids, int):
+            festival_ids = [festival_ids]
+        
+        rows = db.session.query(
+            Vendor.id,
+            Vendor.festival_id,
+            Vendor.quality,
+            func.avg(self.item_popularity_expression()),
+            func.avg(MenuItem.price),
+            func.count(MenuItem.id)
+        ).outerjoin(MenuItem).filter(Vendor.festival_id.in_(festival_ids)).group_by(Vendor.id).order_by(Vendor.id).all()
+        
+        columns = list(zip(*rows)) if rows else [()] * 6
+        return {
+            'vendor_ids': np.array(columns[0], dtype=int),
+            'festival_ids': np.array(columns[1], dtype=int),
+            'quality': np.array(columns[2], dtype=float),
+            'popularity': np.array([value or 0.0 for value in columns[3]], dtype=float),
+            'price': np.array([value or 0.0 for value in columns[4]], dtype=float),
+            'item_count': np.array(columns[5], dtype=int)
+        }
+    
+    def get_menu_bitmaps(self, festival_ids):
+        """Menu allergen bitmaps for every hired vendor of one or more festivals.
+        
+        Returns aligned NumPy arrays of vendor id, festival id and bitmap,
+        where bit m of a bitmap is set if the vendor sells a food item whose
+        allergen_mask is m. Drinks are left out, so vendors selling only
+        drinks, like those without a menu, have an empty bitmap.
+        """
+        if isinstance(festival_ids, int):
+            festival_ids = [festival_ids]
+        
+        food = (MenuItem.vendor_id == Vendor.id) & MenuItem.category.notin_(self.drink_categories)
+        rows = db.session.query(Vendor.id, Vendor.festival_id, MenuItem.allergen_mask).outerjoin(MenuItem, food).filter(
+            Vendor.festival_id.in_(festival_ids)
+        ).distinct().order_by(Vendor.id).all()
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return {'vendor_ids': empty, 'festival_ids': empty, 'bitmaps': empty}
+        
+        row_vendors = np.array([row[0] for row in rows], dtype=np.int64)
+        row_festivals = np.array([row[1] for row in rows], dtype=np.int64)
+        has_item = np.array([row[2] is not None for row in rows])
+        masks = np.array([row[2] or 0 for row in rows], dtype=np.int64)
+        
+        vendor_ids, first_rows, vendor_index = np.unique(row_vendors, return_index=True, return_inverse=True)
+        bitmaps = np.zeros(len(vendor_ids), dtype=np.int64)
+        np.bitwise_or.at(bitmaps, vendor_index[has_item], np.left_shift(1, masks[has_item]))
+        return {'vendor_ids': vendor_ids, 'festival_ids': row_festivals[first_rows], 'bitmaps': bitmaps}
+    
+    def menu_bitmap(self, menu_items):
+        """Allergen bitmap of the food on a generated menu"""
+        bitmap = 0
+        for item in menu_items:
+            if item['category'] not in self.drink_categories:
+                bitmap |= 1 << self.allergen_mask(item.get('allergens', []))
+        return bitmap
+    
+    def diet_coverage(self, bitmaps):
+        """Boolean matrix of which diets each bitmap can feed, one column per dietary_names entry"""
+        return (np.asarray(bitmaps, dtype=np.int64)[:, None] & self.diet_safe_bitmaps[None, :]) != 0
+    
+    def calculate_dietary_coverage(self, festival_ids):
+        """Count vendors able to feed each diet, for one or more festivals at once"""
+        if isinstance(festival_ids, int):
+            festival_ids = [festival_ids]
+        
+        menus = self.get_menu_bitmaps(festival_ids)
+        festival_positions = {festival_id: i for i, festival_id in enumerate(festival_ids)}
+        festival_index = np.array([festival_positions[festival_id] for festival_id in menus['festival_ids']], dtype=int)
+        
+        vendor_counts = np.zeros((len(festival_ids), len(self.dietary_names)), dtype=int)
+        np.add.at(vendor_counts, festival_index, self.diet_coverage(menus['bitmaps']).astype(int))
+        
+        return {
+            festival_id: {diet: int(count) for diet, count in zip(self.dietary_names, vendor_counts[i])}
+            for i, festival_id in enumerate(festival_ids)
+        }
+    
+    def suggest_dietary_vendors(self, candidates, vendor_counts, top_k=5):
+        """Candidates that would feed diets no hired vendor currently can, most gaps closed first"""
+        gaps = np.array([vendor_counts[diet] == 0 for diet in self.dietary_names])
+        if not candidates or not gaps.any():
+            return []
+        
+        closes = self.diet_coverage([self.menu_bitmap(candidate['menu_items']) for candidate in candidates]) & gaps
+        closed_count = closes.sum(axis=1)
+        quality = np.array([candidate['quality'] for candidate in candidates], dtype=float)
+        
+        # Most gaps closed, then highest quality
+        order = np.lexsort((-quality, -closed_count))
+        return [
+            {
+                'vendor': candidates[i],
+                'closes_gaps': [self.dietary_names[d] for d in np.flatnonzero(closes[i])]
+            }
+            for i in order[:top_k]
+            if closed_count[i] > 0
+        ]
+    
+    def suggest_market_dietary_vendors(self, vendor_counts, top_k=5):
+        """suggest_dietary_vendors over every vendor in the hiring market.
+        
+        Only food items with an allergen mask some uncovered diet can eat are
+        read, so the query returns just the market vendors that close a gap.
+        """
+        gaps = np.array([vendor_counts[diet] == 0 for diet in self.dietary_names])
+        if not gaps.any():
+            return []
+        
+        useful = int(np.bitwise_or.reduce(self.diet_safe_bitmaps[gaps]))
+        useful_masks = [mask for mask in range(1 << len(self.allergen_bits)) if useful >> mask & 1]
+        rows = db.session.query(MenuItem.market_vendor_id, MenuItem.allergen_mask, MarketVendor.quality).join(
+            MarketVendor, MenuItem.market_vendor_id == MarketVendor.id
+        ).filter(
+            MenuItem.category.notin_(self.drink_categories), MenuItem.allergen_mask.in_(useful_masks)
+        ).distinct().all()
+        if not rows:
+            return []
+        
+        row_vendors = np.array([row[0] for row in rows], dtype=np.int64)
+        masks = np.array([row[1] for row in rows], dtype=np.int64)
+        row_quality = np.array([row[2] for row in rows], dtype=float)
+        vendor_ids, first_rows, vendor_index = np.unique(row_vendors, return_index=True, return_inverse=True)
+        bitmaps = np.zeros(len(vendor_ids), dtype=np.int64)
+        np.bitwise_or.at(bitmaps, vendor_index, np.left_shift(1, masks))
+        
+        closes = self.diet_coverage(bitmaps) & gaps
+        closed_count = closes.sum(axis=1)
+        
+        # Most gaps closed, then highest quality, then oldest offer
+        order = np.lexsort((vendor_ids, -row_quality[first_rows], -closed_count))[:top_k]
+        details = self.market_details(vendor_ids[order].tolist())
+        return [
+            {
+                'vendor': details[int(vendor_ids[i])],
+                'closes_gaps': [self.dietary_names[d] for d in np.flatnonzero(closes[i])]
+            }
+            for i in order
+            if int(vendor_ids[i]) in details
+        ]
+    
+    def get_menu_analytics(self, festival_id):
+        """Menu variety, pricing and quality analytics computed with SQL aggregates"""
+        festival_items = db.session.query(MenuItem).join(Vendor).filter(Vendor.festival_id == festival_id)
+        
+        overall = festival_items.with_entities(
+            func.count(MenuItem.id),
+            func.count(func.distinct(MenuItem.category)),
+            func.avg(MenuItem.price),
+            func.min(MenuItem.price),
+            func.max(MenuItem.price)
+        ).one()
+        
+        categories = festival_items.with_entities(
+            MenuItem.category,
+            func.count(MenuItem.id),
+            func.count(func.distinct(MenuItem.vendor_id)),
+            func.avg(MenuItem.price),
+            func.min(MenuItem.price),
+            func.max(MenuItem.price)
+        ).group_by(MenuItem.category).order_by(MenuItem.category).all()
+        
+        per_vendor = db.session.query(
+            Vendor,
+            func.count(MenuItem.id),
+            func.count(func.distinct(MenuItem.category)),
+            func.avg(MenuItem.price)
+        ).outerjoin(MenuItem).filter(Vendor.festival_id == festival_id).group_by(Vendor.id).order_by(Vendor.id).all()
+        
+        return {
+            'item_count': overall[0],
+            'category_count': overall[1],
+            'average_price': overall[2] or 0,
+            'min_price': overall[3] or 0,
+            'max_price': overall[4] or 0,
+            'categories': [
+                {
+                    'category': category,
+                    'item_count': item_count,
+                    'vendor_count': vendor_count,
+                    'average_price': average_price,
+                    'min_price': min_price,
+                    'max_price': max_price
+                }
+                for category, item_count, vendor_count, average_price, min_price, max_price in categories
+            ],
+            'vendors': [
+                {
+                    'vendor_id': vendor.id,
+                    'name': vendor.name,
+                    'item_count': item_count,
+                    'category_count': category_count,
+                    'average_price': average_price or 0,
+                    'quality_score': self.calculate_vendor_quality_score(vendor, item_count)
+                }
+                for vendor, item_count, category_count, average_price in per_vendor
+            ]
+        }
+    
     def get_quality_level(self, quality_score):
         """Get quality level based on score"""
         if quality_score < 60:
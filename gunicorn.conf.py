@@ -0,0 +1,24 @@
+"""
+Gunicorn settings for wsgi.py; every value can be set from the environment
+
+Runs a single worker, and that is the only supported setup: artist offers,
+audience populations, lineup affinity, schedule timelines and live dashboard
+snapshots all live in process memory, so separate workers would each play a
+different game. One worker holds WORKER_CONNECTIONS clients on its event loop
+and runs the heavy simulations in the loop's native thread pool.
+"""
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 5000)}"
+workers = 1
+
+# Each worker serves its clients from one event loop
+if os.environ.get('SOCKETIO_ASYNC_MODE', 'eventlet') == 'gevent':
+    worker_class = 'geventwebsocket.gunicorn.workers.GeventWebSocketWorker'
+else:
+    worker_class = 'eventlet'
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 5000))
+
+# Websockets are long-lived; only idle HTTP connections should time out
+timeout = int(os.environ.get('WORKER_TIMEOUT', 120))
+keepalive = 5
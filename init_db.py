@@ -4,6 +4,8 @@ Initialize Database - Create tables with new simplified schema
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from models import db, Festival, Artist, Vendor
+from game_systems.schedule_system import ScheduleSystem
+from db_upgrade import upgrade_database
 
 # Create a minimal Flask app for database initialization
 app = Flask(__name__)
@@ -15,8 +17,9 @@ db.init_app(app)
 def init_database():
     """Initialize the database with new schema"""
     with app.app_context():
-        # Create all tables
-        db.create_all()
+        # Create all tables, upgrading any created by an older version
+        for step in upgrade_database():
+            print(f"   {step}")
         print("✅ Database tables created successfully!")
         
         # Create a sample festival for testing
@@ -26,7 +29,8 @@ def init_database():
             budget=100000.0,
             reputation=50,
             venue_capacity=20000,
-            marketing_budget=0.0
+            marketing_budget=0.0,
+            stages=ScheduleSystem().build_default_stages()
         )
         
         db.session.add(sample_festival)
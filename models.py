@@ -15,11 +15,32 @@ class Festival(db.Model):
     reputation = db.Column(db.Integer, default=50)  # 1-100 scale
     venue_capacity = db.Column(db.Integer, default=20000)
     marketing_budget = db.Column(db.Float, default=0.0)
+    tickets_sold = db.Column(db.Integer, default=0)  # Tickets bought by the simulated audience
+    version = db.Column(db.Integer, default=1, nullable=False)  # Bumped on every change, drives ETags
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     artists = db.relationship('Artist', backref='festival', lazy=True, cascade='all, delete-orphan')
     vendors = db.relationship('Vendor', backref='festival', lazy=True, cascade='all, delete-orphan')
+    stages = db.relationship('Stage', backref='festival', lazy=True, cascade='all, delete-orphan')
+    performance_sets = db.relationship('PerformanceSet', backref='festival', lazy=True, cascade='all, delete-orphan')
+    grounds = db.relationship('FestivalGrounds', backref='festival', uselist=False, cascade='all, delete-orphan')
+    layout_plots = db.relationship('LayoutPlot', backref='festival', lazy=True, cascade='all, delete-orphan')
+    campaigns = db.relationship('Campaign', backref='festival', lazy=True, cascade='all, delete-orphan', order_by='Campaign.id')
+    social_metrics = db.relationship('SocialMetric', backref='festival', lazy=True, cascade='all, delete-orphan')
+    
+    @classmethod
+    def touch(cls, festival_ids=None):
+        """Bump the version of festivals (all if None) so their ETags change.
+        
+        Runs in the caller's transaction: call it on the success path just
+        before the commit that saves the change, so the new version and the
+        new state land together and a failed change leaves the version alone.
+        """
+        statement = db.update(cls).values(version=cls.version + 1)
+        if festival_ids is not None:
+            statement = statement.where(cls.id.in_(festival_ids))
+        db.session.execute(statement.execution_options(synchronize_session=False))
     
     def to_dict(self):
         return {
@@ -32,6 +53,8 @@ class Festival(db.Model):
             'reputation': self.reputation,
             'venue_capacity': self.venue_capacity,
             'marketing_budget': self.marketing_budget,
+            'tickets_sold': self.tickets_sold,
+            'version': self.version,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -53,6 +76,18 @@ class Artist(db.Model):
     conflicts_with = db.Column(db.Text)  # JSON string of artist IDs this artist conflicts with
     friends_with = db.Column(db.Text)    # JSON string of artist IDs this artist works well with
     
+    performance_sets = db.relationship('PerformanceSet', backref='artist', lazy=True, cascade='all, delete-orphan')
+    
+    # Each slot type can be held by at most one artist per festival
+    __table_args__ = (
+        db.Index(
+            'uq_artist_festival_slot', 'festival_id', 'performance_slot',
+            unique=True,
+            sqlite_where=performance_slot.isnot(None),
+            postgresql_where=performance_slot.isnot(None)
+        ),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -79,9 +114,14 @@ class Vendor(db.Model):
     quality = db.Column(db.Integer, default=50)  # 1-100 scale
     cost = db.Column(db.Float, nullable=False)
     revenue = db.Column(db.Float, default=0.0)
-    menu_items = db.Column(db.Text)  # JSON string of menu items
+    stock = db.Column(db.Float, default=1500.0)  # Orders the vendor can still serve
+    stock_capacity = db.Column(db.Float, default=1500.0)  # Orders held after a restock
+    restock_interval = db.Column(db.Integer, default=2)  # Days between deliveries
+    days_to_restock = db.Column(db.Integer, default=2)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    menu = db.relationship('MenuItem', backref='vendor', lazy=True, cascade='all, delete-orphan', order_by='MenuItem.id')
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -91,6 +131,238 @@ class Vendor(db.Model):
             'quality': self.quality,
             'cost': self.cost,
             'revenue': self.revenue,
-            'menu_items': json.loads(self.menu_items) if self.menu_items else [],
+            'stock': self.stock,
+            'stock_capacity': self.stock_capacity,
+            'days_to_restock': self.days_to_restock,
+            'menu_items': [item.to_dict() for item in self.menu],
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class MarketVendor(db.Model):
+    """A vendor on the hiring market, not yet hired by any festival"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    specialty = db.Column(db.String(50), nullable=False, index=True)
+    quality = db.Column(db.Integer, nullable=False)
+    quality_level = db.Column(db.String(20), nullable=False)
+    cost = db.Column(db.Float, nullable=False)
+    revenue = db.Column(db.Float, nullable=False)
+    commission_rate = db.Column(db.Float, default=0.15)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    menu = db.relationship('MenuItem', backref='market_vendor', cascade='all, delete-orphan', order_by='MenuItem.id')
+    
+    # Composite indexes double as keyset pagination order for each sort
+    __table_args__ = (
+        db.Index('ix_market_vendor_quality', 'quality', 'id'),
+        db.Index('ix_market_vendor_cost', 'cost', 'id'),
+    )
+    
+    def to_dict(self, description=None):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'specialty': self.specialty,
+            'type': self.specialty,
+            'category': self.specialty,
+            'quality': self.quality,
+            'quality_level': self.quality_level,
+            'cost': self.cost,
+            'fee': self.cost,
+            'revenue': self.revenue,
+            'commission_rate': self.commission_rate,
+            'menu_items': [item.to_dict() for item in self.menu],
+            'description': description
+        }
+
+class MenuItem(db.Model):
+    """A single item on a vendor's menu; market items belong to a MarketVendor until hired"""
+    id = db.Column(db.Integer, primary_key=True)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=True, index=True)
+    market_vendor_id = db.Column(db.Integer, db.ForeignKey('market_vendor.id'), nullable=True, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(50), nullable=False, index=True)  # American, Beverages, Desserts, etc.
+    price = db.Column(db.Float, nullable=False)
+    allergens = db.Column(db.String(200), default='')  # Comma-separated allergen names
+    allergen_mask = db.Column(db.Integer, nullable=False, default=0, index=True)  # One bit per known allergen
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'category': self.category,
+            'price': self.price,
+            'allergens': self.allergens.split(',') if self.allergens else []
+        }
+
+class Stage(db.Model):
+    """Stage model representing a performance stage on the festival grounds"""
+    id = db.Column(db.Integer, primary_key=True)
+    festival_id = db.Column(db.Integer, db.ForeignKey('festival.id'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    capacity = db.Column(db.Integer, default=5000)
+    changeover_minutes = db.Column(db.Integer, default=15)  # Minimum gap between sets
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    performance_sets = db.relationship('PerformanceSet', backref='stage', lazy=True, cascade='all, delete-orphan')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'festival_id': self.festival_id,
+            'name': self.name,
+            'capacity': self.capacity,
+            'changeover_minutes': self.changeover_minutes,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class PerformanceSet(db.Model):
+    """A single timetabled set: one artist on one stage at a given day and time"""
+    id = db.Column(db.Integer, primary_key=True)
+    festival_id = db.Column(db.Integer, db.ForeignKey('festival.id'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('artist.id'), nullable=False, index=True)
+    stage_id = db.Column(db.Integer, db.ForeignKey('stage.id'), nullable=False)
+    day = db.Column(db.Integer, nullable=False, default=1)  # 1-based festival day
+    start_minute = db.Column(db.Integer, nullable=False)  # Minutes after midnight
+    duration = db.Column(db.Integer, nullable=False)  # minutes
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_performance_set_festival_day', 'festival_id', 'day'),
+    )
+    
+    MINUTES_PER_DAY = 24 * 60
+    
+    @property
+    def absolute_start(self):
+        """Start time in minutes from the beginning of day 1"""
+        return (self.day - 1) * self.MINUTES_PER_DAY + self.start_minute
+    
+    @property
+    def absolute_end(self):
+        return self.absolute_start + self.duration
+    
+    def to_dict(self):
+        end_minute = self.start_minute + self.duration
+        return {
+            'id': self.id,
+            'festival_id': self.festival_id,
+            'artist_id': self.artist_id,
+            'stage_id': self.stage_id,
+            'day': self.day,
+            'start_minute': self.start_minute,
+            'duration': self.duration,
+            'start_time': f"{self.start_minute // 60:02d}:{self.start_minute % 60:02d}",
+            'end_time': f"{(end_minute // 60) % 24:02d}:{end_minute % 60:02d}"
+        }
+
+class FestivalGrounds(db.Model):
+    """Grid dimensions and score of a festival's saved grounds layout"""
+    id = db.Column(db.Integer, primary_key=True)
+    festival_id = db.Column(db.Integer, db.ForeignKey('festival.id'), nullable=False, unique=True)
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    layout_score = db.Column(db.Float, default=0.0)  # Net adjacency bonus of the saved layout
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'festival_id': self.festival_id,
+            'width': self.width,
+            'height': self.height,
+            'layout_score': self.layout_score,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class LayoutPlot(db.Model):
+    """A single occupied cell of the festival grounds grid"""
+    id = db.Column(db.Integer, primary_key=True)
+    festival_id = db.Column(db.Integer, db.ForeignKey('festival.id'), nullable=False)
+    x = db.Column(db.Integer, nullable=False)
+    y = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # stage, vendor
+    stage_id = db.Column(db.Integer, db.ForeignKey('stage.id', ondelete='CASCADE'))
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id', ondelete='CASCADE'))
+    
+    __table_args__ = (
+        db.UniqueConstraint('festival_id', 'x', 'y', name='uq_layout_plot_cell'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'x': self.x,
+            'y': self.y,
+            'kind': self.kind,
+            'stage_id': self.stage_id,
+            'vendor_id': self.vendor_id
+        }
+
+class Campaign(db.Model):
+    """A marketing campaign whose effect builds up and decays over the days after launch"""
+    id = db.Column(db.Integer, primary_key=True)
+    festival_id = db.Column(db.Integer, db.ForeignKey('festival.id'), nullable=False)
+    campaign_type = db.Column(db.String(50), nullable=False)  # Social Media, Radio, etc.
+    target_audience = db.Column(db.String(50), nullable=False)
+    budget = db.Column(db.Float, nullable=False)
+    start_day = db.Column(db.Integer, nullable=False)  # Festival days_remaining at launch
+    duration = db.Column(db.Integer, nullable=False)  # Days of active spend
+    reach = db.Column(db.Integer, default=0)
+    effectiveness = db.Column(db.Float, nullable=False)
+    reputation_boost = db.Column(db.Float, nullable=False)  # Total reputation the campaign delivers
+    decay = db.Column(db.Float, nullable=False)  # Share of adstock carried into the next day
+    adstock = db.Column(db.Float, default=0.0)  # Accumulated, not yet delivered effect
+    applied_boost = db.Column(db.Float, default=0.0)  # Reputation delivered so far
+    status = db.Column(db.String(20), default='active')  # active, completed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_campaign_status_festival', 'status', 'festival_id'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'festival_id': self.festival_id,
+            'type': self.campaign_type,
+            'target_audience': self.target_audience,
+            'budget': self.budget,
+            'start_day': self.start_day,
+            'duration': self.duration,
+            'reach': self.reach,
+            'effectiveness': self.effectiveness,
+            'reputation_boost': self.reputation_boost,
+            'applied_boost': self.applied_boost,
+            'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        } 
\ No newline at end of file
+        }
+
+class SocialMetric(db.Model):
+    """One day of a festival's social media activity, with running totals for window queries"""
+    id = db.Column(db.Integer, primary_key=True)
+    festival_id = db.Column(db.Integer, db.ForeignKey('festival.id'), nullable=False)
+    day = db.Column(db.Integer, nullable=False)  # Ticks recorded so far, starting at 1
+    days_remaining = db.Column(db.Integer, nullable=False)
+    followers = db.Column(db.Integer, nullable=False)
+    new_followers = db.Column(db.Integer, default=0)
+    impressions = db.Column(db.Integer, default=0)
+    engagements = db.Column(db.Integer, default=0)
+    sentiment = db.Column(db.Float, default=0.0)  # -1 to 1
+    # Running totals up to and including this day; any window is two rows' difference
+    total_impressions = db.Column(db.Integer, default=0)
+    total_engagements = db.Column(db.Integer, default=0)
+    total_sentiment = db.Column(db.Float, default=0.0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('festival_id', 'day', name='uq_social_metric_day'),
+    )
+    
+    def to_dict(self):
+        return {
+            'day': self.day,
+            'days_remaining': self.days_remaining,
+            'followers': self.followers,
+            'new_followers': self.new_followers,
+            'impressions': self.impressions,
+            'engagements': self.engagements,
+            'sentiment': self.sentiment
+        }
@@ -8,6 +8,84 @@ class DashboardManager {
         this.lastDataUpdate = 0;
         this.CACHE_DURATION = 5000; // 5 seconds cache
         this.chartsInitialized = false;
+        this.version = null;
+        this.socket = null;
+    }
+
+    connectLive(socket) {
+        // Join the festival's room; the server sends the full state once, then JSON patches
+        if (!socket) {
+            return;
+        }
+        this.socket = socket;
+
+        socket.on('festival_state', (message) => {
+            if (message.festival_id !== this.festivalId) return;
+            this.applyFestivalState(message.data, message.version);
+        });
+
+        socket.on('festival_patch', (message) => {
+            if (message.festival_id !== this.festivalId) return;
+            if (!this.festivalData || message.from_version !== this.version) {
+                // Missed an update, ask for the full state instead
+                socket.emit('request_update', { festival_id: this.festivalId, version: this.version });
+                return;
+            }
+            console.log(`Applying ${message.patch.length} festival changes (v${message.version})`);
+            const data = this.applyPatch(this.festivalData, message.patch);
+            data.events = message.events || [];
+            this.applyFestivalState(data, message.version);
+        });
+
+        const join = () => socket.emit('join_festival', { festival_id: this.festivalId });
+        socket.on('connect', join);
+        if (socket.connected) {
+            join();
+        }
+    }
+
+    applyFestivalState(data, version) {
+        this.festivalData = data;
+        this.version = version;
+        this.lastDataUpdate = Date.now();
+        window.currentFestivalData = data;
+
+        this.updateDashboard(data);
+        if (!this.chartsInitialized) {
+            this.initializeCharts();
+            this.chartsInitialized = true;
+        }
+        this.updateCharts();
+    }
+
+    applyPatch(document, operations) {
+        // Apply RFC 6902 add/remove/replace operations to a copy of the document
+        let result = JSON.parse(JSON.stringify(document));
+        for (const operation of operations) {
+            if (operation.path === '') {
+                result = operation.value;
+                continue;
+            }
+            const tokens = operation.path.split('/').slice(1).map(token => token.replace(/~1/g, '/').replace(/~0/g, '~'));
+            const key = tokens.pop();
+            const parent = tokens.reduce((node, token) => node[token], result);
+
+            if (Array.isArray(parent)) {
+                const index = key === '-' ? parent.length : parseInt(key, 10);
+                if (operation.op === 'add') {
+                    parent.splice(index, 0, operation.value);
+                } else if (operation.op === 'remove') {
+                    parent.splice(index, 1);
+                } else {
+                    parent[index] = operation.value;
+                }
+            } else if (operation.op === 'remove') {
+                delete parent[key];
+            } else {
+                parent[key] = operation.value;
+            }
+        }
+        return result;
     }
 
     async loadFestivalData(forceRefresh = false) {
@@ -28,6 +106,7 @@ class DashboardManager {
             }
             
             this.festivalData = await response.json();
+            this.version = this.festivalData.festival.version;
             this.lastDataUpdate = now;
             
             // Set global variable for pause menu
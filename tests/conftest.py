@@ -0,0 +1,35 @@
+"""
+Shared fixtures - One in-memory database for the session, a fresh festival per test
+"""
+import os
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import pytest  # noqa: E402
+from app import app as flask_app, db  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def festival_id(client):
+    response = client.post('/create_festival', json={'name': 'Test Festival', 'budget': 10000000})
+    return response.get_json()['festival_id']
+
+
+@pytest.fixture
+def artist_id(client, festival_id):
+    """Id of an artist hired by the festival"""
+    artist = client.get(f'/api/artists?festival_id={festival_id}').get_json()[0]
+    client.post('/api/artists/hire', json={'festival_id': festival_id, 'artist_id': artist['id']})
+    return client.get(f'/api/festival/{festival_id}?fields=artists').get_json()['artists'][0]['id']
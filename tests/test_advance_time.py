@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import select
+from app import game_coordinator
+from models import db, Campaign, Festival
+
+
+def festival_row(festival_id):
+    return db.session.execute(
+        select(Festival.days_remaining, Festival.reputation, Festival.version).where(Festival.id == festival_id)
+    ).one()
+
+
+def add_campaign(festival_id):
+    festival = Festival.query.get(festival_id)
+    db.session.add(Campaign(
+        festival_id=festival_id, campaign_type='Social Media', target_audience='Young Adults (18-25)',
+        budget=5000, start_day=festival.days_remaining, duration=1, effectiveness=0.6,
+        reputation_boost=10, decay=0.0
+    ))
+    db.session.commit()
+
+
+def test_one_tick_is_one_version(app, festival_id, monkeypatch):
+    add_campaign(festival_id)
+    monkeypatch.setattr(game_coordinator.event_system, 'check_for_dynamic_events', lambda festival, stockouts=None: [])
+    days, reputation, version = festival_row(festival_id)
+
+    result = game_coordinator.advance_time(festival_id)
+
+    assert result['marketing_reputation'] == 10
+    assert result['new_reputation'] == reputation + 10
+    assert festival_row(festival_id) == (days - 1, reputation + 10, version + 1)
+
+
+def test_failed_tick_saves_nothing(app, festival_id, monkeypatch):
+    add_campaign(festival_id)
+    before = festival_row(festival_id)
+
+    def broken(festival, stockouts=None):
+        raise RuntimeError('event roll failed')
+
+    monkeypatch.setattr(game_coordinator.event_system, 'check_for_dynamic_events', broken)
+    with pytest.raises(RuntimeError):
+        game_coordinator.advance_time(festival_id)
+    db.session.rollback()
+
+    assert festival_row(festival_id) == before
@@ -0,0 +1,34 @@
+import numpy as np
+from app import game_coordinator
+from game_systems.audience_system import AudienceSystem
+
+CAMPAIGNS = [('Young Adults (18-25)', 20000), ('Music Enthusiasts', 5000)]
+LINEUP = [('Rock', 80), ('Electronic', 60)]
+
+
+def fresh_audience_system():
+    return AudienceSystem(
+        game_coordinator.marketing_system.audience_sizes,
+        game_coordinator.artist_system.genres,
+        game_coordinator.marketing_system.audience_genres
+    )
+
+
+def test_a_festival_always_gets_the_same_audience(app):
+    first, second = fresh_audience_system(), fresh_audience_system()
+
+    assert np.array_equal(first.population(42)['favourite_genre'], second.population(42)['favourite_genre'])
+    assert not np.array_equal(first.population(42)['favourite_genre'], first.population(43)['favourite_genre'])
+
+    days = [
+        [system.step(42, CAMPAIGNS, LINEUP, 60, 0, 50000) for _ in range(3)]
+        for system in (first, second)
+    ]
+    assert days[0] == days[1]
+    assert sum(day['new_tickets'] for day in days[0]) > 0
+
+
+def test_rebuilt_audience_keeps_tickets_already_sold(app):
+    population = fresh_audience_system().population(42, tickets_sold=250)
+
+    assert population['purchased'].sum() == 250
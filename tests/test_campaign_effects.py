@@ -0,0 +1,28 @@
+from app import game_coordinator
+from models import db, Campaign, Festival
+
+
+def test_campaign_delivers_whole_reputation_points(app, festival_id):
+    festival = Festival.query.get(festival_id)
+    campaign = Campaign(
+        festival_id=festival_id, campaign_type='Social Media', target_audience='Young Adults (18-25)',
+        budget=5000, start_day=festival.days_remaining, duration=7, effectiveness=0.6,
+        reputation_boost=4.6, decay=0.5
+    )
+    db.session.add(campaign)
+    db.session.commit()
+    start = festival.reputation
+
+    gained = 0
+    for _ in range(30):
+        festival.days_remaining -= 1
+        db.session.commit()
+        gained += game_coordinator.marketing_system.apply_campaign_effects([festival_id]).get(festival_id, 0)
+        reputation = db.session.query(Festival.reputation).filter_by(id=festival_id).scalar()
+        assert isinstance(reputation, int)
+
+    db.session.refresh(campaign)
+    assert campaign.status == 'completed'
+    assert abs(campaign.applied_boost - 4.6) < 0.05
+    assert gained == 5
+    assert db.session.query(Festival.reputation).filter_by(id=festival_id).scalar() == start + 5
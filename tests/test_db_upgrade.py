@@ -0,0 +1,60 @@
+import json
+import sqlite3
+from flask import Flask
+from db_upgrade import upgrade_database
+from models import db, Festival, Vendor
+
+# Schema and data as written by the original release
+OLD_SCHEMA = '''
+CREATE TABLE festival (
+    id INTEGER NOT NULL PRIMARY KEY, name VARCHAR(100) NOT NULL, location VARCHAR(100), date VARCHAR(20),
+    days_remaining INTEGER, budget FLOAT, reputation INTEGER, venue_capacity INTEGER,
+    marketing_budget FLOAT, created_at DATETIME
+);
+CREATE TABLE artist (
+    id INTEGER NOT NULL PRIMARY KEY, festival_id INTEGER NOT NULL REFERENCES festival (id),
+    name VARCHAR(100) NOT NULL, genre VARCHAR(50) NOT NULL, popularity INTEGER, fee FLOAT NOT NULL,
+    performance_duration INTEGER, stage_requirements VARCHAR(200), special_requests TEXT,
+    performance_slot VARCHAR(20), created_at DATETIME, conflicts_with TEXT, friends_with TEXT
+);
+CREATE TABLE vendor (
+    id INTEGER NOT NULL PRIMARY KEY, festival_id INTEGER NOT NULL REFERENCES festival (id),
+    name VARCHAR(100) NOT NULL, specialty VARCHAR(50) NOT NULL, quality INTEGER, cost FLOAT NOT NULL,
+    revenue FLOAT, menu_items TEXT, created_at DATETIME
+);
+INSERT INTO festival (id, name, days_remaining, budget, reputation, venue_capacity, marketing_budget)
+    VALUES (1, 'Old Festival', 300, 50000, 60, 20000, 0);
+INSERT INTO artist (id, festival_id, name, genre, popularity, fee, performance_slot)
+    VALUES (1, 1, 'First', 'Rock', 80, 1000, 'headliner'), (2, 1, 'Second', 'Pop', 70, 1000, 'headliner');
+'''
+
+
+def test_upgrade_brings_old_database_to_current_schema(tmp_path):
+    path = tmp_path / 'old.db'
+    connection = sqlite3.connect(path)
+    connection.executescript(OLD_SCHEMA)
+    menu = [{'name': 'Burger', 'category': 'American', 'price': 12, 'allergens': ['gluten', 'dairy']},
+            {'name': 'Cola', 'category': 'Beverages', 'price': 4, 'allergens': []}]
+    connection.execute("INSERT INTO vendor (id, festival_id, name, specialty, quality, cost, revenue, menu_items) "
+                       "VALUES (1, 1, 'Grill', 'Food Truck', 70, 2000, 0, ?)", (json.dumps(menu),))
+    connection.commit()
+    connection.close()
+
+    old_app = Flask(__name__)
+    old_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(old_app)
+    with old_app.app_context():
+        steps = upgrade_database()
+        assert 'moved 1 vendor menus to menu_item' in steps
+        assert 'indexed artist slots (1 duplicate slots cleared)' in steps
+
+        vendor = Vendor.query.get(1)
+        assert [(item.name, item.allergens) for item in vendor.menu] == [('Burger', 'gluten,dairy'), ('Cola', '')]
+        assert vendor.stock == 1500.0
+
+        festival = Festival.query.get(1)
+        assert festival.version == 1
+        assert len(festival.stages) == 3
+
+        # Running again changes nothing
+        assert upgrade_database() == []
@@ -0,0 +1,43 @@
+import numpy as np
+from app import game_coordinator
+from models import db, Festival
+
+economy_system = game_coordinator.economy_system
+
+
+def test_vendor_demand_falls_with_price_and_rises_with_quality(app):
+    # Festival 0 has two vendors that differ only in price, festival 1 two that differ only in quality
+    orders, captured = economy_system.allocate_vendor_demand(
+        festival_index=np.array([0, 0, 1, 1]),
+        attendance=np.array([1000.0, 1000.0]),
+        popularity=np.full(4, 0.5),
+        quality=np.array([60.0, 60.0, 40.0, 90.0]),
+        price=np.array([8.0, 16.0, 10.0, 10.0]),
+        available=np.ones(4, dtype=bool)
+    )
+
+    assert orders[0] > orders[1]
+    assert orders[3] > orders[2]
+    assert np.all((captured > 0) & (captured < 1))
+    assert np.allclose(orders.reshape(2, 2).sum(axis=1), captured * 1000 * economy_system.demand_model['purchase_occasions'])
+
+
+def test_vendor_without_stock_sells_nothing(app):
+    orders, _ = economy_system.allocate_vendor_demand(
+        np.array([0, 0]), np.array([1000.0]), np.full(2, 0.5), np.full(2, 60.0), np.full(2, 10.0), np.array([True, False])
+    )
+
+    assert orders[0] > 0
+    assert orders[1] == 0
+
+
+def test_attendance_rises_with_reputation(client):
+    festival_ids = [client.post('/create_festival', json={'name': f'Reputation {reputation}'}).get_json()['festival_id']
+                    for reputation in (30, 80)]
+    for festival_id, reputation in zip(festival_ids, (30, 80)):
+        Festival.query.get(festival_id).reputation = reputation
+    db.session.commit()
+
+    attendance = economy_system.estimate_attendance_by_festival(festival_ids)
+
+    assert attendance[festival_ids[1]] > attendance[festival_ids[0]]
@@ -0,0 +1,46 @@
+from app import game_coordinator
+from models import db, Vendor
+
+vendor_system = game_coordinator.vendor_system
+
+WINE = {'name': 'Wine', 'category': 'Beverages', 'price': 8, 'allergens': []}
+PASTA = {'name': 'Italian Special', 'category': 'Italian', 'price': 14, 'allergens': ['dairy', 'gluten']}
+SALAD = {'name': 'Vegan Bowl', 'category': 'Vegan', 'price': 11, 'allergens': []}
+
+
+def hire(festival_id, specialty, menu):
+    vendor = Vendor(festival_id=festival_id, name=specialty, specialty=specialty, quality=70, cost=100,
+                    menu=vendor_system.build_menu_items(menu))
+    db.session.add(vendor)
+    db.session.commit()
+
+
+def test_drinks_only_vendor_covers_no_diet(app, festival_id):
+    hire(festival_id, 'Wine Bar', [WINE])
+
+    coverage = vendor_system.calculate_dietary_coverage(festival_id)[festival_id]
+
+    assert set(coverage.values()) == {0}
+
+
+def test_food_vendor_covers_only_diets_its_food_suits(app, festival_id):
+    hire(festival_id, 'Restaurant Tent', [PASTA, WINE])
+
+    coverage = vendor_system.calculate_dietary_coverage(festival_id)[festival_id]
+
+    assert coverage['Nut-free'] == 1
+    assert coverage['Gluten-free'] == 0
+    assert coverage['Free from all major allergens'] == 0
+
+
+def test_suggestions_skip_drinks_only_candidates(app, festival_id):
+    vendor_counts = vendor_system.calculate_dietary_coverage(festival_id)[festival_id]
+    candidates = [
+        {'id': 1, 'quality': 95, 'menu_items': [WINE]},
+        {'id': 2, 'quality': 60, 'menu_items': [SALAD, WINE]}
+    ]
+
+    suggestions = vendor_system.suggest_dietary_vendors(candidates, vendor_counts)
+
+    assert [suggestion['vendor']['id'] for suggestion in suggestions] == [2]
+    assert 'Free from all major allergens' in suggestions[0]['closes_gaps']
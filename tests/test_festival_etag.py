@@ -0,0 +1,44 @@
+import gzip
+import json
+
+
+def test_unchanged_festival_is_answered_with_304(client, festival_id):
+    first = client.get(f'/api/festival/{festival_id}')
+    assert first.status_code == 200
+    assert {'Accept', 'Accept-Encoding'} <= set(first.vary)
+
+    again = client.get(f'/api/festival/{festival_id}', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert {'Accept', 'Accept-Encoding'} <= set(again.vary)
+
+    client.post(f'/api/advance_time/{festival_id}')
+    changed = client.get(f'/api/festival/{festival_id}', headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+
+
+def test_each_encoding_gets_its_own_tag(client, festival_id):
+    plain = client.get(f'/api/festival/{festival_id}')
+    zipped = client.get(f'/api/festival/{festival_id}', headers={'Accept-Encoding': 'gzip'})
+
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert zipped.headers['ETag'] != plain.headers['ETag']
+    # Events are rolled afresh on every build, so compare everything else
+    unzipped = json.loads(gzip.decompress(zipped.data))
+    assert {key: value for key, value in unzipped.items() if key != 'events'} == \
+        {key: value for key, value in plain.get_json().items() if key != 'events'}
+
+
+def test_fields_selector_limits_the_payload(client, festival_id):
+    data = client.get(f'/api/festival/{festival_id}?fields=festival.budget,tickets').get_json()
+
+    assert set(data) == {'festival', 'tickets'}
+    assert set(data['festival']) == {'budget'}
+
+
+def test_bad_fields_are_rejected_even_with_a_matching_etag(client, festival_id):
+    etag = client.get(f'/api/festival/{festival_id}').headers['ETag']
+
+    response = client.get(f'/api/festival/{festival_id}?fields=bogus', headers={'If-None-Match': etag})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Unknown field: bogus'
@@ -0,0 +1,30 @@
+from sqlalchemy import select
+from models import db, Festival
+
+
+def version_of(festival_id):
+    return db.session.scalar(select(Festival.version).where(Festival.id == festival_id))
+
+
+def test_failed_slot_claim_leaves_version_alone(client, festival_id, artist_id):
+    before = version_of(festival_id)
+
+    missing = client.post(f'/api/artists/assign_slot/{festival_id}', json={'artist_id': 999, 'slot_type': 'opening'})
+    assert not missing.get_json()['success']
+    assert version_of(festival_id) == before
+
+    claimed = client.post(f'/api/artists/assign_slot/{festival_id}', json={'artist_id': artist_id, 'slot_type': 'opening'})
+    assert claimed.get_json()['success']
+    assert version_of(festival_id) == before + 1
+
+
+def test_rejected_schedule_changes_leave_version_alone(client, festival_id, artist_id):
+    stage_id = client.get(f'/api/schedule/{festival_id}').get_json()['stages'][0]['id']
+    request = {'artist_id': artist_id, 'stage_id': stage_id, 'day': 1, 'start_time': '20:00', 'duration': 60}
+    assert client.post(f'/api/schedule/sets/{festival_id}', json=request).get_json()['success']
+    before = version_of(festival_id)
+
+    assert not client.post(f'/api/schedule/sets/{festival_id}', json=request).get_json()['success']
+    assert not client.post(f'/api/schedule/remove_set/{festival_id}', json={'set_id': 999}).get_json()['success']
+    assert not client.post(f'/api/schedule/stages/{festival_id}', json={'name': ''}).get_json()['success']
+    assert version_of(festival_id) == before
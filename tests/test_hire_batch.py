@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import delete
+from app import game_coordinator
+from models import db, Festival, MarketVendor, Vendor
+
+
+def market_vendor_ids(client, count):
+    return [vendor['id'] for vendor in client.get(f'/api/vendors/available?count={count}').get_json()]
+
+
+def test_batch_hires_artists_and_vendors_together(client, festival_id):
+    artist_ids = [artist['id'] for artist in client.get(f'/api/artists?festival_id={festival_id}').get_json()[:2]]
+    vendor_ids = market_vendor_ids(client, 2)
+
+    result = client.post('/api/hire/batch', json={
+        'festival_id': festival_id, 'artist_ids': artist_ids + [artist_ids[0]], 'vendor_ids': vendor_ids + [-1]
+    }).get_json()
+
+    assert result['success'] and result['hired'] == 4
+    assert [item['error'] for item in result['results']] == [None, None, 'Duplicate item', None, None, 'Vendor not found']
+
+
+def test_batch_conflict_reports_every_item_as_not_hired(app, client, festival_id, monkeypatch):
+    vendor_ids = market_vendor_ids(client, 2)
+    budget = Festival.query.get(festival_id).budget
+
+    # Another festival claims the second vendor while the batch is in flight
+    inventory_system = game_coordinator.inventory_system
+    original = inventory_system.initial_inventory
+
+    def claimed_elsewhere(*args):
+        db.session.execute(delete(MarketVendor.__table__).where(MarketVendor.__table__.c.id == vendor_ids[1]))
+        return original(*args)
+
+    monkeypatch.setattr(inventory_system, 'initial_inventory', claimed_elsewhere)
+    result = game_coordinator.hire_batch(festival_id, [], {}, vendor_ids)
+
+    assert not result['success']
+    assert all(not item['success'] and item['error'] == result['error'] for item in result['results'])
+    assert Vendor.query.filter_by(festival_id=festival_id).count() == 0
+    assert Festival.query.get(festival_id).budget == budget
+
+
+@pytest.mark.parametrize('payload', [
+    {'artist_ids': 5},
+    {'vendor_ids': [[1]]},
+    {'vendor_ids': [1, None]},
+    {'vendor_ids': ['one']},
+    {'festival_id': 'first', 'vendor_ids': [1]}
+])
+def test_batch_rejects_malformed_ids(client, festival_id, payload):
+    response = client.post('/api/hire/batch', json=dict({'festival_id': festival_id}, **payload))
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('url', ['/api/hire/batch', '/api/vendors/hire', '/api/artists/hire'])
+def test_hire_endpoints_reject_a_null_body(client, url):
+    response = client.post(url, data='null', content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_single_vendor_hire_parses_ids(client, festival_id):
+    vendor_id = market_vendor_ids(client, 1)[0]
+
+    assert client.post('/api/vendors/hire', json={'festival_id': festival_id, 'vendor_id': 'x'}).status_code == 400
+    hired = client.post('/api/vendors/hire', json={'festival_id': str(festival_id), 'vendor_id': str(vendor_id)})
+    assert hired.get_json()['success']
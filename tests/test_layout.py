@@ -0,0 +1,24 @@
+from app import game_coordinator
+from models import Vendor
+
+
+def test_layout_keeps_stages_on_the_top_row_and_vendors_on_their_own_plots(client, festival_id):
+    for vendor in client.get('/api/vendors/available?count=6').get_json():
+        client.post('/api/vendors/hire', json={'festival_id': festival_id, 'vendor_id': vendor['id']})
+    stage_ids = {stage.id for stage in game_coordinator.schedule_system.get_stages(festival_id)}
+    vendor_ids = {vendor.id for vendor in Vendor.query.filter_by(festival_id=festival_id)}
+
+    assert len(vendor_ids) == 6 and stage_ids
+
+    layout = client.post(f'/api/layout/optimize/{festival_id}', json={'seed': 3}).get_json()
+
+    grounds, plots = layout['grounds'], layout['plots']
+    assert layout['success']
+    assert all(0 <= plot['x'] < grounds['width'] and 0 <= plot['y'] < grounds['height'] for plot in plots)
+    assert len({(plot['x'], plot['y']) for plot in plots}) == len(plots)
+
+    stage_plots = [plot for plot in plots if plot['kind'] == 'stage']
+    assert {plot['stage_id'] for plot in stage_plots} == stage_ids
+    assert all(plot['y'] == 0 for plot in stage_plots)
+    vendor_plots = [plot for plot in plots if plot['kind'] == 'vendor']
+    assert sorted(plot['vendor_id'] for plot in vendor_plots) == sorted(vendor_ids)
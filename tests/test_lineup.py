@@ -0,0 +1,67 @@
+import pytest
+from app import game_coordinator, get_cached_artists
+
+
+def make_candidate(i, genre, popularity, fee):
+    return {'id': i, 'name': f'Artist {i}', 'genre': genre, 'popularity': popularity, 'fee': fee}
+
+
+def test_knapsack_picks_best_value_within_budget():
+    artist_system = game_coordinator.artist_system
+    fees = [600.0, 500.0, 500.0]
+    selected, solver = artist_system._knapsack([0, 1, 2], fees, [10.0, 7.0, 7.0], 1000, deadline=float('inf'))
+
+    assert solver == 'dynamic_programming'
+    assert sorted(selected) == [1, 2]
+
+
+def test_optimize_lineup_stays_within_budget_and_meets_targets():
+    candidates = [
+        make_candidate(1, 'Rock', 90, 9000),
+        make_candidate(2, 'Jazz', 60, 3000),
+        make_candidate(3, 'Rock', 70, 4000),
+        make_candidate(4, 'Pop', 80, 5000)
+    ]
+    draws = [400.0, 100.0, 200.0, 300.0]
+
+    selected, _ = game_coordinator.artist_system.optimize_lineup(
+        candidates, draws, 10000, genre_targets={'Jazz': 1}, reputation_value=45.0, time_limit=1.0
+    )
+
+    assert sum(candidates[i]['fee'] for i in selected) <= 10000
+    assert 1 in selected
+
+
+def test_lineup_builder_and_recommendations_share_the_draw_model(app, festival_id):
+    from models import Festival
+    festival = Festival.query.get(festival_id)
+    candidates = [make_candidate(1, 'Rock', 90, 1000), make_candidate(2, 'Pop', 20, 1000)]
+
+    _, lift = game_coordinator.attendance_lift(festival, 0, 0, candidates)
+    recommended = game_coordinator.recommend_artists(festival_id, candidates, top_k=2)['recommendations']
+
+    assert {r['artist']['id']: r['attendance_lift'] for r in recommended} == {1: lift[0], 2: lift[1]}
+    assert lift[1] < 0 < lift[0]
+
+
+@pytest.mark.parametrize('bad', [{'pool_size': 'abc'}, {'time_limit_ms': '1.5'}, {'budget': 'lots'}, {'genre_targets': ['Rock']}])
+def test_build_lineup_rejects_malformed_input(client, festival_id, bad):
+    response = client.post(f'/api/artists/build_lineup/{festival_id}', json=bad)
+    assert response.status_code == 400
+
+
+def test_build_lineup_suggests_affordable_lineup(client, festival_id):
+    result = client.post(f'/api/artists/build_lineup/{festival_id}', json={'pool_size': '20', 'budget': 200000}).get_json()
+
+    assert result['success']
+    assert result['total_fee'] <= 200000
+
+
+def test_scoring_a_large_pool_leaves_the_offers_alone(client, festival_id):
+    offers = client.get(f'/api/artists?festival_id={festival_id}').get_json()
+
+    client.get(f'/api/artists/recommend/{festival_id}?pool_size=200')
+    client.post(f'/api/artists/build_lineup/{festival_id}', json={'pool_size': 200})
+
+    assert client.get(f'/api/artists?festival_id={festival_id}').get_json() == offers
+    assert len(get_cached_artists(festival_id)) == len(offers)
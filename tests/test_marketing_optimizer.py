@@ -0,0 +1,50 @@
+import pytest
+from app import game_coordinator
+from game_systems import marketing_system as marketing_module
+from models import Festival
+
+marketing = game_coordinator.marketing_system
+
+
+def test_optimizer_matches_single_campaign_formulas(app, festival_id, monkeypatch):
+    festival = Festival.query.get(festival_id)
+    monkeypatch.setattr(marketing_module.random, 'uniform', lambda low, high: 1.0)
+    result = marketing.optimize_budget(festival, 50000)
+    affinity = marketing.lineup_affinity(festival_id)
+    audiences = list(marketing.target_audiences)
+
+    assert result['success'] and result['allocation']
+    assert result['allocated'] == pytest.approx(50000, rel=1e-3)
+    for item in result['allocation']:
+        lineup_affinity = float(affinity[audiences.index(item['target_audience'])])
+        effectiveness = marketing.calculate_campaign_effectiveness(
+            item['campaign_type'], item['target_audience'], festival.reputation, lineup_affinity
+        )
+        assert item['effectiveness'] == pytest.approx(effectiveness)
+
+        # The first dollar's marginal reach is the campaign reach formula's slope
+        base_cost = marketing.campaign_types[item['campaign_type']]['base_cost']
+        reach = marketing.calculate_campaign_reach(
+            item['campaign_type'], base_cost, item['target_audience'], effectiveness, lineup_affinity
+        )
+        size = marketing.audience_sizes[item['target_audience']]
+        assert item['expected_reach'] <= size
+        assert item['marginal_value_per_dollar'] <= reach / base_cost + 1e-6
+
+
+def test_optimizer_rejects_unknown_objective(app, festival_id):
+    result = marketing.optimize_budget(Festival.query.get(festival_id), 50000, objective='followers')
+    assert not result['success']
+
+
+@pytest.mark.parametrize('payload', [{'budget': 'abc'}, {'budget': [1]}, {'budget': 'nan'}, {'objective': 'followers'}])
+def test_optimize_endpoint_rejects_malformed_requests(client, festival_id, payload):
+    response = client.post(f'/api/marketing/optimize/{festival_id}', json=payload)
+    assert response.status_code == 400
+    assert not response.get_json()['success']
+
+
+def test_optimize_endpoint_accepts_numeric_strings(client, festival_id):
+    response = client.post(f'/api/marketing/optimize/{festival_id}', json={'budget': '50000'})
+    assert response.status_code == 200
+    assert response.get_json()['success']
@@ -0,0 +1,55 @@
+from app import artist_offers
+from game_systems.offer_cache import OfferCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_locks_do_not_outlive_their_entries():
+    clock = FakeClock()
+    cache = OfferCache(ttl=10, max_entries=2, clock=clock)
+    for key in range(5):
+        cache.get(key, list)
+    assert cache.stats()['locks'] == 2
+
+    cache.invalidate(4)
+    assert cache.stats()['locks'] == 1
+
+    clock.now = 20
+    cache.get(3, lambda: ['fresh'])
+    assert cache.get(3, list) == ['fresh']
+    assert cache.stats()['expirations'] == 1
+
+    cache.clear()
+    assert cache.stats()['entries'] == cache.stats()['locks'] == 0
+
+
+def test_failed_load_leaves_no_lock():
+    cache = OfferCache()
+
+    def broken():
+        raise RuntimeError('market closed')
+
+    try:
+        cache.get('festival', broken)
+    except RuntimeError:
+        pass
+    assert cache.stats()['locks'] == 0
+
+
+def test_offers_are_only_cached_for_existing_festivals(client, festival_id):
+    artist_offers.clear()
+
+    assert client.get('/api/artists/available?festival_id=999999').status_code == 404
+    assert client.post('/api/artists/hire', json={'festival_id': 999999, 'artist_id': 1}).status_code == 404
+    assert artist_offers.stats()['entries'] == 0
+
+    offers = client.get(f'/api/artists/available?festival_id={festival_id}').get_json()
+    hired = client.post('/api/artists/hire', json={'festival_id': str(festival_id), 'artist_id': offers[0]['id']})
+    assert hired.get_json()['success']
+    assert artist_offers.stats()['entries'] == artist_offers.stats()['locks'] == 0
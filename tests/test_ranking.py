@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from app import game_coordinator
+from models import db, MarketVendor
+from game_systems.ranking import rank_by_value
+
+
+def test_rank_by_value_orders_affordable_candidates():
+    top, scores, efficiency = rank_by_value([100, 300, 200, 500], [1000, 1000, 1000, 9000], budget=5000, top_k=3)
+
+    assert top.tolist() == [1, 2, 0]
+    assert scores[3] == -np.inf
+    assert efficiency[0] == 100
+
+
+def test_rank_by_value_returns_nothing_when_nothing_is_affordable():
+    top, _, _ = rank_by_value([100], [1000], budget=10, top_k=5)
+    assert len(top) == 0
+
+
+def test_vendor_recommendations_stay_within_budget(client, festival_id):
+    result = client.get(f'/api/vendors/recommend/{festival_id}?top_k=5').get_json()
+
+    assert result['success']
+    assert [r['score'] for r in result['recommendations']] == sorted((r['score'] for r in result['recommendations']), reverse=True)
+    assert 'quality_uplift' not in result['recommendations'][0]
+    assert game_coordinator.vendor_system.rank_candidates([], np.zeros(1), np.zeros(1), 1000) == []
+
+
+@pytest.fixture
+def last_market_vendor(app):
+    """A market vendor far past the first page of the market by id"""
+    game_coordinator.vendor_system.ensure_market_stock()
+    vendor = MarketVendor(id=10_000_000, name='Late Arrival', specialty='Food Truck', quality=101,
+                          quality_level='Legendary', cost=1, revenue=1e9,
+                          menu=game_coordinator.vendor_system.build_menu_items(
+                              [{'name': 'Vegan Bowl', 'category': 'Vegan', 'price': 11, 'allergens': []}]))
+    db.session.add(vendor)
+    db.session.commit()
+    yield vendor
+    db.session.delete(vendor)
+    db.session.commit()
+
+
+def test_recommendations_score_the_whole_market(client, festival_id, last_market_vendor):
+    result = client.get(f'/api/vendors/recommend/{festival_id}?top_k=1').get_json()
+
+    assert result['recommendations'][0]['vendor']['id'] == last_market_vendor.id
+    assert result['recommendations'][0]['vendor']['menu_items']
+    assert result['candidates_considered'] == MarketVendor.query.count()
+
+
+def test_dietary_suggestions_come_from_the_whole_market(client, festival_id, last_market_vendor):
+    result = client.get(f'/api/vendors/dietary_coverage/{festival_id}?top_k=1').get_json()
+
+    assert result['suggestions'][0]['vendor']['id'] == last_market_vendor.id
+    assert 'Free from all major allergens' in result['suggestions'][0]['closes_gaps']
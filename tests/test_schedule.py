@@ -0,0 +1,56 @@
+import pytest
+from game_systems.interval_tree import IntervalTree
+from models import Stage
+
+
+def test_interval_tree_returns_only_overlapping_intervals():
+    tree = IntervalTree()
+    for key, (start, end) in enumerate([(0, 60), (60, 120), (90, 150), (200, 260)]):
+        tree.insert(start, end, key)
+
+    assert sorted(key for _, _, key in tree.overlapping(100, 130)) == [1, 2]
+    assert tree.overlapping(150, 200) == []
+
+    assert tree.remove(60, 1)
+    assert sorted(key for _, _, key in tree.overlapping(100, 130)) == [2]
+    assert len(tree) == 3
+
+
+def test_interval_tree_rejects_empty_intervals():
+    with pytest.raises(ValueError):
+        IntervalTree().insert(10, 10, 'empty')
+
+
+def test_new_festival_starts_with_default_stages(app, festival_id):
+    assert Stage.query.filter_by(festival_id=festival_id).count() == 3
+
+
+def test_timetable_read_does_not_create_stages(app, client, festival_id):
+    Stage.query.filter_by(festival_id=festival_id).delete()
+
+    assert client.get(f'/api/schedule/{festival_id}').get_json()['stages'] == []
+    assert Stage.query.filter_by(festival_id=festival_id).count() == 0
+
+
+def test_schedule_set_accepts_numeric_strings_and_detects_clashes(client, festival_id, artist_id):
+    stage_id = client.get(f'/api/schedule/{festival_id}').get_json()['stages'][0]['id']
+    request = {'artist_id': str(artist_id), 'stage_id': str(stage_id), 'day': '1', 'start_time': '20:00', 'duration': 60}
+
+    assert client.post(f'/api/schedule/sets/{festival_id}', json=request).get_json()['success']
+    clash = client.post(f'/api/schedule/sets/{festival_id}', json=dict(request, start_time='20:30')).get_json()
+    assert clash['error'] == 'Schedule clash'
+
+
+@pytest.mark.parametrize('bad', [{'day': 'one'}, {'day': 1.5}, {'start_minute': 'noon'}, {'duration': [60]}])
+def test_schedule_set_rejects_malformed_values(client, festival_id, artist_id, bad):
+    stage_id = client.get(f'/api/schedule/{festival_id}').get_json()['stages'][0]['id']
+    request = dict({'artist_id': artist_id, 'stage_id': stage_id, 'start_minute': 600}, **bad)
+
+    response = client.post(f'/api/schedule/sets/{festival_id}', json=request)
+    assert response.status_code == 400
+    assert not response.get_json()['success']
+
+
+def test_move_set_rejects_malformed_day(client, festival_id):
+    response = client.post(f'/api/schedule/move_set/{festival_id}', json={'set_id': 1, 'day': 'two'})
+    assert response.status_code == 400
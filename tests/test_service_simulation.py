@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.fixture
+def vendor_festival_id(client, festival_id):
+    for vendor in client.get('/api/vendors/available?count=3').get_json():
+        client.post('/api/vendors/hire', json={'festival_id': festival_id, 'vendor_id': vendor['id']})
+    return festival_id
+
+
+def test_same_seed_gives_the_same_day(client, vendor_festival_id):
+    request = {'attendance': '5000', 'seed': 7}
+    first = client.post(f'/api/vendors/simulate/{vendor_festival_id}', json=request).get_json()
+    second = client.post(f'/api/vendors/simulate/{vendor_festival_id}', json=request).get_json()
+
+    assert first['success'] and first['orders'] > 0
+    assert first == second
+
+
+@pytest.mark.parametrize('payload', [{'attendance': 'lots'}, {'attendance': 1.5}, {'seed': 'abc'}, {'seed': 2.5}, {'seed': -1}])
+def test_malformed_simulation_requests_are_rejected(client, festival_id, payload):
+    response = client.post(f'/api/vendors/simulate/{festival_id}', json=payload)
+    assert response.status_code == 400
+    assert not response.get_json()['success']
@@ -0,0 +1,45 @@
+import pytest
+from app import game_coordinator
+from models import db, Festival, SocialMetric
+
+marketing_system = game_coordinator.marketing_system
+
+
+def record_days(festival_id, impressions):
+    festival = Festival.query.get(festival_id)
+    for day_impressions in impressions:
+        marketing_system.record_social_metrics(festival, day_impressions, new_tickets=10)
+    db.session.commit()
+    return SocialMetric.query.filter_by(festival_id=festival_id).order_by(SocialMetric.day).all()
+
+
+def test_trend_sums_the_last_window_days(app, festival_id):
+    rows = record_days(festival_id, [1000, 2000, 0, 5000, 3000, 4000])
+
+    trend = marketing_system.get_social_trend(festival_id, window=3, days=2)
+
+    assert [point['day'] for point in trend['series']] == [5, 6]
+    latest = trend['latest']
+    assert latest['followers'] == rows[-1].followers
+    assert latest['follower_growth'] == sum(row.new_followers for row in rows[-3:])
+    assert latest['impressions'] == 5000 + 3000 + 4000
+    assert latest['engagements'] == sum(row.engagements for row in rows[-3:])
+    assert latest['average_sentiment'] == pytest.approx(sum(row.sentiment for row in rows[-3:]) / 3)
+
+
+def test_trend_window_longer_than_the_history_starts_from_day_one(client, festival_id):
+    rows = record_days(festival_id, [1000, 2000])
+
+    trend = client.get(f'/api/marketing/social_media/{festival_id}/trend?window=7').get_json()
+
+    first = trend['series'][0]
+    assert first['follower_growth'] == rows[0].new_followers
+    assert first['impressions'] == 1000
+    assert trend['latest']['follower_growth'] == rows[0].new_followers + rows[1].new_followers
+    assert trend['latest']['impressions'] == 3000
+
+
+def test_trend_is_empty_before_the_first_tick(client, festival_id):
+    trend = client.get(f'/api/marketing/social_media/{festival_id}/trend').get_json()
+
+    assert trend['latest'] is None and trend['series'] == []
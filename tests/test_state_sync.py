@@ -0,0 +1,49 @@
+from app import app as flask_app, socketio, state_sync
+from game_systems.state_sync import FestivalStateSync
+
+
+def test_diff_patches_changed_keys_and_appended_items():
+    name = 'A festival name long enough that patching beats resending the whole document'
+    old = {'festival': {'budget': 100, 'name': name}, 'artists': [{'id': 1}], 'gone': True}
+    new = {'festival': {'budget': 80, 'name': name}, 'artists': [{'id': 1}, {'id': 2}], 'tickets/sold': 5}
+
+    assert FestivalStateSync.diff(old, new) == [
+        {'op': 'remove', 'path': '/gone'},
+        {'op': 'replace', 'path': '/festival/budget', 'value': 80},
+        {'op': 'add', 'path': '/artists/-', 'value': {'id': 2}},
+        {'op': 'add', 'path': '/tickets~1sold', 'value': 5}
+    ]
+    assert FestivalStateSync.diff(new, new) == []
+    assert FestivalStateSync.diff({'a': 1, 'b': 2}, {'a': 3, 'b': 4}) == [{'op': 'replace', 'path': '', 'value': {'a': 3, 'b': 4}}]
+
+
+def test_snapshot_is_dropped_when_the_room_empties():
+    sync = FestivalStateSync()
+    sync.watch(1, 1, {})
+    assert sync.snapshot(1) is None
+
+    sync.join(1, 'a')
+    sync.join(1, 'b')
+    sync.watch(1, 1, {})
+    sync.leave(1, 'a')
+    assert sync.snapshot(1) == (1, {})
+
+    sync.disconnect('b')
+    assert sync.snapshot(1) is None
+
+
+def test_live_patches_leave_out_random_events(app, client, festival_id):
+    socket = socketio.test_client(flask_app, flask_test_client=client)
+    socket.emit('join_festival', {'festival_id': festival_id})
+    state = next(message for message in socket.get_received() if message['name'] == 'festival_state')['args'][0]
+    assert 'events' in state['data']
+    assert 'events' not in state_sync.snapshot(festival_id)[1]
+
+    client.post(f'/api/advance_time/{festival_id}')
+    client.post(f'/api/advance_time/{festival_id}')
+    patches = [message['args'][0] for message in socket.get_received() if message['name'] == 'festival_patch']
+    assert patches
+    assert not any(operation['path'].startswith('/events') for patch in patches for operation in patch['patch'])
+
+    socket.disconnect()
+    assert state_sync.snapshot(festival_id) is None
@@ -0,0 +1,42 @@
+import app as app_module
+
+
+def fetch_pages(client, **params):
+    pages, cursor = [], None
+    while True:
+        query = dict(params, after=cursor) if cursor else params
+        response = client.get('/api/vendors/available', query_string=query)
+        pages.append(response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return pages
+
+
+def test_keyset_pages_cover_the_market_once_in_order(app, client):
+    pages = fetch_pages(client, sort='cost', count=7)
+    vendors = [vendor for page in pages for vendor in page]
+    large_pages = fetch_pages(client, sort='cost', count=100)
+
+    assert len(pages) > 1
+    assert len({vendor['id'] for vendor in vendors}) == len(vendors)
+    assert [vendor['cost'] for vendor in vendors] == sorted(vendor['cost'] for vendor in vendors)
+    assert [vendor['id'] for vendor in vendors] == [vendor['id'] for page in large_pages for vendor in page]
+
+
+def test_filters_apply_across_pages(app, client):
+    vendors = [vendor for page in fetch_pages(client, sort='quality', count=3, min_quality=5) for vendor in page]
+
+    assert vendors
+    assert all(vendor['quality'] >= 5 for vendor in vendors)
+
+
+def test_malformed_cursor_is_rejected(app, client):
+    assert client.get('/api/vendors/available?after=not-a-cursor').status_code == 400
+
+
+def test_generate_validates_and_caps_the_count(app, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'MARKET_GENERATE_LIMIT', 3)
+
+    assert client.post('/api/vendors/market/generate', json={'count': 'many'}).status_code == 400
+    assert client.post('/api/vendors/market/generate', json={'count': 2, 'seed': 'x'}).status_code == 400
+    assert client.post('/api/vendors/market/generate', json={'count': 50, 'seed': 1}).get_json()['generated'] == 3
@@ -0,0 +1,43 @@
+from app import build_festival_payload, game_coordinator
+from models import Festival
+
+
+def hire_vendors(client, festival_id, count):
+    for vendor in client.get(f'/api/vendors/available?count={count}').get_json():
+        client.post('/api/vendors/hire', json={'festival_id': festival_id, 'vendor_id': vendor['id']})
+
+
+def test_relationships_endpoint_keeps_list_shape(client, festival_id):
+    hire_vendors(client, festival_id, 12)
+
+    response = client.get(f'/api/vendors/relationships/{festival_id}')
+    summary = client.get(f'/api/vendors/relationships/{festival_id}/summary').get_json()
+
+    assert isinstance(response.get_json(), list)
+    total = summary['complementary_pairs'] + summary['competitive_pairs']
+    assert int(response.headers['X-Total-Count']) == total
+    assert len(response.get_json()) == min(total, 200)
+
+
+def test_relationship_pages_partition_all_pairs(client, festival_id):
+    hire_vendors(client, festival_id, 12)
+
+    everything = client.get(f'/api/vendors/relationships/{festival_id}').get_json()
+    pages = [client.get(f'/api/vendors/relationships/{festival_id}?page={page}&per_page=5').get_json()
+             for page in range(1, len(everything) // 5 + 2)]
+
+    assert [pair for page in pages for pair in page] == everything
+
+
+def test_festival_payload_computes_relationships_once(app, client, festival_id, monkeypatch):
+    hire_vendors(client, festival_id, 4)
+    vendor_system = game_coordinator.vendor_system
+    calls = []
+    original = vendor_system.calculate_vendor_relationships
+    monkeypatch.setattr(vendor_system, 'calculate_vendor_relationships',
+                        lambda festival_id: calls.append(festival_id) or original(festival_id))
+
+    payload = build_festival_payload(Festival.query.get(festival_id))
+
+    assert calls == [festival_id]
+    assert payload['vendor_relationship_summary']['vendor_count'] == 4
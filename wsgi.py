@@ -0,0 +1,31 @@
+"""
+Production entry point - Serves the app and Socket.IO on an eventlet or gevent event loop
+
+    python wsgi.py                                    # one process
+    gunicorn -c gunicorn.conf.py wsgi:app             # the same, managed by gunicorn
+
+SOCKETIO_ASYNC_MODE picks eventlet (default) or gevent. The event loop's
+monkey patching has to happen before anything else is imported, which is
+why this module patches first and only then imports the app.
+"""
+import os
+
+ASYNC_MODE = os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'eventlet')
+
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+else:
+    raise RuntimeError(f'SOCKETIO_ASYNC_MODE must be eventlet or gevent, not {ASYNC_MODE!r}')
+
+from app import app, socketio  # noqa: E402
+from db_upgrade import upgrade_database  # noqa: E402
+
+with app.app_context():
+    upgrade_database()
+
+if __name__ == '__main__':
+    socketio.run(app, host=os.environ.get('HOST', '0.0.0.0'), port=int(os.environ.get('PORT', 5000)))